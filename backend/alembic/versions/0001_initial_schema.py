@@ -0,0 +1,172 @@
+"""initial schema
+
+The tables as created by Base.metadata.create_all before migrations were
+introduced. Databases created that way are stamped with this revision by
+app.migrate instead of running it.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("hashed_password", sa.String(length=255), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("consent_timestamp", sa.DateTime(), nullable=True),
+        sa.Column("data_processing_consent", sa.Boolean(), nullable=False),
+        sa.Column("terms_accepted", sa.Boolean(), nullable=False),
+        sa.Column("privacy_policy_accepted", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_id", "users", ["id"])
+
+    op.create_table(
+        "agents",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("system_prompt", sa.Text(), nullable=False),
+        sa.Column("greeting_message", sa.Text(), nullable=False),
+        sa.Column("voice_id", sa.String(length=255), nullable=True),
+        sa.Column("voice_provider", sa.String(length=50), nullable=False),
+        sa.Column("language", sa.String(length=10), nullable=False),
+        sa.Column("tools_config", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_agents_id", "agents", ["id"])
+    op.create_index("ix_agents_user_id", "agents", ["user_id"])
+
+    op.create_table(
+        "phone_numbers",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("agent_id", sa.Integer(), nullable=True),
+        sa.Column("phone_number", sa.String(length=50), nullable=False),
+        sa.Column("provider", sa.String(length=50), nullable=False),
+        sa.Column("provider_config", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["agent_id"], ["agents.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_phone_numbers_agent_id", "phone_numbers", ["agent_id"])
+    op.create_index("ix_phone_numbers_id", "phone_numbers", ["id"])
+    op.create_index("ix_phone_numbers_phone_number", "phone_numbers", ["phone_number"], unique=True)
+    op.create_index("ix_phone_numbers_user_id", "phone_numbers", ["user_id"])
+
+    op.create_table(
+        "conversations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("agent_id", sa.Integer(), nullable=False),
+        sa.Column("phone_number_id", sa.Integer(), nullable=True),
+        sa.Column("caller_phone_number", sa.String(length=50), nullable=False),
+        sa.Column("call_sid", sa.String(length=255), nullable=True),
+        sa.Column("direction", sa.String(length=20), nullable=False),
+        sa.Column("start_time", sa.DateTime(), nullable=False),
+        sa.Column("end_time", sa.DateTime(), nullable=True),
+        sa.Column("consent_recorded", sa.Boolean(), nullable=False),
+        sa.Column("caller_consented", sa.Boolean(), nullable=False),
+        sa.Column("status", sa.String(length=50), nullable=False),
+        sa.ForeignKeyConstraint(["agent_id"], ["agents.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["phone_number_id"], ["phone_numbers.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_conversations_agent_id", "conversations", ["agent_id"])
+    op.create_index("ix_conversations_call_sid", "conversations", ["call_sid"], unique=True)
+    op.create_index("ix_conversations_id", "conversations", ["id"])
+    op.create_index("ix_conversations_user_id", "conversations", ["user_id"])
+
+    op.create_table(
+        "messages",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("conversation_id", sa.Integer(), nullable=False),
+        sa.Column("role", sa.String(length=50), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("audio_url", sa.String(length=500), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.Column("anonymized", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["conversation_id"], ["conversations.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_messages_conversation_id", "messages", ["conversation_id"])
+    op.create_index("ix_messages_id", "messages", ["id"])
+
+    op.create_table(
+        "call_logs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("conversation_id", sa.Integer(), nullable=False),
+        sa.Column("duration", sa.Float(), nullable=True),
+        sa.Column("status", sa.String(length=50), nullable=False),
+        sa.Column("transcript", sa.Text(), nullable=True),
+        sa.Column("summary", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("retention_until", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["conversation_id"], ["conversations.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_call_logs_conversation_id", "call_logs", ["conversation_id"], unique=True)
+    op.create_index("ix_call_logs_id", "call_logs", ["id"])
+
+    op.create_table(
+        "data_deletion_requests",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("requested_at", sa.DateTime(), nullable=False),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.Column("status", sa.String(length=50), nullable=False),
+        sa.Column("notes", sa.String(length=500), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_data_deletion_requests_id", "data_deletion_requests", ["id"])
+    op.create_index("ix_data_deletion_requests_user_id", "data_deletion_requests", ["user_id"])
+
+    op.create_table(
+        "audit_logs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("action", sa.String(length=100), nullable=False),
+        sa.Column("resource", sa.String(length=100), nullable=True),
+        sa.Column("resource_id", sa.Integer(), nullable=True),
+        sa.Column("details", sa.JSON(), nullable=True),
+        sa.Column("ip_address", sa.String(length=50), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_audit_logs_id", "audit_logs", ["id"])
+    op.create_index("ix_audit_logs_timestamp", "audit_logs", ["timestamp"])
+    op.create_index("ix_audit_logs_user_id", "audit_logs", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("audit_logs")
+    op.drop_table("data_deletion_requests")
+    op.drop_table("call_logs")
+    op.drop_table("messages")
+    op.drop_table("conversations")
+    op.drop_table("phone_numbers")
+    op.drop_table("agents")
+    op.drop_table("users")
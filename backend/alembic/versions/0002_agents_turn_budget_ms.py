@@ -0,0 +1,27 @@
+"""agents.turn_budget_ms
+
+The per-agent turn latency budget. Kept apart from the index migrations
+and idempotent, so it can be applied on its own, ahead of any code that
+reads the column. Databases created by create_all after the column was
+added already have it.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE agents ADD COLUMN IF NOT EXISTS turn_budget_ms INTEGER")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE agents DROP COLUMN IF EXISTS turn_budget_ms")
@@ -0,0 +1,99 @@
+"""hot path indexes
+
+Adds composite and partial indexes for the call history, message and worker
+queries, and drops the single-column indexes they make redundant. The call
+history and message indexes end in id, which breaks ties in their sort
+order, so a page of either list is a single index range scan.
+
+Indexes are built CONCURRENTLY so live tables stay writable during the
+deploy. A failed concurrent build leaves an INVALID index behind, which
+IF NOT EXISTS would keep, so such leftovers are dropped and rebuilt.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def drop_invalid_index(name: str) -> None:
+    """Drop an index left INVALID by an interrupted concurrent build"""
+    if op.get_context().as_sql:
+        # Offline SQL cannot look, so the index is always rebuilt
+        invalid = True
+    else:
+        invalid = op.get_bind().execute(
+            sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+            {"name": name}
+        ).scalar()
+
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True, if_exists=True)
+
+
+def create_index_concurrently(name: str, table: str, columns, **kwargs) -> None:
+    drop_invalid_index(name)
+    op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kwargs)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        create_index_concurrently(
+            "ix_conversations_user_id_start_time_id",
+            "conversations",
+            ["user_id", sa.text("start_time DESC"), sa.text("id DESC")],
+        )
+        create_index_concurrently("ix_conversations_end_time", "conversations", ["end_time"])
+        create_index_concurrently(
+            "ix_messages_conversation_id_timestamp_id",
+            "messages",
+            ["conversation_id", "timestamp", "id"],
+        )
+        create_index_concurrently(
+            "ix_messages_conversation_id_not_anonymized",
+            "messages",
+            ["conversation_id"],
+            postgresql_where=sa.text("anonymized = false"),
+        )
+        create_index_concurrently("ix_call_logs_retention_until", "call_logs", ["retention_until"])
+        create_index_concurrently("ix_data_deletion_requests_status", "data_deletion_requests", ["status"])
+
+        # Two-column versions of the composite indexes built by earlier releases
+        for name, table in (
+            ("ix_conversations_user_id_start_time", "conversations"),
+            ("ix_messages_conversation_id_timestamp", "messages"),
+        ):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+        # Covered by the composite indexes above
+        op.drop_index(
+            "ix_conversations_user_id",
+            table_name="conversations",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_messages_conversation_id",
+            table_name="messages",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    op.create_index("ix_messages_conversation_id", "messages", ["conversation_id"])
+    op.create_index("ix_conversations_user_id", "conversations", ["user_id"])
+    op.drop_index("ix_data_deletion_requests_status", table_name="data_deletion_requests")
+    op.drop_index("ix_call_logs_retention_until", table_name="call_logs")
+    op.drop_index("ix_messages_conversation_id_not_anonymized", table_name="messages")
+    op.drop_index("ix_messages_conversation_id_timestamp_id", table_name="messages")
+    op.drop_index("ix_conversations_end_time", table_name="conversations")
+    op.drop_index("ix_conversations_user_id_start_time_id", table_name="conversations")
@@ -1,13 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import get_current_user
-from app.models.user import User
+from app.schemas.user import CurrentUser
 from app.models.agent import Agent
 from app.schemas.agent import AgentCreate, AgentUpdate, AgentResponse
+from app.services.tts_cache import tts_cache
 
 router = APIRouter()
 
@@ -15,7 +16,8 @@ router = APIRouter()
 @router.post("/", response_model=AgentResponse, status_code=status.HTTP_201_CREATED)
 async def create_agent(
     agent_data: AgentCreate,
-    current_user: User = Depends(get_current_user),
+    background_tasks: BackgroundTasks,
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new agent"""
@@ -34,13 +36,16 @@ async def create_agent(
     await db.commit()
     await db.refresh(new_agent)
 
+    # Synthesize the greeting once, ahead of the first call
+    background_tasks.add_task(tts_cache.prerender_agent, new_agent.voice_id, new_agent.greeting_message)
+
     return new_agent
 
 
 @router.get("/", response_model=List[AgentResponse])
 async def list_agents(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List all agents for the current user"""
     result = await db.execute(
@@ -53,7 +58,7 @@ async def list_agents(
 @router.get("/{agent_id}", response_model=AgentResponse)
 async def get_agent(
     agent_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get a specific agent"""
@@ -75,7 +80,8 @@ async def get_agent(
 async def update_agent(
     agent_id: int,
     agent_data: AgentUpdate,
-    current_user: User = Depends(get_current_user),
+    background_tasks: BackgroundTasks,
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Update an agent"""
@@ -101,13 +107,16 @@ async def update_agent(
     await db.commit()
     await db.refresh(agent)
 
+    if "greeting_message" in update_data or "voice_id" in update_data:
+        background_tasks.add_task(tts_cache.prerender_agent, agent.voice_id, agent.greeting_message)
+
     return agent
 
 
 @router.delete("/{agent_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_agent(
     agent_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete an agent"""
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import Response, FileResponse
+import os
+
+from app.services.tts_cache import tts_cache, CACHE_KEY_PATTERN, AUDIO_TYPES
+
+router = APIRouter()
+
+# Cached audio is content-addressed and never changes
+CACHE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+# Call replies must not outlive their short TTL in any cache
+REPLY_HEADERS = {"Cache-Control": "no-store"}
+MEDIA_TYPES = {extension: media_type for extension, media_type in AUDIO_TYPES.values()}
+
+
+@router.get("/{key}.{extension}")
+async def get_cached_audio(key: str, extension: str):
+    """Serve synthesized speech from the TTS cache (used by Twilio <Play>)"""
+    if not CACHE_KEY_PATTERN.match(key) or extension not in MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio not found"
+        )
+
+    audio = tts_cache.get_memory(key)
+    if audio is not None:
+        return Response(content=audio, media_type=MEDIA_TYPES[extension], headers=CACHE_HEADERS)
+
+    path = tts_cache.path(key, extension)
+    if os.path.exists(path):
+        return FileResponse(path, media_type=MEDIA_TYPES[extension], headers=CACHE_HEADERS)
+
+    audio = await tts_cache.get_reply(key)
+    if audio is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio not found"
+        )
+
+    return Response(content=audio, media_type=MEDIA_TYPES[extension], headers=REPLY_HEADERS)
@@ -5,38 +5,19 @@ from datetime import datetime
 
 from app.core.database import get_db
 from app.core.security import (
-    get_password_hash,
-    verify_password,
+    password_hasher,
     create_access_token,
     create_refresh_token,
     decode_token,
     get_current_user,
 )
 from app.models.user import User
-from app.models.audit_log import AuditLog
-from app.schemas.user import UserCreate, UserLogin, UserResponse, TokenResponse, RefreshTokenRequest
+from app.schemas.user import UserCreate, UserLogin, UserResponse, TokenResponse, RefreshTokenRequest, CurrentUser
+from app.services.audit_log import audit_logger
 
 router = APIRouter()
 
 
-async def log_audit(
-    db: AsyncSession,
-    user_id: int,
-    action: str,
-    ip_address: str = None,
-    details: dict = None
-):
-    """Helper function to log audit events"""
-    audit_log = AuditLog(
-        user_id=user_id,
-        action=action,
-        ip_address=ip_address,
-        details=details
-    )
-    db.add(audit_log)
-    await db.commit()
-
-
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
@@ -76,7 +57,7 @@ async def register(
     # Create user
     new_user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await password_hasher.hash(user_data.password),
         data_processing_consent=user_data.data_processing_consent,
         terms_accepted=user_data.terms_accepted,
         privacy_policy_accepted=user_data.privacy_policy_accepted,
@@ -88,8 +69,7 @@ async def register(
     await db.refresh(new_user)
 
     # Log audit
-    await log_audit(
-        db,
+    await audit_logger.log(
         new_user.id,
         "register",
         ip_address=request.client.host if request.client else None
@@ -116,15 +96,14 @@ async def login(
     result = await db.execute(select(User).where(User.email == credentials.email))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not user or not await password_hasher.verify(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
 
     # Log audit
-    await log_audit(
-        db,
+    await audit_logger.log(
         user.id,
         "login",
         ip_address=request.client.host if request.client else None
@@ -177,7 +156,7 @@ async def refresh_token(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """Get current user information"""
     return current_user
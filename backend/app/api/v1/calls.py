@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import select, tuple_
+from datetime import datetime
+from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_read_db
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
 from app.core.security import get_current_user
-from app.models.user import User
+from app.schemas.user import CurrentUser
 from app.models.conversation import Conversation
 from app.models.message import Message
 from app.models.call_log import CallLog
@@ -13,31 +15,68 @@ from app.schemas.conversation import ConversationResponse, MessageResponse, Call
 
 router = APIRouter()
 
+MAX_CONVERSATIONS_PAGE = 200
+MAX_MESSAGES_PAGE = 500
+
 
 @router.get("/conversations", response_model=List[ConversationResponse])
 async def list_conversations(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
-    limit: int = 50,
-    offset: int = 0
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    limit: int = Query(50, ge=1, le=MAX_CONVERSATIONS_PAGE),
+    cursor: Optional[str] = None,
+    agent_id: Optional[int] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    direction: Optional[str] = None,
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+    offset: Optional[int] = Query(None, ge=0, deprecated=True)
 ):
-    """List all conversations for the current user"""
-    result = await db.execute(
-        select(Conversation)
-        .where(Conversation.user_id == current_user.id)
-        .order_by(Conversation.start_time.desc())
-        .limit(limit)
-        .offset(offset)
-    )
+    """
+    List conversations for the current user, newest first
+
+    Pages by keyset on (start_time, id), so every page costs the same. If
+    there are more results, the X-Next-Cursor response header holds the
+    cursor for the next page. `offset` is still accepted for older clients,
+    but gets slower the deeper the page; use the cursor instead.
+    """
+    query = select(Conversation).where(Conversation.user_id == current_user.id)
+
+    if agent_id is not None:
+        query = query.where(Conversation.agent_id == agent_id)
+    if status_filter is not None:
+        query = query.where(Conversation.status == status_filter)
+    if direction is not None:
+        query = query.where(Conversation.direction == direction)
+    if start_from is not None:
+        query = query.where(Conversation.start_time >= start_from)
+    if start_to is not None:
+        query = query.where(Conversation.start_time < start_to)
+    if cursor:
+        start_time, conversation_id = decode_cursor(cursor)
+        query = query.where(tuple_(Conversation.start_time, Conversation.id) < tuple_(start_time, conversation_id))
+
+    query = query.order_by(Conversation.start_time.desc(), Conversation.id.desc()).limit(limit + 1)
+    if offset:
+        query = query.offset(offset)
+
+    result = await db.execute(query)
     conversations = result.scalars().all()
+
+    if len(conversations) > limit:
+        conversations = conversations[:limit]
+        last = conversations[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.start_time, last.id)
+
     return conversations
 
 
 @router.get("/conversations/{conversation_id}", response_model=ConversationResponse)
 async def get_conversation(
     conversation_id: int,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific conversation"""
     result = await db.execute(
@@ -60,10 +99,17 @@ async def get_conversation(
 @router.get("/conversations/{conversation_id}/messages", response_model=List[MessageResponse])
 async def get_conversation_messages(
     conversation_id: int,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    limit: int = Query(MAX_MESSAGES_PAGE, ge=1, le=MAX_MESSAGES_PAGE),
+    cursor: Optional[str] = None
 ):
-    """Get all messages for a conversation"""
+    """
+    Get the messages of a conversation in order
+
+    Pages by keyset on (timestamp, id); see list_conversations.
+    """
     # Verify conversation belongs to user
     conv_result = await db.execute(
         select(Conversation).where(
@@ -80,21 +126,31 @@ async def get_conversation_messages(
         )
 
     # Get messages
+    query = select(Message).where(Message.conversation_id == conversation_id)
+    if cursor:
+        timestamp, message_id = decode_cursor(cursor)
+        query = query.where(tuple_(Message.timestamp, Message.id) > tuple_(timestamp, message_id))
+
     messages_result = await db.execute(
-        select(Message)
-        .where(Message.conversation_id == conversation_id)
-        .order_by(Message.timestamp.asc())
+        query
+        .order_by(Message.timestamp.asc(), Message.id.asc())
+        .limit(limit + 1)
     )
     messages = messages_result.scalars().all()
 
+    if len(messages) > limit:
+        messages = messages[:limit]
+        last = messages[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.timestamp, last.id)
+
     return messages
 
 
 @router.get("/conversations/{conversation_id}/log", response_model=CallLogResponse)
 async def get_call_log(
     conversation_id: int,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get call log for a conversation"""
     # Verify conversation belongs to user
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -9,18 +9,21 @@ import io
 from app.core.database import get_db
 from app.core.security import get_current_user
 from app.models.user import User
+from app.schemas.user import CurrentUser
 from app.models.agent import Agent
 from app.models.conversation import Conversation
 from app.models.message import Message
 from app.models.call_log import CallLog
 from app.models.data_deletion_request import DataDeletionRequest
+from app.services.audit_log import audit_logger
 
 router = APIRouter()
 
 
 @router.get("/export")
 async def export_user_data(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Export all user data (GDPR Right to Access)"""
@@ -104,6 +107,12 @@ async def export_user_data(
 
         data["conversations"].append(conv_data)
 
+    await audit_logger.log(
+        current_user.id,
+        "export_data",
+        ip_address=request.client.host if request.client else None
+    )
+
     # Create JSON file in memory
     json_str = json.dumps(data, indent=2, ensure_ascii=False)
     json_bytes = json_str.encode('utf-8')
@@ -120,7 +129,7 @@ async def export_user_data(
 
 @router.post("/delete-account")
 async def request_account_deletion(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Request account deletion (GDPR Right to Erasure)"""
@@ -157,7 +166,7 @@ async def request_account_deletion(
 @router.delete("/delete-account/{request_id}")
 async def confirm_account_deletion(
     request_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Confirm and execute account deletion"""
@@ -183,13 +192,22 @@ async def confirm_account_deletion(
 
     try:
         # Delete user (cascade will delete all related data)
-        await db.delete(current_user)
+        user = await db.get(User, current_user.id)
+        await db.delete(user)
 
         # Mark request as completed
         deletion_request.status = "completed"
         deletion_request.completed_at = datetime.utcnow()
         await db.commit()
 
+        # The user's own audit logs are gone with the account
+        await audit_logger.log(
+            None,
+            "delete_account",
+            resource="users",
+            resource_id=current_user.id
+        )
+
         return {"message": "Account and all data successfully deleted"}
 
     except Exception as e:
@@ -3,9 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import get_current_user
-from app.models.user import User
+from app.schemas.user import CurrentUser
 from app.models.phone_number import PhoneNumber
 from app.models.agent import Agent
 from app.schemas.phone_number import PhoneNumberCreate, PhoneNumberUpdate, PhoneNumberResponse
@@ -16,7 +16,7 @@ router = APIRouter()
 @router.post("/", response_model=PhoneNumberResponse, status_code=status.HTTP_201_CREATED)
 async def create_phone_number(
     phone_data: PhoneNumberCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new phone number"""
@@ -60,8 +60,8 @@ async def create_phone_number(
 
 @router.get("/", response_model=List[PhoneNumberResponse])
 async def list_phone_numbers(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List all phone numbers for the current user"""
     result = await db.execute(
@@ -75,7 +75,7 @@ async def list_phone_numbers(
 async def update_phone_number(
     phone_number_id: int,
     phone_data: PhoneNumberUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Update a phone number (e.g., assign to different agent)"""
@@ -118,7 +118,7 @@ async def update_phone_number(
 @router.delete("/{phone_number_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_phone_number(
     phone_number_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a phone number"""
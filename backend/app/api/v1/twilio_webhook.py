@@ -1,24 +1,103 @@
-from fastapi import APIRouter, Form, Request
+from fastapi import APIRouter, Form, Request, WebSocket
 from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime
+from typing import Optional
+import asyncio
+import logging
+import time
+import uuid
 
+from app.core.config import settings
 from app.core.database import AsyncSessionLocal
+from app.core.deadline import deadline_after
+from app.core.metrics import metrics
+from app.core.redis import redis_client
 from app.models.phone_number import PhoneNumber
 from app.models.agent import Agent
 from app.models.conversation import Conversation
+from app.services import phrases
 from app.services.twilio_service import twilio_service
-from app.services.conversation_manager import ConversationManager
+from app.services.conversation_manager import ConversationManager, load_conversation_manager
+from app.services.call_state_store import call_state_store
+from app.services.call_finalizer import FINALIZE_CALL_JOB
+from app.services.job_queue import job_queue
+from app.services.media_stream import MediaStreamSession
+from app.services.speculation import speculation_manager
+from app.services.tts_cache import tts_cache
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# Store active conversations
-active_conversations = {}
+# Responses of turns that finished after their latency budget, by call and turn
+TURN_RESULT_KEY = "turn_result:{}:{}"
+TURN_RESULT_TTL_SECONDS = 60
+
+# Turns finishing in the background after a holding phrase was played
+background_turns = set()
+
+
+def public_url(request: Request, path: str) -> str:
+    """Absolute URL Twilio can fetch a path of this API from"""
+    base_url = settings.PUBLIC_BASE_URL or f"https://{request.headers.get('host', request.url.netloc)}"
+    return f"{base_url.rstrip('/')}{path}"
+
+
+def media_stream_url(request: Request) -> str:
+    """Public WebSocket URL Twilio should connect the media stream to"""
+    base_url = settings.PUBLIC_WS_URL or f"wss://{request.headers.get('host', request.url.netloc)}"
+    return f"{base_url.rstrip('/')}/api/v1/twilio/media-stream"
+
+
+async def cached_audio_url(
+    request: Request,
+    message: str,
+    voice_id: Optional[str],
+    persist: bool = True
+) -> Optional[str]:
+    """Public URL of the message synthesized in the agent's voice, None if synthesis fails"""
+    try:
+        key, _ = await tts_cache.synthesize(message, voice_id, persist=persist)
+        return public_url(request, f"/api/v1/audio/{key}.mp3")
+    except Exception as e:
+        logger.error(f"TTS failed, falling back to <Say>: {str(e)}")
+        return None
+
+
+async def speech_response(
+    request: Request,
+    message: str,
+    gather: bool = True,
+    voice_id: Optional[str] = None,
+    persist: bool = True
+) -> Response:
+    """
+    TwiML response speaking a message in the agent's ElevenLabs voice
+
+    The audio comes from the TTS cache and is played with <Play>; if
+    synthesis fails, Twilio's <Say> voice is used instead. With speculative
+    generation enabled, the <Gather> reports partial results. Pass
+    persist=False for generated replies, which must not be cached on disk.
+    """
+    audio_url = await cached_audio_url(request, message, voice_id, persist=persist)
+
+    partial_result_callback = None
+    if gather and settings.SPECULATIVE_LLM_ENABLED:
+        partial_result_callback = public_url(request, "/api/v1/twilio/partial-speech")
+
+    twiml = twilio_service.create_twiml_response(
+        message,
+        gather=gather,
+        audio_url=audio_url,
+        partial_result_callback=partial_result_callback
+    )
+    return Response(content=twiml, media_type="application/xml")
 
 
 @router.post("/incoming-call")
 async def handle_incoming_call(
+    request: Request,
     From: str = Form(...),
     To: str = Form(...),
     CallSid: str = Form(...)
@@ -33,11 +112,7 @@ async def handle_incoming_call(
 
         if not phone_number_record or not phone_number_record.agent_id:
             # No agent configured for this number
-            twiml = twilio_service.create_twiml_response(
-                "Entschuldigung, kein Agent ist für diese Nummer konfiguriert.",
-                gather=False
-            )
-            return Response(content=twiml, media_type="application/xml")
+            return await speech_response(request, phrases.NO_AGENT_CONFIGURED, gather=False)
 
         # Get agent
         agent_result = await db.execute(
@@ -46,11 +121,7 @@ async def handle_incoming_call(
         agent = agent_result.scalar_one_or_none()
 
         if not agent:
-            twiml = twilio_service.create_twiml_response(
-                "Entschuldigung, der Agent konnte nicht gefunden werden.",
-                gather=False
-            )
-            return Response(content=twiml, media_type="application/xml")
+            return await speech_response(request, phrases.AGENT_NOT_FOUND, gather=False)
 
         # Create conversation
         conversation = Conversation(
@@ -66,22 +137,90 @@ async def handle_incoming_call(
         await db.commit()
         await db.refresh(conversation)
 
-        # Create conversation manager
+        # Create conversation manager and share its state with all workers
         conv_manager = ConversationManager(
             agent=agent,
             db=db,
             conversation=conversation,
             call_sid=CallSid
         )
-        active_conversations[CallSid] = conv_manager
+        await call_state_store.create(conv_manager.to_state())
+
+        # Hand the call over to the real-time pipeline, which plays the greeting itself
+        if settings.TWILIO_MEDIA_STREAMS_ENABLED:
+            twiml = twilio_service.create_stream_response(media_stream_url(request))
+            return Response(content=twiml, media_type="application/xml")
 
         # Respond with greeting
-        twiml = twilio_service.create_twiml_response(agent.greeting_message, gather=True)
-        return Response(content=twiml, media_type="application/xml")
+        return await speech_response(request, agent.greeting_message, gather=True, voice_id=agent.voice_id)
+
+
+async def run_turn(db: AsyncSession, conv_manager: ConversationManager, state, user_input: str) -> str:
+    """
+    Answer one caller utterance and save the turn, closing `db` when done
+
+    The turn is bounded by TURN_HARD_TIMEOUT_SECONDS. The reply is also
+    synthesized here, so it is ready to play once the turn completes.
+    """
+    started = time.monotonic()
+    deadline = deadline_after(settings.TURN_HARD_TIMEOUT_SECONDS)
+    async with db:
+        # Reuse the response speculatively started on the partial transcript
+        speculation = await speculation_manager.take(conv_manager.call_sid, user_input, state.version)
+
+        try:
+            response_text = await conv_manager.process_message(
+                user_input,
+                save_to_db=True,
+                first_response=speculation.replay(deadline) if speculation else None,
+                deadline=deadline
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Turn on call {conv_manager.call_sid} exceeded the hard timeout")
+            metrics.increment("turn_outcome", outcome="timeout")
+            await conv_manager.finish_interrupted_turn("", save_to_db=True)
+            response_text = phrases.TURN_TIMEOUT
+
+        await call_state_store.save_merged(
+            conv_manager.to_state(state),
+            conv_manager.turn_messages
+        )
+
+    try:
+        await tts_cache.synthesize(response_text, conv_manager.agent.voice_id, persist=False)
+    except Exception as e:
+        # speech_response falls back to <Say>
+        logger.error(f"TTS failed for call {conv_manager.call_sid}: {str(e)}")
+
+    metrics.observe("turn_latency_ms", (time.monotonic() - started) * 1000)
+    return response_text
+
+
+async def publish_turn_result(call_sid: str, turn_id: str, turn: asyncio.Task) -> None:
+    """Hand the response of a turn that exceeded its budget to /continue-turn"""
+    try:
+        response_text = await turn
+    except Exception as e:
+        logger.error(f"Background turn failed for call {call_sid}: {str(e)}")
+        metrics.increment("turn_outcome", outcome="error")
+        response_text = phrases.TECHNICAL_PROBLEM
+
+    key = TURN_RESULT_KEY.format(call_sid, turn_id)
+    await redis_client.rpush(key, response_text)
+    await redis_client.expire(key, TURN_RESULT_TTL_SECONDS)
+
+
+async def holding_response(request: Request, voice_id: Optional[str], turn_id: str, attempt: int) -> Response:
+    """Play the holding phrase, then ask /continue-turn for the response"""
+    audio_url = await cached_audio_url(request, phrases.HOLDING, voice_id)
+    redirect_url = public_url(request, f"/api/v1/twilio/continue-turn?turn_id={turn_id}&attempt={attempt}")
+    twiml = twilio_service.create_holding_response(phrases.HOLDING, redirect_url, audio_url=audio_url)
+    return Response(content=twiml, media_type="application/xml")
 
 
 @router.post("/process-speech")
 async def process_speech(
+    request: Request,
     SpeechResult: str = Form(None),
     CallSid: str = Form(...),
     UnstableSpeechResult: str = Form(None)
@@ -89,29 +228,98 @@ async def process_speech(
     """Process speech input from Twilio"""
     user_input = SpeechResult or UnstableSpeechResult
 
-    if not user_input:
-        twiml = twilio_service.create_twiml_response(
-            "Entschuldigung, ich habe Sie nicht verstanden. Können Sie das wiederholen?",
-            gather=True
-        )
-        return Response(content=twiml, media_type="application/xml")
+    # The session is handed to the turn, which may outlive this request
+    db = AsyncSessionLocal()
+    try:
+        # Get conversation manager
+        conv_manager, state = await load_conversation_manager(db, CallSid)
+    except Exception:
+        await db.close()
+        raise
 
-    # Get conversation manager
-    conv_manager = active_conversations.get(CallSid)
+    if not conv_manager or not user_input:
+        await db.close()
+        if not conv_manager:
+            return await speech_response(request, phrases.TECHNICAL_PROBLEM, gather=False)
+        return await speech_response(request, phrases.NOT_UNDERSTOOD, gather=True, voice_id=conv_manager.agent.voice_id)
 
-    if not conv_manager:
-        twiml = twilio_service.create_twiml_response(
-            "Entschuldigung, es gab ein technisches Problem.",
-            gather=False
-        )
-        return Response(content=twiml, media_type="application/xml")
+    voice_id = conv_manager.agent.voice_id
+
+    # Process message within the agent's latency budget
+    turn = asyncio.create_task(run_turn(db, conv_manager, state, user_input))
+    done, _ = await asyncio.wait([turn], timeout=conv_manager.turn_budget_seconds)
 
-    # Process message
-    response_text = await conv_manager.process_message(user_input, save_to_db=True)
+    if not done:
+        # Keep the caller company and let the turn finish in the background
+        metrics.increment("turn_outcome", outcome="holding")
+        turn_id = uuid.uuid4().hex
+        publisher = asyncio.create_task(publish_turn_result(CallSid, turn_id, turn))
+        background_turns.add(publisher)
+        publisher.add_done_callback(background_turns.discard)
+        return await holding_response(request, voice_id, turn_id, attempt=1)
+
+    try:
+        response_text = turn.result()
+        metrics.increment("turn_outcome", outcome="completed")
+    except Exception as e:
+        logger.error(f"Turn failed for call {CallSid}: {str(e)}")
+        metrics.increment("turn_outcome", outcome="error")
+        response_text = phrases.TECHNICAL_PROBLEM
 
     # Create TwiML response
-    twiml = twilio_service.create_twiml_response(response_text, gather=True)
-    return Response(content=twiml, media_type="application/xml")
+    return await speech_response(request, response_text, gather=True, voice_id=voice_id, persist=False)
+
+
+@router.post("/continue-turn")
+async def continue_turn(
+    request: Request,
+    CallSid: str = Form(...),
+    turn_id: str = "",
+    attempt: int = 1
+):
+    """Deliver the response of a turn that exceeded its latency budget"""
+    state = await call_state_store.load(CallSid)
+    if not state:
+        return await speech_response(request, phrases.TECHNICAL_PROBLEM, gather=False)
+
+    async with AsyncSessionLocal() as db:
+        agent = await db.get(Agent, state.agent_id)
+    if not agent:
+        return await speech_response(request, phrases.TECHNICAL_PROBLEM, gather=False)
+
+    budget_seconds = (agent.turn_budget_ms or settings.TURN_BUDGET_MS) / 1000
+    result = await redis_client.blpop(TURN_RESULT_KEY.format(CallSid, turn_id), timeout=budget_seconds)
+    if result:
+        metrics.increment("turn_continue", result="delivered")
+        return await speech_response(request, result[1], gather=True, voice_id=agent.voice_id, persist=False)
+
+    if attempt < settings.TURN_CONTINUE_ATTEMPTS:
+        metrics.increment("turn_continue", result="waiting")
+        return await holding_response(request, agent.voice_id, turn_id, attempt=attempt + 1)
+
+    # Give up on the turn and let the caller try again
+    metrics.increment("turn_continue", result="abandoned")
+    return await speech_response(request, phrases.TURN_TIMEOUT, gather=True, voice_id=agent.voice_id)
+
+
+@router.post("/partial-speech")
+async def partial_speech(
+    CallSid: str = Form(...),
+    StableSpeechResult: str = Form(None)
+):
+    """Start generating a response while the caller is still speaking"""
+    # Only the stable part, the unstable tail still changes with every result
+    if StableSpeechResult:
+        speculation_manager.on_partial_result(CallSid, StableSpeechResult)
+
+    return {"status": "ok"}
+
+
+@router.websocket("/media-stream")
+async def media_stream(websocket: WebSocket):
+    """Bidirectional Twilio media stream for real-time conversations"""
+    await websocket.accept()
+    await MediaStreamSession(websocket).run()
 
 
 @router.post("/call-status")
@@ -121,11 +329,17 @@ async def call_status(
 ):
     """Handle call status updates"""
     if CallStatus in ["completed", "failed", "busy", "no-answer"]:
-        # End conversation
-        conv_manager = active_conversations.get(CallSid)
+        state = await call_state_store.load(CallSid)
 
-        if conv_manager:
-            await conv_manager.end_conversation()
-            del active_conversations[CallSid]
+        if state:
+            # Summary and call log are created by the worker
+            if state.conversation_id:
+                await job_queue.enqueue(FINALIZE_CALL_JOB, {
+                    "conversation_id": state.conversation_id,
+                    "ended_at": datetime.utcnow().isoformat(),
+                    "call_status": CallStatus,
+                })
+            await call_state_store.delete(CallSid)
+        speculation_manager.discard(CallSid)
 
     return {"status": "ok"}
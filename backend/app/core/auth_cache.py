@@ -0,0 +1,176 @@
+from typing import Dict, Any, Optional, Set, Tuple
+import asyncio
+import logging
+import time
+
+from redis.asyncio import Redis
+from redis.exceptions import WatchError
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.core.ttl_cache import TTLCache
+from app.models.user import User
+from app.schemas.user import CurrentUser
+
+logger = logging.getLogger(__name__)
+
+# Changes to these columns invalidate the cached user
+CACHED_USER_FIELDS = tuple(CurrentUser.model_fields)
+
+
+class AuthCache:
+    """
+    Cache for get_current_user
+
+    Verified access token claims are kept in process until the token
+    expires (verifying an HS256 signature is cheaper than a Redis round
+    trip). The user projection lives in an in-process TTL LRU in front of
+    Redis, so most requests need neither Postgres nor Redis.
+
+    Users are invalidated whenever a session commits a deletion or a change
+    to one of the cached fields. Other workers drop their in-process copy
+    after AUTH_CACHE_MEMORY_TTL_SECONDS at the latest.
+
+    Invalidation bumps a per-user version in Redis (and a counter in
+    process). A user loaded from the database is only cached if neither
+    changed since before the load, so a request that read the row just
+    before a deletion or consent change cannot put it back.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        max_entries: int,
+        user_ttl: int,
+        memory_ttl: float,
+        key_prefix: str = "auth_user:"
+    ):
+        self.redis = redis
+        self.user_ttl = user_ttl
+        self.memory_ttl = memory_ttl
+        self.key_prefix = key_prefix
+        self.version_prefix = f"{key_prefix}version:"
+        self.claims = TTLCache(max_entries)
+        self.users = TTLCache(max_entries)
+        self._pending: Set[asyncio.Task] = set()
+        # Invalidations in this process, any user
+        self.invalidations = 0
+
+    def get_claims(self, token: str) -> Optional[Dict[str, Any]]:
+        return self.claims.get(token)
+
+    def set_claims(self, token: str, claims: Dict[str, Any]) -> None:
+        ttl = claims.get("exp", 0) - time.time()
+        if ttl > 0:
+            self.claims.set(token, claims, ttl)
+
+    async def get_user(self, user_id: int) -> Optional[CurrentUser]:
+        """Look up a user in memory, then in Redis"""
+        user = self.users.get(user_id)
+        if user is not None:
+            return user
+
+        try:
+            data = await self.redis.get(f"{self.key_prefix}{user_id}")
+        except Exception as e:
+            logger.warning(f"Auth cache lookup failed: {str(e)}")
+            return None
+
+        if data is None:
+            return None
+        user = CurrentUser.model_validate_json(data)
+        self.users.set(user_id, user, self.memory_ttl)
+        return user
+
+    async def user_version(self, user_id: int) -> Tuple[int, Optional[str]]:
+        """Version to pass to set_user, read before loading the user"""
+        try:
+            version = await self.redis.get(f"{self.version_prefix}{user_id}")
+        except Exception as e:
+            logger.warning(f"Auth cache lookup failed: {str(e)}")
+            version = None
+        return self.invalidations, version
+
+    async def set_user(self, user: CurrentUser, version: Tuple[int, Optional[str]]) -> None:
+        """Cache a user unless it was invalidated since `version` was read"""
+        invalidations, redis_version = version
+        version_key = f"{self.version_prefix}{user.id}"
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                await pipe.watch(version_key)
+                if await pipe.get(version_key) != redis_version:
+                    return
+                pipe.multi()
+                pipe.set(f"{self.key_prefix}{user.id}", user.model_dump_json(), ex=self.user_ttl)
+                await pipe.execute()
+        except WatchError:
+            # Invalidated meanwhile
+            return
+        except Exception as e:
+            logger.warning(f"Auth cache write failed: {str(e)}")
+
+        if self.invalidations == invalidations:
+            self.users.set(user.id, user, self.memory_ttl)
+
+    def _forget_user(self, user_id: int) -> None:
+        self.invalidations += 1
+        self.users.delete(user_id)
+
+    async def invalidate_user(self, user_id: int) -> None:
+        self._forget_user(user_id)
+        version_key = f"{self.version_prefix}{user_id}"
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.incr(version_key)
+                # Outlives any cached copy written before the bump
+                pipe.expire(version_key, self.user_ttl)
+                pipe.delete(f"{self.key_prefix}{user_id}")
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Auth cache invalidation failed: {str(e)}")
+
+    def invalidate_user_soon(self, user_id: int) -> None:
+        """Invalidate from synchronous code: memory at once, Redis in a task"""
+        self._forget_user(user_id)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self.invalidate_user(user_id))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+
+# Singleton instance
+auth_cache = AuthCache(
+    redis_client,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    user_ttl=settings.AUTH_USER_CACHE_TTL_SECONDS,
+    memory_ttl=settings.AUTH_CACHE_MEMORY_TTL_SECONDS
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context) -> None:
+    """Remember users deleted or changed in cached fields (e.g. consents)"""
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, User) or obj.id is None:
+            continue
+        state = inspect(obj)
+        if obj in session.deleted or any(
+            state.attrs[field].history.has_changes() for field in CACHED_USER_FIELDS
+        ):
+            session.info.setdefault("changed_user_ids", set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    for user_id in session.info.pop("changed_user_ids", ()):
+        auth_cache.invalidate_user_soon(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session) -> None:
+    session.info.pop("changed_user_ids", None)
@@ -0,0 +1,120 @@
+from typing import Optional
+import time
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    Closed: requests pass. After `failure_threshold` consecutive failures the
+    breaker opens and rejects requests for `recovery_timeout` seconds, then
+    lets a single probe request through (half-open). A successful probe
+    closes it again, a failed one re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at < self.recovery_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent (claims the probe slot when half-open)"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def release_probe(self) -> None:
+        """Give up a claimed probe slot without an outcome (e.g. the request was cancelled)"""
+        self.probe_in_flight = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.probe_in_flight = False
+
+
+class RedisCircuitBreaker:
+    """
+    Circuit breaker whose state is shared by all workers through Redis
+
+    Same policy as CircuitBreaker. The failure count and opening time live
+    in a Redis hash; the half-open probe slot is a key set with NX, so only
+    one worker probes a recovering dependency.
+    """
+
+    def __init__(self, redis, key: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.redis = redis
+        self.key = key
+        self.probe_key = f"{key}:probe"
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    async def load(self) -> str:
+        """Fetch the shared state and return it"""
+        data = await self.redis.hgetall(self.key)
+        self.failures = int(data.get("failures", 0))
+        self.opened_at = float(data["opened_at"]) if "opened_at" in data else None
+
+        if self.opened_at is None:
+            self.state = CircuitBreaker.CLOSED
+        elif time.time() - self.opened_at < self.recovery_timeout:
+            self.state = CircuitBreaker.OPEN
+        else:
+            self.state = CircuitBreaker.HALF_OPEN
+        return self.state
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a probe through"""
+        if self.opened_at is None:
+            return 0.0
+        return max(self.recovery_timeout - (time.time() - self.opened_at), 0.0)
+
+    async def allow_request(self) -> bool:
+        """Whether a request may be sent (claims the probe slot when half-open)"""
+        state = await self.load()
+        if state == CircuitBreaker.CLOSED:
+            return True
+        if state == CircuitBreaker.HALF_OPEN:
+            return bool(await self.redis.set(self.probe_key, 1, nx=True, ex=max(int(self.recovery_timeout), 1)))
+        return False
+
+    async def record_success(self) -> None:
+        if self.failures or self.opened_at is not None:
+            await self.redis.delete(self.key, self.probe_key)
+        self.state = CircuitBreaker.CLOSED
+
+    async def record_failure(self) -> None:
+        failures = await self.redis.hincrby(self.key, "failures", 1)
+        if self.state == CircuitBreaker.HALF_OPEN or failures >= self.failure_threshold:
+            await self.redis.hset(self.key, "opened_at", time.time())
+            await self.redis.delete(self.probe_key)
+            self.state = CircuitBreaker.OPEN
+        # Forget stale failures once the breaker could have recovered
+        await self.redis.expire(self.key, max(int(self.recovery_timeout * 10), 60))
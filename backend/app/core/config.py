@@ -6,13 +6,34 @@ class Settings(BaseSettings):
     # App
     APP_NAME: str = "CAL - AI Phone Agent System"
     DEBUG: bool = False
+    # Stable name of this process, unique among running ones; defaults to the
+    # hostname, which changes when a container is recreated
+    INSTANCE_NAME: str = ""
+    METRICS_TOKEN: str = ""  # Bearer token for scraping /metrics; the endpoint is disabled if empty
 
     # Database
     DATABASE_URL: str
+    DATABASE_READ_REPLICA_URLS: str = ""  # Comma-separated; read-only endpoints use these if set
+    DB_POOL_SIZE: int = 10  # Per process and engine
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # Prepared statements per connection; 0 behind PgBouncer in transaction mode
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
 
+    # Call state (shared between webhook workers via Redis)
+    CALL_STATE_TTL_SECONDS: int = 4 * 60 * 60
+
+    # Background jobs (consumed by app.worker)
+    JOB_WORKER_CONCURRENCY: int = 4
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BACKOFF_SECONDS: float = 10.0
+    JOB_POLL_ERROR_BACKOFF_SECONDS: float = 1.0  # After a Redis error in the consume loop, doubling per failure
+    JOB_POLL_ERROR_MAX_BACKOFF_SECONDS: float = 30.0
+
     # JWT
     JWT_SECRET_KEY: str
     JWT_REFRESH_SECRET_KEY: str
@@ -20,19 +41,103 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Password hashing (bcrypt thread pool per process)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 16  # Hashes waiting for a worker before requests get 429
+
+    # Audit log (batched inserts)
+    AUDIT_QUEUE_MAX_SIZE: int = 10000  # Events beyond this are dropped
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_REDIS_MIRROR: bool = False  # Keep queued events in Redis until written
+    AUDIT_CLOSE_TIMEOUT_SECONDS: float = 10.0  # Shutdown drain; the rest stays in the mirror or is logged
+
+    # Authentication cache (verified tokens and the current user)
+    AUTH_CACHE_MAX_ENTRIES: int = 10000  # Per process, for each of tokens and users
+    AUTH_USER_CACHE_TTL_SECONDS: int = 300  # Users in Redis
+    AUTH_CACHE_MEMORY_TTL_SECONDS: float = 10.0  # Users in process; bounds staleness on other workers after a change
+
     # Azure OpenAI
     AZURE_OPENAI_ENDPOINT: str
     AZURE_OPENAI_KEY: str
     AZURE_OPENAI_DEPLOYMENT: str
     AZURE_OPENAI_API_VERSION: str = "2024-02-15-preview"
+    AZURE_OPENAI_WHISPER_DEPLOYMENT: str = "whisper"
+
+    # LLM routing across deployments
+    LLM_BACKENDS: str = ""  # JSON list of {name, endpoint, api_key, deployment, provider, api_version, tasks}; defaults to the AZURE_OPENAI_* deployment
+    LLM_SUMMARY_DEPLOYMENT: str = ""  # Cheaper deployment on AZURE_OPENAI_ENDPOINT used for summaries only
+    LLM_HEDGE_AFTER_MS: float = 1200.0  # Send a second request if the first token takes longer
+    LLM_EWMA_ALPHA: float = 0.3
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 3
+    LLM_BREAKER_RECOVERY_SECONDS: float = 30.0
+
+    # Turn latency budget
+    TURN_BUDGET_MS: int = 4000  # Default per agent; a holding phrase is played when exceeded
+    TURN_HARD_TIMEOUT_SECONDS: float = 25.0  # Turns still running after this are abandoned
+    TURN_CONTINUE_ATTEMPTS: int = 3  # Holding phrases played before giving up on a turn
+
+    # Filler phrases in the streaming pipeline
+    FILLER_ENABLED: bool = True
+    FILLER_AFTER_MS: int = 1200  # Play a filler if the first sentence takes longer
+
+    # Speculative LLM generation on partial speech results (<Gather> mode)
+    SPECULATIVE_LLM_ENABLED: bool = False
+    SPECULATIVE_MIN_WORDS: int = 3  # Stable words needed before speculating
+
+    # Conversation history sent to the LLM
+    HISTORY_MAX_TOKENS: int = 3000
+    HISTORY_KEEP_TURNS: int = 4
+
+    # Tools
+    TOOL_TURN_TIMEOUT_SECONDS: float = 8.0
+    TOOL_HTTP_TIMEOUT_SECONDS: float = 10.0
+    TOOL_HTTP_MAX_CONNECTIONS: int = 100
+    TOOL_HTTP_MAX_CONNECTIONS_PER_HOST: int = 10
+    TOOL_HTTP2_ENABLED: bool = False
+    TOOL_HTTP_MAX_RESPONSE_BYTES: int = 256 * 1024  # Read cap for api_call response bodies
+    TOOL_RESPONSE_MAX_CHARS: int = 200  # Response text passed back to the LLM
+    TOOL_CACHE_MAX_ENTRIES: int = 10000  # In-process tier of the tool result cache
+    # Defaults for tools that do not set their own limits in tools_config
+    TOOL_DEFAULT_TIMEOUT_SECONDS: float = 5.0
+    TOOL_DEFAULT_MAX_CONCURRENCY: int = 20  # Per agent, tool and process
+    TOOL_BREAKER_FAILURE_THRESHOLD: int = 5
+    TOOL_BREAKER_RECOVERY_SECONDS: float = 30.0
+    # Comma-separated modules registering additional tool types
+    TOOL_PLUGIN_MODULES: str = ""
 
     # ElevenLabs
     ELEVENLABS_API_KEY: str
+    ELEVENLABS_API_URL: str = "https://api.elevenlabs.io"
+    ELEVENLABS_MAX_CONCURRENCY: int = 8
+    ELEVENLABS_TIMEOUT_SECONDS: float = 15.0
+    ELEVENLABS_OPTIMIZE_STREAMING_LATENCY: int = 3  # 0 (off) to 4 (max)
+
+    # TTS audio cache (served to Twilio <Play>)
+    TTS_CACHE_DIR: str = "/app/uploads/tts"
+    TTS_CACHE_MEMORY_BYTES: int = 64 * 1024 * 1024
+    TTS_CACHE_DISK_TTL_DAYS: int = 30
+    # Replies generated during calls are only kept in Redis, long enough for Twilio to fetch them
+    TTS_REPLY_TTL_SECONDS: int = 300
 
     # Twilio
     TWILIO_ACCOUNT_SID: str
     TWILIO_AUTH_TOKEN: str
     TWILIO_PHONE_NUMBER: str
+    TWILIO_API_BASE_URL: str = "https://api.twilio.com"
+    TWILIO_REQUEST_TIMEOUT_SECONDS: float = 5.0
+    TWILIO_MAX_RETRIES: int = 3
+    TWILIO_RETRY_BACKOFF_SECONDS: float = 0.25
+
+    # Twilio media streams (real-time audio instead of <Gather>)
+    TWILIO_MEDIA_STREAMS_ENABLED: bool = False
+    PUBLIC_BASE_URL: str = ""  # e.g. https://cal.example.com, derived from the request host if empty
+    PUBLIC_WS_URL: str = ""  # e.g. wss://cal.example.com, derived from the request host if empty
+
+    # Turn detection on inbound media stream audio
+    VAD_SPEECH_THRESHOLD: int = 600  # RMS on the 16-bit PCM scale
+    VAD_MIN_SPEECH_MS: int = 120
+    VAD_END_OF_TURN_SILENCE_MS: int = 700
 
     # GDPR
     DATA_RETENTION_DAYS: int = 90
@@ -1,22 +1,56 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from itertools import cycle
+from typing import Dict, Any, List
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
+from app.core.metrics import metrics
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    """Async engine with the pool settings from Settings"""
+    return create_async_engine(
+        url.replace("postgresql://", "postgresql+asyncpg://"),
+        echo=settings.DEBUG,
+        future=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # asyncpg's and SQLAlchemy's prepared statement caches (0 behind PgBouncer in transaction mode)
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+
+
+def _create_sessionmaker(bind: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(
+        bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
 
 # Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://"),
-    echo=settings.DEBUG,
-    future=True
-)
+engine = _create_engine(settings.DATABASE_URL)
+
+# Read replicas (reads go to the primary if none are configured)
+replica_engines: List[AsyncEngine] = [
+    _create_engine(url.strip()) for url in settings.DATABASE_READ_REPLICA_URLS.split(",") if url.strip()
+]
 
 # Create session maker
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+AsyncSessionLocal = _create_sessionmaker(engine)
+
+# Read-only session makers, used round robin
+_read_sessionmakers = cycle([
+    _create_sessionmaker(read_engine.execution_options(postgresql_readonly=True))
+    for read_engine in (replica_engines or [engine])
+])
 
 # Create base class for models
 Base = declarative_base()
@@ -33,3 +67,44 @@ async def get_db():
             raise
         finally:
             await session.close()
+
+
+async def get_read_db():
+    """
+    Dependency for read-only database sessions
+
+    Sessions go to a read replica if configured (which may lag slightly
+    behind the primary) and run in read-only transactions that are never
+    committed.
+    """
+    async with next(_read_sessionmakers)() as session:
+        yield session
+
+
+async def dispose_engines() -> None:
+    for db_engine in [engine, *replica_engines]:
+        await db_engine.dispose()
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Connection pool usage by engine (primary, replica-0, ...)"""
+    engines = {"primary": engine}
+    engines.update({f"replica-{index}": replica for index, replica in enumerate(replica_engines)})
+
+    stats = {}
+    for name, db_engine in engines.items():
+        pool = db_engine.pool
+        stats[name] = {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+    return stats
+
+
+def record_pool_metrics() -> None:
+    """Copy the current pool usage into the metrics gauges"""
+    for name, stats in pool_stats().items():
+        for key, value in stats.items():
+            metrics.set_gauge(f"db_pool_{key}", value, engine=name)
@@ -0,0 +1,22 @@
+from typing import Optional
+import asyncio
+
+
+def deadline_after(seconds: float) -> float:
+    """Event loop time `seconds` from now"""
+    return asyncio.get_running_loop().time() + seconds
+
+
+def time_left(deadline: Optional[float]) -> Optional[float]:
+    """
+    Seconds until an event loop time deadline, or None without a deadline
+
+    Raises:
+        asyncio.TimeoutError: If the deadline has passed
+    """
+    if deadline is None:
+        return None
+    remaining = deadline - asyncio.get_running_loop().time()
+    if remaining <= 0:
+        raise asyncio.TimeoutError()
+    return remaining
@@ -0,0 +1,55 @@
+from collections import defaultdict
+from typing import Dict, Any, Tuple
+import threading
+
+
+def metric_key(name: str, labels: Dict[str, Any]) -> str:
+    """Prometheus-style series name, e.g. turn_outcome{outcome="holding"}"""
+    if not labels:
+        return name
+    label_str = ",".join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    return f"{name}{{{label_str}}}"
+
+
+class Metrics:
+    """
+    In-process counters, gauges and latency summaries
+
+    Values are per process and exposed as JSON on /metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.gauges: Dict[str, float] = {}
+        # count, sum, max
+        self.summaries: Dict[str, Tuple[int, float, float]] = {}
+
+    def increment(self, name: str, value: float = 1, **labels: Any) -> None:
+        with self._lock:
+            self.counters[metric_key(name, labels)] += value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        with self._lock:
+            self.gauges[metric_key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = metric_key(name, labels)
+        with self._lock:
+            count, total, maximum = self.summaries.get(key, (0, 0.0, 0.0))
+            self.summaries[key] = (count + 1, total + value, max(maximum, value))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "summaries": {
+                    key: {"count": count, "sum": total, "avg": total / count, "max": maximum}
+                    for key, (count, total, maximum) in self.summaries.items()
+                },
+            }
+
+
+# Singleton instance
+metrics = Metrics()
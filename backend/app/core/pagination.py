@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Tuple
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException, status
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(position: datetime, row_id: int) -> str:
+    """Opaque cursor for the keyset position (timestamp, id) of the last row of a page"""
+    data = json.dumps([position.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position, row_id = json.loads(data)
+        return datetime.fromisoformat(position), int(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
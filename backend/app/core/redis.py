@@ -0,0 +1,5 @@
+from redis.asyncio import Redis
+from app.core.config import settings
+
+# Shared async Redis client (connections are pooled and opened lazily)
+redis_client = Redis.from_url(settings.REDIS_URL, decode_responses=True)
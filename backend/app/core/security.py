@@ -1,5 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
+import asyncio
+import threading
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
@@ -7,9 +10,12 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from app.core.auth_cache import auth_cache
 from app.core.config import settings
 from app.core.database import get_db
+from app.core.metrics import metrics
 from app.models.user import User
+from app.schemas.user import CurrentUser
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
@@ -25,6 +31,71 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasher:
+    """
+    bcrypt on a dedicated, bounded thread pool
+
+    Hashing takes tens to hundreds of milliseconds of CPU and must not run on
+    the event loop, where it would stall live calls. At most max_workers
+    hashes run at once and max_queue wait; further requests are rejected
+    with 429 at once instead of queueing behind a login storm.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_pending = max_workers + max_queue
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self.pending -= 1
+            # Under the lock, so updates from pool threads land in order
+            metrics.set_gauge("password_hash_pending", self.pending)
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                metrics.increment("password_hash_rejected")
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many login attempts, please try again shortly",
+                    headers={"Retry-After": "1"}
+                )
+            self.pending += 1
+            metrics.set_gauge("password_hash_pending", self.pending)
+
+        # Released when the hash is done, even if the request was cancelled meanwhile
+        future = self.executor.submit(func, *args)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+
+# Singleton instance
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -71,10 +142,18 @@ def decode_token(token: str, token_type: str = "access") -> Dict[str, Any]:
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-) -> User:
-    """Get the current authenticated user"""
+) -> CurrentUser:
+    """
+    Get the current authenticated user
+
+    Verified tokens and users are cached (see AuthCache), so the database is
+    only queried on a cache miss.
+    """
     token = credentials.credentials
-    payload = decode_token(token, "access")
+    payload = auth_cache.get_claims(token)
+    if payload is None:
+        payload = decode_token(token, "access")
+        auth_cache.set_claims(token, payload)
 
     user_id_str = payload.get("sub")
     if user_id_str is None:
@@ -91,13 +170,21 @@ async def get_current_user(
             detail="Invalid user ID in token"
         )
 
+    user = await auth_cache.get_user(user_id)
+    if user is not None:
+        return user
+
+    # Read first, so an invalidation during the query keeps the result out of the cache
+    version = await auth_cache.user_version(user_id)
     result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    db_user = result.scalar_one_or_none()
 
-    if user is None:
+    if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
 
+    user = CurrentUser.model_validate(db_user)
+    await auth_cache.set_user(user, version)
     return user
@@ -1,20 +1,37 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from typing import Optional
+import secrets
 
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.api.v1 import auth, agents, phone_numbers, calls, gdpr, tools, testing, twilio_webhook
+from app.core.database import dispose_engines, record_pool_metrics
+from app.core.redis import redis_client
+from app.core.metrics import metrics
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.security import password_hasher
+from app.services.elevenlabs_service import elevenlabs_service
+from app.services.twilio_service import twilio_service
+from app.services.tool_http_client import tool_http_client
+from app.services.tool_registry import load_tool_plugins
+from app.services.audit_log import audit_logger
+from app.api.v1 import auth, agents, phone_numbers, calls, gdpr, tools, testing, twilio_webhook, audio
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Startup (the schema is managed by Alembic, see app.migrate)
+    load_tool_plugins()
+    await audit_logger.start()
     yield
     # Shutdown
-    await engine.dispose()
+    await audit_logger.close()
+    await dispose_engines()
+    await redis_client.aclose()
+    await elevenlabs_service.close()
+    await twilio_service.close()
+    await tool_http_client.close()
+    password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -31,6 +48,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include routers
@@ -42,6 +60,7 @@ app.include_router(gdpr.router, prefix="/api/v1/gdpr", tags=["GDPR"])
 app.include_router(tools.router, prefix="/api/v1/tools", tags=["Tools"])
 app.include_router(testing.router, prefix="/api/v1/testing", tags=["Testing"])
 app.include_router(twilio_webhook.router, prefix="/api/v1/twilio", tags=["Twilio Webhooks"])
+app.include_router(audio.router, prefix="/api/v1/audio", tags=["Audio"])
 
 
 @app.get("/")
@@ -52,3 +71,23 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+
+def require_metrics_token(authorization: Optional[str] = Header(None)) -> None:
+    """Only scrapers holding METRICS_TOKEN may read /metrics; it is disabled without one"""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)], include_in_schema=False)
+async def get_metrics():
+    record_pool_metrics()
+    return metrics.snapshot()
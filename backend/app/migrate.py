@@ -0,0 +1,59 @@
+"""
+Apply database migrations, run once per deploy before the app starts
+
+Databases created by the old create_all at startup are stamped with the
+initial revision first, so only the later migrations run on them.
+
+Usage (from backend/):
+    python -m app.migrate
+"""
+from pathlib import Path
+import asyncio
+import logging
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Schema that create_all produced before migrations were introduced
+BASELINE_REVISION = "0001"
+
+
+def alembic_config() -> Config:
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    return config
+
+
+async def has_unversioned_schema() -> bool:
+    """Whether the tables exist but Alembic has never run on this database"""
+    engine = create_async_engine(settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://"))
+    try:
+        async with engine.connect() as connection:
+            tables = await connection.run_sync(lambda sync_connection: set(inspect(sync_connection).get_table_names()))
+    finally:
+        await engine.dispose()
+
+    return "users" in tables and "alembic_version" not in tables
+
+
+def migrate() -> None:
+    config = alembic_config()
+
+    if asyncio.run(has_unversioned_schema()):
+        logger.info(f"Existing schema without migration history, stamping revision {BASELINE_REVISION}")
+        command.stamp(config, BASELINE_REVISION)
+
+    command.upgrade(config, "head")
+
+
+if __name__ == "__main__":
+    migrate()
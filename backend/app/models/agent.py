@@ -20,6 +20,9 @@ class Agent(Base):
     # Language
     language = Column(String(10), default="de", nullable=False)  # de, en, etc.
 
+    # Latency budget for one turn in ms (uses TURN_BUDGET_MS if null)
+    turn_budget_ms = Column(Integer, nullable=True)
+
     # Tools configuration (JSON array of tool definitions)
     tools_config = Column(JSON, nullable=True)
 
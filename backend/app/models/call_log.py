@@ -28,7 +28,8 @@ class CallLog(Base):
     retention_until = Column(
         DateTime,
         default=lambda: datetime.utcnow() + timedelta(days=settings.DATA_RETENTION_DAYS),
-        nullable=False
+        nullable=False,
+        index=True
     )
 
     # Relationships
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -8,7 +8,8 @@ class Conversation(Base):
     __tablename__ = "conversations"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Indexed together with start_time (see __table_args__)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     agent_id = Column(Integer, ForeignKey("agents.id", ondelete="CASCADE"), nullable=False, index=True)
     phone_number_id = Column(Integer, ForeignKey("phone_numbers.id", ondelete="SET NULL"), nullable=True)
 
@@ -21,7 +22,7 @@ class Conversation(Base):
 
     # Timestamps
     start_time = Column(DateTime, default=datetime.utcnow, nullable=False)
-    end_time = Column(DateTime, nullable=True)
+    end_time = Column(DateTime, nullable=True, index=True)
 
     # GDPR consent
     consent_recorded = Column(Boolean, default=False, nullable=False)
@@ -36,3 +37,8 @@ class Conversation(Base):
     phone_number = relationship("PhoneNumber", back_populates="conversations")
     messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
     call_log = relationship("CallLog", back_populates="conversation", uselist=False, cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Call history of a user, newest first (keyset pagination on start_time, id)
+        Index("ix_conversations_user_id_start_time_id", user_id, start_time.desc(), id.desc()),
+    )
@@ -15,7 +15,7 @@ class DataDeletionRequest(Base):
     completed_at = Column(DateTime, nullable=True)
 
     # Status: pending, in_progress, completed, failed
-    status = Column(String(50), default="pending", nullable=False)
+    status = Column(String(50), default="pending", nullable=False, index=True)
 
     # Notes
     notes = Column(String(500), nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -8,7 +8,8 @@ class Message(Base):
     __tablename__ = "messages"
 
     id = Column(Integer, primary_key=True, index=True)
-    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Indexed together with timestamp (see __table_args__)
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
 
     # Message content
     role = Column(String(50), nullable=False)  # user, assistant, system
@@ -25,3 +26,14 @@ class Message(Base):
 
     # Relationships
     conversation = relationship("Conversation", back_populates="messages")
+
+    __table_args__ = (
+        # Messages of a conversation in order (keyset pagination on timestamp, id)
+        Index("ix_messages_conversation_id_timestamp_id", conversation_id, timestamp, id),
+        # Messages still to be anonymized by the worker
+        Index(
+            "ix_messages_conversation_id_not_anonymized",
+            conversation_id,
+            postgresql_where=(anonymized == False)  # noqa: E712
+        ),
+    )
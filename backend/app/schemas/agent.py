@@ -1,12 +1,38 @@
-from pydantic import BaseModel
+from jsonschema import Draft7Validator
+from jsonschema.exceptions import SchemaError
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 
 
+class CircuitBreakerPolicy(BaseModel):
+    failure_threshold: int = Field(5, ge=1)
+    recovery_seconds: float = Field(30.0, gt=0)
+
+
 class ToolDefinition(BaseModel):
     name: str
     description: str
     parameters: Dict[str, Any]
+    # api_call: only pass this part of a JSON response to the LLM
+    response_path: Optional[str] = None  # JSONPath, e.g. $.data.items[*]
+    response_fields: Optional[List[str]] = None
+    max_response_bytes: Optional[int] = Field(None, gt=0)
+    # Cache results for this many seconds (idempotent tools only)
+    cache_ttl: Optional[int] = Field(None, ge=0)
+    # Limits enforced per tool (defaults from settings)
+    timeout_seconds: Optional[float] = Field(None, gt=0)
+    max_concurrency: Optional[int] = Field(None, ge=1)
+    circuit_breaker: Optional[CircuitBreakerPolicy] = None
+
+    @field_validator("parameters")
+    @classmethod
+    def validate_parameters_schema(cls, value: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            Draft7Validator.check_schema(value)
+        except SchemaError as e:
+            raise ValueError(f"Invalid JSON schema: {e.message}")
+        return value
 
 
 class AgentBase(BaseModel):
@@ -16,6 +42,7 @@ class AgentBase(BaseModel):
     voice_id: Optional[str] = None
     voice_provider: str = "elevenlabs"
     language: str = "de"
+    turn_budget_ms: Optional[int] = Field(None, ge=500, le=12000)
     tools_config: Optional[List[ToolDefinition]] = None
 
 
@@ -30,6 +57,7 @@ class AgentUpdate(BaseModel):
     voice_id: Optional[str] = None
     voice_provider: Optional[str] = None
     language: Optional[str] = None
+    turn_budget_ms: Optional[int] = Field(None, ge=500, le=12000)
     tools_config: Optional[List[ToolDefinition]] = None
 
 
@@ -31,6 +31,10 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class CurrentUser(UserResponse):
+    """Projection of the authenticated user (cached by get_current_user)"""
+
+
 class TokenResponse(BaseModel):
     access_token: str
     refresh_token: str
@@ -0,0 +1,52 @@
+"""
+Helpers for 8 kHz G.711 μ-law telephony audio (Twilio media streams)
+"""
+from array import array
+import io
+import math
+import wave
+
+SAMPLE_RATE = 8000
+SAMPLES_PER_MS = SAMPLE_RATE // 1000
+
+
+def _ulaw_to_linear(value: int) -> int:
+    value = ~value & 0xFF
+    sign = value & 0x80
+    exponent = (value >> 4) & 0x07
+    mantissa = value & 0x0F
+    sample = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return -sample if sign else sample
+
+
+# Lookup tables indexed by μ-law byte
+ULAW_TO_PCM16 = [_ulaw_to_linear(i) for i in range(256)]
+ULAW_TO_PCM16_SQUARED = [sample * sample for sample in ULAW_TO_PCM16]
+
+
+def ulaw_to_pcm16(data: bytes) -> bytes:
+    """Decode μ-law bytes to little-endian 16-bit PCM"""
+    return array("h", (ULAW_TO_PCM16[b] for b in data)).tobytes()
+
+
+def ulaw_rms(data: bytes) -> float:
+    """Root mean square energy of a μ-law frame on the 16-bit PCM scale"""
+    if not data:
+        return 0.0
+    return math.sqrt(sum(ULAW_TO_PCM16_SQUARED[b] for b in data) / len(data))
+
+
+def ulaw_duration_ms(data: bytes) -> float:
+    """Duration of 8 kHz μ-law audio in milliseconds"""
+    return len(data) / SAMPLES_PER_MS
+
+
+def ulaw_to_wav(data: bytes) -> bytes:
+    """Wrap μ-law audio in a 16-bit PCM WAV container (e.g. for speech-to-text)"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(ulaw_to_pcm16(data))
+    return buffer.getvalue()
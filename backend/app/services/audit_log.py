@@ -0,0 +1,215 @@
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+import asyncio
+import json
+import logging
+import socket
+import uuid
+
+from redis.asyncio import Redis
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import metrics
+from app.core.redis import redis_client
+from app.models.audit_log import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogger:
+    """
+    Batched audit log writer
+
+    log() puts an event on a bounded in-process queue and returns without
+    touching the database. A background flusher bulk-inserts the queued
+    events once AUDIT_BATCH_SIZE are waiting or AUDIT_FLUSH_INTERVAL_SECONDS
+    after the first one, whichever comes first.
+
+    With AUDIT_REDIS_MIRROR, events are also kept in a per-instance Redis
+    hash until their batch is written, and re-queued when the process
+    restarts.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+        close_timeout: float,
+        mirror: bool = False
+    ):
+        self.redis = redis
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.close_timeout = close_timeout
+        self.mirror = mirror
+        self.mirror_key = f"audit_log:pending:{settings.INSTANCE_NAME or socket.gethostname()}"
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def log(
+        self,
+        user_id: Optional[int],
+        action: str,
+        resource: Optional[str] = None,
+        resource_id: Optional[int] = None,
+        ip_address: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Queue an audit event (dropped with a warning if the queue is full)"""
+        event = {
+            "id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "action": action,
+            "resource": resource,
+            "resource_id": resource_id,
+            "ip_address": ip_address,
+            "details": details,
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            metrics.increment("audit_events_dropped")
+            logger.warning(f"Audit queue full, dropped event {action} for user {user_id}")
+            return
+
+        if self.mirror:
+            try:
+                await self.redis.hset(self.mirror_key, event["id"], json.dumps(event, ensure_ascii=False))
+            except Exception as e:
+                logger.warning(f"Failed to mirror audit event to Redis: {str(e)}")
+
+    async def start(self) -> None:
+        """Re-queue mirrored events of a previous run and start the flusher"""
+        if self.mirror:
+            try:
+                for raw_event in (await self.redis.hvals(self.mirror_key)):
+                    self.queue.put_nowait(json.loads(raw_event))
+                if self.queue.qsize():
+                    logger.info(f"Re-queued {self.queue.qsize()} audit events from Redis")
+            except Exception as e:
+                logger.warning(f"Failed to recover audit events from Redis: {str(e)}")
+
+        self._flusher = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """
+        Stop the flusher and write what is still queued
+
+        Gives up after close_timeout, e.g. while the database is down. The
+        events not written by then stay in the Redis mirror for the next
+        start, or are logged if there is none.
+        """
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+
+        batch: List[Dict[str, Any]] = []
+        try:
+            async with asyncio.timeout(self.close_timeout):
+                while not self.queue.empty():
+                    batch = self._take_available([])
+                    await self._write_batch(batch)
+                    batch = []
+        except TimeoutError:
+            unwritten = batch + [self.queue.get_nowait() for _ in range(self.queue.qsize())]
+            if self.mirror:
+                logger.error(f"Left {len(unwritten)} unwritten audit events in Redis ({self.mirror_key})")
+            else:
+                for event in unwritten:
+                    logger.error(f"Unwritten audit event: {json.dumps(event, ensure_ascii=False)}")
+
+    def _take_available(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        while len(batch) < self.batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _fill_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """Wait for an event, then collect more until the batch is full or the interval has passed"""
+        batch.append(await self.queue.get())
+        loop = asyncio.get_running_loop()
+        flush_at = loop.time() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            self._take_available(batch)
+            remaining = flush_at - loop.time()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self) -> None:
+        while True:
+            batch: List[Dict[str, Any]] = []
+            try:
+                await self._fill_batch(batch)
+                await self._write_batch(batch)
+            except asyncio.CancelledError:
+                # Written by close()
+                for event in batch:
+                    self.queue.put_nowait(event)
+                raise
+
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """Insert a batch, retrying while the database is unavailable"""
+        rows = [self._row(event) for event in batch]
+        delay = 1.0
+
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    try:
+                        await db.execute(insert(AuditLog), rows)
+                        await db.commit()
+                    except IntegrityError:
+                        # E.g. the user was deleted meanwhile; keep the rows that can be written
+                        await db.rollback()
+                        await self._write_rows_individually(db, rows)
+                break
+            except Exception as e:
+                logger.error(f"Failed to write {len(rows)} audit events, retrying in {delay:g}s: {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60.0)
+
+        metrics.increment("audit_events_written", len(rows))
+        if self.mirror:
+            try:
+                await self.redis.hdel(self.mirror_key, *(event["id"] for event in batch))
+            except Exception as e:
+                logger.warning(f"Failed to remove written audit events from Redis: {str(e)}")
+
+    @staticmethod
+    async def _write_rows_individually(db, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            try:
+                await db.execute(insert(AuditLog), [row])
+                await db.commit()
+            except IntegrityError as e:
+                await db.rollback()
+                logger.warning(f"Dropped audit event {row['action']} for user {row['user_id']}: {str(e.orig)}")
+
+    @staticmethod
+    def _row(event: Dict[str, Any]) -> Dict[str, Any]:
+        row = {key: value for key, value in event.items() if key != "id"}
+        row["timestamp"] = datetime.fromisoformat(event["timestamp"])
+        return row
+
+
+# Singleton instance
+audit_logger = AuditLogger(
+    redis_client,
+    max_queue=settings.AUDIT_QUEUE_MAX_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    close_timeout=settings.AUDIT_CLOSE_TIMEOUT_SECONDS,
+    mirror=settings.AUDIT_REDIS_MIRROR
+)
@@ -0,0 +1,84 @@
+"""
+End-of-call processing, run by the worker from the job queue
+"""
+from datetime import datetime
+from typing import Dict, Any
+from sqlalchemy import select
+import logging
+
+from app.core.database import AsyncSessionLocal
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.models.call_log import CallLog
+from app.services.llm_service import llm_service
+
+logger = logging.getLogger(__name__)
+
+FINALIZE_CALL_JOB = "finalize_call"
+
+
+async def finalize_call(payload: Dict[str, Any]) -> None:
+    """
+    Close a conversation and create its call log with transcript and summary
+
+    Payload:
+        conversation_id: Conversation to finalize
+        ended_at: ISO timestamp of the Twilio status callback
+        call_status: Final Twilio call status (completed, failed, busy, no-answer)
+    """
+    async with AsyncSessionLocal() as db:
+        conversation = await db.get(Conversation, payload["conversation_id"])
+        if not conversation:
+            logger.warning(f"Conversation {payload['conversation_id']} no longer exists")
+            return
+
+        # Retried jobs must not create a second call log
+        existing_log = await db.execute(
+            select(CallLog.id).where(CallLog.conversation_id == conversation.id)
+        )
+        if existing_log.scalar_one_or_none():
+            return
+
+        call_status = payload.get("call_status", "completed")
+
+        # Update conversation end time
+        conversation.end_time = datetime.fromisoformat(payload["ended_at"])
+        conversation.status = "completed" if call_status == "completed" else "failed"
+
+        # Calculate duration
+        duration = (conversation.end_time - conversation.start_time).total_seconds()
+
+        # Create transcript from the messages saved during the call
+        messages_result = await db.execute(
+            select(Message)
+            .where(Message.conversation_id == conversation.id)
+            .order_by(Message.timestamp.asc(), Message.id.asc())
+        )
+        messages = [
+            {"role": msg.role, "content": msg.content}
+            for msg in messages_result.scalars().all()
+            if msg.role in ["user", "assistant"]
+        ]
+
+        transcript = "\n".join(f"{msg['role'].upper()}: {msg['content']}" for msg in messages)
+
+        # Generate summary
+        summary = await llm_service.create_conversation_summary(messages) if messages else None
+
+        # Create call log
+        call_log = CallLog(
+            conversation_id=conversation.id,
+            duration=duration,
+            status=call_status,
+            transcript=transcript,
+            summary=summary
+        )
+
+        db.add(call_log)
+        await db.commit()
+
+
+# Job handlers by job type, consumed by app.worker
+JOB_HANDLERS = {
+    FINALIZE_CALL_JOB: finalize_call,
+}
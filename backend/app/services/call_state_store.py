@@ -0,0 +1,167 @@
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Any, Optional
+import json
+
+from redis.asyncio import Redis
+from redis.exceptions import WatchError
+import logging
+
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class CallStateConflictError(Exception):
+    """Raised when a call state was modified by another worker since it was loaded"""
+
+
+@dataclass
+class CallState:
+    """Serializable state of a live call, shared between webhook workers"""
+    call_sid: str
+    agent_id: int
+    conversation_id: Optional[int] = None
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    summary: Optional[str] = None
+    turn: int = 0
+    version: int = 0
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, data: str) -> "CallState":
+        return cls(**json.loads(data))
+
+
+class CallStateStore:
+    """Redis-backed store for live call state with TTLs and optimistic locking"""
+
+    def __init__(self, redis: Redis, ttl_seconds: int, key_prefix: str = "call_state:"):
+        self.redis = redis
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+
+    def _key(self, call_sid: str) -> str:
+        return f"{self.key_prefix}{call_sid}"
+
+    async def load(self, call_sid: str) -> Optional[CallState]:
+        """Load the state of a call, or None if the call is unknown or expired"""
+        data = await self.redis.get(self._key(call_sid))
+        if data is None:
+            return None
+        return CallState.from_json(data)
+
+    async def create(self, state: CallState) -> None:
+        """Store the initial state of a new call (overwrites any stale state)"""
+        state.version = 1
+        await self.redis.set(self._key(state.call_sid), state.to_json(), ex=self.ttl_seconds)
+
+    async def save(self, state: CallState) -> None:
+        """
+        Save a call state if nobody else has written it since it was loaded
+
+        The stored version must match `state.version`; on success the version
+        is incremented and the TTL refreshed.
+
+        Raises:
+            CallStateConflictError: If the stored version differs
+        """
+        key = self._key(state.call_sid)
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key)
+                current = await pipe.get(key)
+                current_version = CallState.from_json(current).version if current else 0
+
+                if current_version != state.version:
+                    raise CallStateConflictError(
+                        f"Call state {state.call_sid} is at version {current_version}, "
+                        f"expected {state.version}"
+                    )
+
+                new_version = state.version + 1
+                payload = json.loads(state.to_json())
+                payload["version"] = new_version
+
+                pipe.multi()
+                pipe.set(key, json.dumps(payload, ensure_ascii=False), ex=self.ttl_seconds)
+                await pipe.execute()
+            except WatchError:
+                raise CallStateConflictError(f"Call state {state.call_sid} was modified concurrently")
+
+        state.version = new_version
+
+    async def save_merged(
+        self,
+        state: CallState,
+        new_messages: List[Dict[str, Any]],
+        max_attempts: int = 3
+    ) -> CallState:
+        """
+        Save a call state after a turn, merging with concurrent writers
+
+        If another worker wrote the state in the meantime, the turn's new
+        messages are appended to the latest stored state instead of
+        overwriting it.
+
+        Returns:
+            The state as it was saved
+        """
+        for _ in range(max_attempts):
+            try:
+                await self.save(state)
+                return state
+            except CallStateConflictError:
+                latest = await self.load(state.call_sid)
+                if not latest:
+                    return state
+                latest.messages.extend(new_messages)
+                latest.turn += 1
+                state = latest
+
+        logger.warning(f"Could not save call state {state.call_sid} after {max_attempts} attempts")
+        return state
+
+    async def save_compaction(
+        self,
+        call_sid: str,
+        folded: List[Dict[str, Any]],
+        summary: Optional[str],
+        max_attempts: int = 3
+    ) -> bool:
+        """
+        Replace the oldest messages of a call with the summary covering them
+
+        Applied to the latest stored state, so turns saved since the
+        compaction started are kept.
+
+        Returns:
+            False if the call is gone or its history no longer starts with
+            `folded` (it was compacted by another worker)
+        """
+        for _ in range(max_attempts):
+            state = await self.load(call_sid)
+            if not state or state.messages[1:len(folded) + 1] != folded:
+                return False
+
+            del state.messages[1:len(folded) + 1]
+            state.summary = summary
+            try:
+                await self.save(state)
+                return True
+            except CallStateConflictError:
+                continue
+
+        logger.warning(f"Could not save compacted history of call {call_sid} after {max_attempts} attempts")
+        return False
+
+    async def delete(self, call_sid: str) -> None:
+        """Remove the state of a finished call"""
+        await self.redis.delete(self._key(call_sid))
+
+
+# Singleton instance
+call_state_store = CallStateStore(redis_client, settings.CALL_STATE_TTL_SECONDS)
@@ -0,0 +1,170 @@
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import json
+import logging
+
+from app.core.config import settings
+from app.services.llm_service import llm_service
+
+logger = logging.getLogger(__name__)
+
+# Tokens the chat format adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """tiktoken encoding, or None if it cannot be loaded (e.g. offline)"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable, estimating token counts: {str(e)}")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in a text"""
+    encoding = _get_encoding()
+    if encoding is None:
+        # Roughly 4 characters per token
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(message: Dict[str, Any]) -> int:
+    """Number of prompt tokens a chat message takes up"""
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(message.get("content") or "")
+    if message.get("tool_calls"):
+        tokens += count_tokens(json.dumps(message["tool_calls"], ensure_ascii=False))
+    return tokens
+
+
+class ConversationHistory:
+    """
+    Token-budgeted chat history with a rolling summary of older turns
+
+    The system prompt and the last `keep_turns` turns are always kept
+    verbatim. Once the history exceeds `max_tokens`, the oldest turns are
+    folded into an incrementally maintained summary, so the prompt size
+    stays bounded for long calls. The summary is written in the background,
+    off the latency path of the turn.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        max_tokens: int = settings.HISTORY_MAX_TOKENS,
+        keep_turns: int = settings.HISTORY_KEEP_TURNS
+    ):
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.messages: List[Dict[str, Any]] = [{"role": "system", "content": system_prompt}]
+        self.summary: Optional[str] = None
+        # Background summarization of the turns over budget (see start_compaction)
+        self.compaction: Optional[asyncio.Task] = None
+
+    def append(self, message: Dict[str, Any]) -> None:
+        self.messages.append(message)
+
+    def prompt(self) -> List[Dict[str, Any]]:
+        """Messages to send to the LLM: system prompt, summary, recent turns"""
+        if not self.summary:
+            return self.messages
+
+        summary_message = {
+            "role": "system",
+            "content": f"Zusammenfassung des bisherigen Gesprächs:\n{self.summary}"
+        }
+        return [self.messages[0], summary_message, *self.messages[1:]]
+
+    def token_count(self) -> int:
+        return sum(count_message_tokens(message) for message in self.prompt())
+
+    def _turn_starts(self) -> List[int]:
+        """Indices of the user messages that start each turn"""
+        return [i for i, message in enumerate(self.messages) if message["role"] == "user"]
+
+    def _overflow_end(self) -> int:
+        """
+        End index of the oldest messages that have to go to fit the budget
+
+        Whole turns are removed, keeping at least `keep_turns`. Messages
+        1 up to the returned index are over budget (none if it is 1).
+        """
+        tokens = self.token_count()
+        turn_starts = self._turn_starts()
+        end = 1
+
+        # Up to the start of the oldest turn that has to be kept
+        for next_start in turn_starts[1:len(turn_starts) - self.keep_turns + 1]:
+            if tokens <= self.max_tokens:
+                break
+            tokens -= sum(count_message_tokens(message) for message in self.messages[end:next_start])
+            end = next_start
+
+        return end
+
+    def fold(self, folded: List[Dict[str, Any]], summary: Optional[str]) -> bool:
+        """
+        Replace the oldest messages with a summary covering them
+
+        Returns:
+            False if the history no longer starts with `folded` (e.g. it was
+            compacted elsewhere in the meantime), in which case nothing changes
+        """
+        if self.messages[1:len(folded) + 1] != folded:
+            return False
+
+        del self.messages[1:len(folded) + 1]
+        self.summary = summary
+        return True
+
+    def start_compaction(self) -> Optional[asyncio.Task]:
+        """
+        Start folding the turns over budget into the summary in the background
+
+        The turns stay in the prompt until apply_compaction picks up the
+        result, so a turn never waits for the summarization. At most one
+        compaction runs at a time.
+
+        Returns:
+            The task, resulting in (folded messages, new summary) or in None
+            if summarization failed, or None if nothing needs compacting
+        """
+        if self.compaction is not None and not self.compaction.done():
+            return None
+
+        end = self._overflow_end()
+        if end == 1:
+            return None
+
+        self.compaction = asyncio.create_task(self._summarize(self.summary, self.messages[1:end]))
+        return self.compaction
+
+    @staticmethod
+    async def _summarize(
+        previous_summary: Optional[str],
+        folded: List[Dict[str, Any]]
+    ) -> Optional[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        try:
+            summary = await llm_service.summarize_history(previous_summary, folded)
+        except Exception as e:
+            # Keep the turns in the prompt, the next turn tries again
+            logger.error(f"Failed to summarize conversation history: {str(e)}")
+            return None
+        return folded, summary
+
+    def apply_compaction(self) -> None:
+        """Fold the result of a finished background compaction into the history"""
+        if self.compaction is None or not self.compaction.done():
+            return
+
+        compaction, self.compaction = self.compaction, None
+        if not compaction.cancelled() and compaction.result() is not None:
+            self.fold(*compaction.result())
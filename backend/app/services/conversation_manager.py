@@ -1,15 +1,42 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable
+from dataclasses import dataclass
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-import json
+import asyncio
+import logging
 
+from app.core.config import settings
+from app.core.deadline import time_left
 from app.models.agent import Agent
 from app.models.conversation import Conversation
 from app.models.message import Message
-from app.models.call_log import CallLog
 from app.services.llm_service import llm_service
+from app.services.llm_events import LLMEvent, TextDelta, ToolCallStart, ToolCallEnd
+from app.services import phrases
 from app.services.elevenlabs_service import elevenlabs_service
-from app.services.tool_executor import ToolExecutor
+from app.services.tool_executor import ToolExecutor, tool_failure
+from app.services.tool_registry import ToolResult
+from app.services.call_state_store import CallState, call_state_store
+from app.services.text_chunker import SentenceChunker
+from app.services.tts_cache import tts_cache
+from app.services.conversation_history import ConversationHistory
+
+logger = logging.getLogger(__name__)
+
+# Tools that transfer or end the call, in order of precedence
+CALL_CONTROL_TOOLS = ["transfer_call", "end_call"]
+
+# History compactions still being summarized or saved after their turn
+background_compactions = set()
+
+
+@dataclass
+class SpeechChunk:
+    """One synthesized sentence or clause of an agent response"""
+    text: str
+    audio: bytes
+    # Filler phrase played while the response is delayed, not part of the response
+    filler: bool = False
 
 
 class ConversationManager:
@@ -26,28 +53,132 @@ class ConversationManager:
         self.db = db
         self.conversation = conversation
         self.call_sid = call_sid
-        self.messages: List[Dict[str, str]] = []
-        self.tool_executor = ToolExecutor(agent.tools_config, call_sid)
+        self.turn = 0
+        self.tool_executor = ToolExecutor(agent.tools_config, call_sid, agent_id=agent.id)
 
         # Initialize with system prompt
-        self.messages.append({
-            "role": "system",
-            "content": agent.system_prompt
-        })
+        self.history = ConversationHistory(agent.system_prompt)
+
+        # Messages added during the current turn
+        self.turn_messages: List[Dict[str, Any]] = []
 
-    async def process_message(self, user_input: str, save_to_db: bool = False) -> str:
+        # Database record of the current turn's response, if saved
+        self.response_record: Optional[Message] = None
+
+    @property
+    def turn_budget_seconds(self) -> float:
+        """Latency budget for one turn of this agent"""
+        return (self.agent.turn_budget_ms or settings.TURN_BUDGET_MS) / 1000
+
+    @property
+    def messages(self) -> List[Dict[str, Any]]:
+        """Verbatim history (system prompt first), older turns live in the summary"""
+        return self.history.messages
+
+    def _add_message(self, message: Dict[str, Any]) -> None:
+        self.history.append(message)
+        self.turn_messages.append(message)
+
+    @classmethod
+    def from_state(
+        cls,
+        state: CallState,
+        agent: Agent,
+        db: AsyncSession,
+        conversation: Optional[Conversation] = None
+    ) -> "ConversationManager":
+        """Rebuild a conversation manager from a stored call state"""
+        manager = cls(agent=agent, db=db, conversation=conversation, call_sid=state.call_sid)
+        if state.messages:
+            manager.history.messages = list(state.messages)
+        manager.history.summary = state.summary
+        manager.turn = state.turn
+        return manager
+
+    def to_state(self, state: Optional[CallState] = None) -> CallState:
+        """Capture the conversation in a call state (keeping the version of `state`)"""
+        if state is None:
+            state = CallState(
+                call_sid=self.call_sid,
+                agent_id=self.agent.id,
+                conversation_id=self.conversation.id if self.conversation else None
+            )
+        state.messages = list(self.messages)
+        state.summary = self.history.summary
+        state.turn = self.turn
+        return state
+
+    async def process_message(
+        self,
+        user_input: str,
+        save_to_db: bool = False,
+        first_response: Optional[AsyncIterator[LLMEvent]] = None,
+        deadline: Optional[float] = None
+    ) -> str:
         """
         Process a user message and return agent's response
 
         Args:
             user_input: The user's message
             save_to_db: Whether to save messages to database
+            first_response: Events of an already started first LLM completion
+            deadline: Event loop time by which the turn must be complete
 
         Returns:
             Agent's response text
         """
+        response_text = ""
+        async for delta in self.stream_message(
+            user_input,
+            save_to_db=save_to_db,
+            first_response=first_response,
+            deadline=deadline
+        ):
+            response_text += delta
+
+        return response_text.strip()
+
+    async def stream_message(
+        self,
+        user_input: str,
+        save_to_db: bool = False,
+        first_response: Optional[AsyncIterator[LLMEvent]] = None,
+        deadline: Optional[float] = None,
+        on_tool_call: Optional[Callable[[str], None]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Process a user message and stream the agent's response text
+
+        The response is added to the history once the stream is exhausted.
+        Turns over the history budget are then summarized in the background;
+        the summary replaces them from a later turn on (see _start_compaction).
+
+        Args:
+            user_input: The user's message
+            save_to_db: Whether to save messages to database
+            first_response: Events of an already started first LLM completion
+                for this message (e.g. a committed speculation), used instead
+                of requesting one
+            deadline: Event loop time by which the turn must be complete; the
+                LLM requests and tools are bounded by it
+            on_tool_call: Called with the tool name as soon as the LLM starts
+                a tool call
+
+        Raises:
+            asyncio.TimeoutError: If the deadline passes
+
+        Yields:
+            Response text deltas as they arrive from the LLM
+        """
+        self.turn += 1
+        self.turn_messages = []
+        self.response_record = None
+
+        # Pick up the summary of earlier turns if it is ready
+        self.history.apply_compaction()
+
         # Add user message to history
-        self.messages.append({
+        self._add_message({
             "role": "user",
             "content": user_input
         })
@@ -68,55 +199,72 @@ class ConversationManager:
 
         # Get LLM response
         response_text = ""
-        tool_calls = []
+        tool_calls: List[ToolCallEnd] = []
 
-        async for chunk in llm_service.chat_completion(
-            messages=self.messages,
-            tools=tools if tools else None,
-            stream=True
-        ):
-            # Check if it's a tool call
-            try:
-                chunk_data = json.loads(chunk)
-                if "tool_call" in chunk_data:
-                    tool_calls.append(chunk_data["tool_call"])
-                    continue
-            except (json.JSONDecodeError, TypeError):
-                pass
+        if first_response is None:
+            first_response = llm_service.stream_events(
+                messages=self.history.prompt(),
+                tools=tools if tools else None,
+                deadline=deadline
+            )
+
+        async for event in first_response:
+            time_left(deadline)
+            if isinstance(event, TextDelta):
+                response_text += event.text
+                yield event.text
+            elif isinstance(event, ToolCallStart):
+                if on_tool_call:
+                    on_tool_call(event.name)
+            elif isinstance(event, ToolCallEnd):
+                tool_calls.append(event)
 
-            # Regular text response
-            response_text += chunk
+        # Text of the final assistant message (after any tool calls)
+        final_text = response_text
 
         # Handle tool calls
         if tool_calls:
+            # Assistant message requesting the tools
+            self._add_message({
+                "role": "assistant",
+                "content": response_text or None,
+                "tool_calls": [
+                    {
+                        "id": tool_call.id,
+                        "type": "function",
+                        "function": {"name": tool_call.name, "arguments": tool_call.arguments}
+                    }
+                    for tool_call in tool_calls
+                ]
+            })
+
+            # Execute tools and add their results to the conversation
+            tool_results = await self._execute_tool_calls(tool_calls, deadline=deadline)
             for tool_call in tool_calls:
-                tool_name = tool_call["name"]
-                tool_args = json.loads(tool_call["arguments"]) if isinstance(tool_call["arguments"], str) else tool_call["arguments"]
-
-                # Execute tool
-                tool_result = await self.tool_executor.execute_tool(tool_name, tool_args)
-
-                # Add tool result to conversation
-                self.messages.append({
-                    "role": "function",
-                    "name": tool_name,
-                    "content": tool_result
+                self._add_message({
+                    "role": "tool",
+                    "tool_call_id": tool_call.id,
+                    "content": tool_results[tool_call.index]
                 })
 
-                # Get another LLM response incorporating tool result
-                follow_up_response = ""
-                async for chunk in llm_service.chat_completion(
-                    messages=self.messages,
-                    stream=True
-                ):
-                    follow_up_response += chunk
-
-                response_text += " " + follow_up_response
+            # One LLM response incorporating all tool results
+            final_text = ""
+            if response_text:
+                response_text += " "
+                yield " "
+            async for chunk in llm_service.chat_completion(
+                messages=self.history.prompt(),
+                stream=True,
+                deadline=deadline
+            ):
+                final_text += chunk
+                response_text += chunk
+                yield chunk
 
         # Add assistant response to history
-        self.messages.append({
+        self._add_message({
             "role": "assistant",
-            "content": response_text
+            "content": final_text
         })
 
         # Save assistant message to DB if requested
@@ -129,8 +277,258 @@ class ConversationManager:
             )
             self.db.add(assistant_message)
             await self.db.commit()
+            self.response_record = assistant_message
 
-        return response_text.strip()
+        # Keep the prompt within budget for the next turns
+        self._start_compaction()
+
+    def _start_compaction(self) -> None:
+        """
+        Summarize the turns over the history budget without delaying the turn
+
+        The result is written to the call state, so whichever worker handles
+        a later turn of the call gets it; a long-lived manager (media
+        streams) also applies it itself at the start of its next turn.
+        """
+        compaction = self.history.start_compaction()
+        if compaction is None or not self.call_sid:
+            return
+
+        task = asyncio.create_task(self._save_compaction(compaction))
+        background_compactions.add(task)
+        task.add_done_callback(background_compactions.discard)
+
+    async def _save_compaction(self, compaction: asyncio.Task) -> None:
+        result = await compaction
+        if result is None:
+            return
+
+        folded, summary = result
+        try:
+            await call_state_store.save_compaction(self.call_sid, folded, summary)
+        except Exception as e:
+            logger.error(f"Failed to save compacted history of call {self.call_sid}: {str(e)}")
+
+    async def finish_interrupted_turn(self, spoken_text: str, save_to_db: bool = False) -> None:
+        """
+        Close the current turn after the caller interrupted the response
+
+        Only the text the caller actually heard is kept as the response. Tool
+        calls that were cut off get a result, so the history stays valid for
+        the next request.
+
+        Args:
+            spoken_text: Response text that was played before the interruption
+            save_to_db: Whether to save messages to database
+        """
+        answered = {message["tool_call_id"] for message in self.turn_messages if message["role"] == "tool"}
+        for message in list(self.turn_messages):
+            for tool_call in message.get("tool_calls") or []:
+                if tool_call["id"] not in answered:
+                    self._add_message({
+                        "role": "tool",
+                        "tool_call_id": tool_call["id"],
+                        "content": "Cancelled: the caller interrupted"
+                    })
+
+        last_message = self.turn_messages[-1] if self.turn_messages else None
+        if last_message and last_message["role"] == "assistant" and not last_message.get("tool_calls"):
+            # The response was complete but not fully played
+            last_message["content"] = spoken_text
+            if self.response_record is not None:
+                self.response_record.content = spoken_text
+                await self.db.commit()
+            return
+
+        if not spoken_text:
+            return
+
+        self._add_message({
+            "role": "assistant",
+            "content": spoken_text
+        })
+
+        if save_to_db and self.conversation:
+            self.response_record = Message(
+                conversation_id=self.conversation.id,
+                role="assistant",
+                content=spoken_text,
+                timestamp=datetime.utcnow()
+            )
+            self.db.add(self.response_record)
+            await self.db.commit()
+
+    async def _execute_tool_calls(
+        self,
+        tool_calls: List[ToolCallEnd],
+        deadline: Optional[float] = None
+    ) -> Dict[int, str]:
+        """
+        Execute the tool calls of one assistant turn
+
+        All tools share one deadline, the earlier of TOOL_TURN_TIMEOUT_SECONDS
+        and the turn deadline. Independent tools run concurrently. Tools that
+        transfer or end the call run afterwards, one at a time, in the time
+        that is left; once one of them succeeded the rest are skipped.
+
+        Returns:
+            Tool results by tool call index
+        """
+        loop = asyncio.get_running_loop()
+        tools_deadline = loop.time() + settings.TOOL_TURN_TIMEOUT_SECONDS
+        if deadline is not None:
+            tools_deadline = min(tools_deadline, deadline)
+
+        async def execute(tool_call: ToolCallEnd) -> ToolResult:
+            try:
+                arguments = tool_call.parsed_arguments()
+            except ValueError as e:
+                return tool_failure("invalid_arguments", tool_call.name, str(e))
+
+            try:
+                return await asyncio.wait_for(
+                    self.tool_executor.execute_tool(tool_call.name, arguments),
+                    timeout=max(tools_deadline - loop.time(), 0)
+                )
+            except asyncio.TimeoutError:
+                return ToolResult(f"Error: Tool '{tool_call.name}' timed out", ok=False)
+            except Exception as e:
+                return ToolResult(f"Error executing tool '{tool_call.name}': {str(e)}", ok=False)
+
+        independent = [tool_call for tool_call in tool_calls if tool_call.name not in CALL_CONTROL_TOOLS]
+        call_control = sorted(
+            (tool_call for tool_call in tool_calls if tool_call.name in CALL_CONTROL_TOOLS),
+            key=lambda tool_call: CALL_CONTROL_TOOLS.index(tool_call.name)
+        )
+
+        results = await asyncio.gather(*(execute(tool_call) for tool_call in independent))
+        tool_results = {tool_call.index: result.content for tool_call, result in zip(independent, results)}
+
+        call_handled = False
+        for tool_call in call_control:
+            if call_handled:
+                tool_results[tool_call.index] = "Skipped: the call was already transferred or ended"
+                continue
+
+            result = await execute(tool_call)
+            tool_results[tool_call.index] = result.content
+            call_handled = result.ok
+
+        return tool_results
+
+    async def stream_speech_response(
+        self,
+        user_input: str,
+        save_to_db: bool = True,
+        output_format: str = "mp3_44100_128",
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[SpeechChunk]:
+        """
+        Process message and stream the audio response sentence by sentence
+
+        The LLM stream is split into sentence or clause chunks and speech
+        synthesis for each chunk starts as soon as it is complete, while the
+        rest of the reply is still being generated. Chunks are yielded in
+        order. Closing the generator early (e.g. on barge-in) cancels the LLM
+        stream and all pending synthesis; use finish_interrupted_turn
+        afterwards to record what was played.
+
+        While the response is delayed, by a tool call or a first sentence
+        slower than FILLER_AFTER_MS, one pre-rendered filler phrase is
+        yielded (marked with filler=True).
+
+        Args:
+            user_input: The user's message
+            save_to_db: Whether to save messages to database
+            output_format: ElevenLabs output format, e.g. "ulaw_8000" for Twilio
+            deadline: Event loop time by which the turn must be complete,
+                bounding the LLM, tools and speech synthesis
+
+        Yields:
+            SpeechChunk with the text and synthesized audio of each chunk
+
+        Raises:
+            asyncio.TimeoutError: If the deadline passes
+        """
+        pending: asyncio.Queue = asyncio.Queue()
+        chunks_queued = 0
+        filler_played = False
+
+        def synthesize(text: str) -> None:
+            nonlocal chunks_queued
+            chunks_queued += 1
+            task = asyncio.create_task(elevenlabs_service.text_to_speech(
+                text=text,
+                voice_id=self.agent.voice_id,
+                output_format=output_format
+            ))
+            pending.put_nowait((text, task, False))
+
+        def play_filler(text: str) -> None:
+            # At most one filler per turn, the first sentence may follow right after
+            nonlocal filler_played
+            if filler_played or not settings.FILLER_ENABLED:
+                return
+            filler_played = True
+            task = asyncio.create_task(tts_cache.get_audio(text, self.agent.voice_id, output_format=output_format))
+            pending.put_nowait((text, task, True))
+
+        def on_tool_call(name: str) -> None:
+            if name in phrases.TOOL_FILLERS:
+                play_filler(phrases.TOOL_FILLERS[name])
+
+        def on_slow_start() -> None:
+            if chunks_queued == 0:
+                play_filler(phrases.FILLER)
+
+        async def produce() -> None:
+            chunker = SentenceChunker()
+            try:
+                async for delta in self.stream_message(
+                    user_input,
+                    save_to_db=save_to_db,
+                    deadline=deadline,
+                    on_tool_call=on_tool_call
+                ):
+                    for text in chunker.feed(delta):
+                        synthesize(text)
+                for text in chunker.flush():
+                    synthesize(text)
+            finally:
+                pending.put_nowait(None)
+
+        producer = asyncio.create_task(produce())
+        slow_start = asyncio.get_running_loop().call_later(settings.FILLER_AFTER_MS / 1000, on_slow_start)
+        try:
+            while True:
+                item = await pending.get()
+                if item is None:
+                    break
+                text, task, filler = item
+                try:
+                    audio = await asyncio.wait_for(task, time_left(deadline))
+                except asyncio.TimeoutError:
+                    raise
+                except Exception as e:
+                    if not filler:
+                        raise
+                    # A missing filler is not worth failing the turn for
+                    logger.warning(f"Filler synthesis failed: {str(e)}")
+                    continue
+                yield SpeechChunk(text=text, audio=audio, filler=filler)
+
+            # Surface errors from the LLM stream
+            await producer
+        finally:
+            slow_start.cancel()
+            producer.cancel()
+            while not pending.empty():
+                item = pending.get_nowait()
+                if item is not None:
+                    item[1].cancel()
+
+            # Let the producer unwind before the turn is finished
+            await asyncio.wait([producer])
 
     async def get_speech_response(self, user_input: str) -> bytes:
         """
@@ -153,39 +551,26 @@ class ConversationManager:
 
         return audio
 
-    async def end_conversation(self) -> None:
-        """End the conversation and create call log"""
-        if not self.conversation:
-            return
 
-        # Update conversation end time
-        self.conversation.end_time = datetime.utcnow()
-        self.conversation.status = "completed"
-
-        # Calculate duration
-        duration = (self.conversation.end_time - self.conversation.start_time).total_seconds()
-
-        # Create transcript
-        transcript_lines = []
-        for msg in self.messages[1:]:  # Skip system message
-            role = msg["role"]
-            content = msg["content"]
-            if role in ["user", "assistant"]:
-                transcript_lines.append(f"{role.upper()}: {content}")
-
-        transcript = "\n".join(transcript_lines)
-
-        # Generate summary
-        summary = await llm_service.create_conversation_summary(self.messages[1:])
-
-        # Create call log
-        call_log = CallLog(
-            conversation_id=self.conversation.id,
-            duration=duration,
-            status="completed",
-            transcript=transcript,
-            summary=summary
-        )
+async def load_conversation_manager(db: AsyncSession, call_sid: str):
+    """
+    Rebuild the conversation manager of a live call from the call state store
+
+    Returns:
+        Tuple of (conversation manager, call state), or (None, None) if the
+        call is unknown
+    """
+    state = await call_state_store.load(call_sid)
+    if not state:
+        return None, None
+
+    agent = await db.get(Agent, state.agent_id)
+    if not agent:
+        return None, None
+
+    conversation = None
+    if state.conversation_id:
+        conversation = await db.get(Conversation, state.conversation_id)
 
-        self.db.add(call_log)
-        await self.db.commit()
+    conv_manager = ConversationManager.from_state(state, agent, db, conversation)
+    return conv_manager, state
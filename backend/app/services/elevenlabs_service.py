@@ -1,18 +1,77 @@
-from elevenlabs import generate
+import asyncio
+import logging
+import time
+from typing import Optional, AsyncIterator
+
+import httpx
+
 from app.core.config import settings
-from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Fast model for real-time
+DEFAULT_MODEL = "eleven_turbo_v2_5"
+
+# Output formats supported by the streaming endpoint
+# (ulaw_8000 is what Twilio media streams expect)
+OUTPUT_FORMATS = {
+    "mp3_22050_32",
+    "mp3_44100_64",
+    "mp3_44100_96",
+    "mp3_44100_128",
+    "mp3_44100_192",
+    "pcm_16000",
+    "pcm_22050",
+    "pcm_24000",
+    "pcm_44100",
+    "ulaw_8000",
+}
+
+
+class ElevenLabsError(Exception):
+    """Raised when the ElevenLabs API returns an error"""
 
 
 class ElevenLabsService:
     def __init__(self):
         self.api_key = settings.ELEVENLABS_API_KEY
         self.default_voice_id = "21m00Tcm4TlvDq8ikWAM"  # Rachel
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # Limits concurrent syntheses so a burst of calls queues instead of being throttled
+        self.semaphore = asyncio.Semaphore(settings.ELEVENLABS_MAX_CONCURRENCY)
+
+        # Time to first audio byte (milliseconds)
+        self.last_first_byte_ms: Optional[float] = None
+        self.avg_first_byte_ms: Optional[float] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared keep-alive HTTP client (created on first use)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=settings.ELEVENLABS_API_URL,
+                headers={"xi-api-key": self.api_key},
+                timeout=httpx.Timeout(settings.ELEVENLABS_TIMEOUT_SECONDS, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=settings.ELEVENLABS_MAX_CONCURRENCY,
+                    max_keepalive_connections=settings.ELEVENLABS_MAX_CONCURRENCY,
+                    keepalive_expiry=60
+                )
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def text_to_speech(
         self,
         text: str,
         voice_id: Optional[str] = None,
-        model: str = "eleven_turbo_v2_5"  # Fast model for real-time
+        model: str = DEFAULT_MODEL,
+        output_format: str = "mp3_44100_128"
     ) -> bytes:
         """
         Convert text to speech using ElevenLabs
@@ -20,43 +79,64 @@ class ElevenLabsService:
         For the fastest latency, use:
         - Model: eleven_turbo_v2_5 (or eleven_turbo_v2 for conversational AI)
         - This provides ~150ms latency as mentioned
-        """
-        voice_id = voice_id or self.default_voice_id
 
-        # Generate audio
-        audio = generate(
-            text=text,
-            voice=voice_id,
-            model=model,
-            api_key=self.api_key
-        )
-
-        # Convert generator to bytes
-        audio_bytes = b"".join(audio)
-        return audio_bytes
+        Use output_format="ulaw_8000" for audio sent to Twilio media streams.
+        """
+        chunks = []
+        async for chunk in self.text_to_speech_stream(text, voice_id, model, output_format):
+            chunks.append(chunk)
+        return b"".join(chunks)
 
     async def text_to_speech_stream(
         self,
         text: str,
         voice_id: Optional[str] = None,
-        model: str = "eleven_turbo_v2_5"
-    ):
+        model: str = DEFAULT_MODEL,
+        output_format: str = "mp3_44100_128"
+    ) -> AsyncIterator[bytes]:
         """
         Stream text to speech for lower latency
-        Returns an async generator of audio chunks
+
+        Yields:
+            Audio chunks as they arrive from ElevenLabs
         """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format {output_format}")
+
         voice_id = voice_id or self.default_voice_id
 
-        # Use streaming for real-time response
-        audio_stream = generate(
-            text=text,
-            voice=voice_id,
-            model=model,
-            stream=True,
-            api_key=self.api_key
-        )
+        async with self.semaphore:
+            started = time.perf_counter()
+
+            async with self.client.stream(
+                "POST",
+                f"/v1/text-to-speech/{voice_id}/stream",
+                params={
+                    "output_format": output_format,
+                    "optimize_streaming_latency": settings.ELEVENLABS_OPTIMIZE_STREAMING_LATENCY
+                },
+                json={"text": text, "model_id": model}
+            ) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    raise ElevenLabsError(
+                        f"ElevenLabs returned {response.status_code}: {response.text[:200]}"
+                    )
+
+                first_chunk = True
+                async for chunk in response.aiter_bytes():
+                    if first_chunk:
+                        self._record_first_byte((time.perf_counter() - started) * 1000)
+                        first_chunk = False
+                    yield chunk
 
-        return audio_stream
+    def _record_first_byte(self, elapsed_ms: float) -> None:
+        self.last_first_byte_ms = elapsed_ms
+        if self.avg_first_byte_ms is None:
+            self.avg_first_byte_ms = elapsed_ms
+        else:
+            self.avg_first_byte_ms = 0.8 * self.avg_first_byte_ms + 0.2 * elapsed_ms
+        logger.debug(f"ElevenLabs first byte after {elapsed_ms:.0f} ms")
 
     async def get_voices(self):
         """Get available voices from ElevenLabs"""
@@ -0,0 +1,143 @@
+from typing import Dict, Any, Callable, Awaitable, Optional
+from datetime import datetime
+import asyncio
+import json
+import logging
+import socket
+import time
+import uuid
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class JobQueue:
+    """
+    Durable Redis-backed job queue consumed by the worker process
+
+    Jobs move atomically from the pending list to a per-consumer processing
+    list while they run, so a crashed worker picks them up again on restart.
+    Failed jobs are retried with exponential backoff via a delayed sorted
+    set and end up in the dead-letter list once they run out of attempts.
+
+    The processing list is named after the consumer, which must be stable
+    across restarts (settings.INSTANCE_NAME) for a recreated worker to find
+    the jobs its predecessor left behind.
+    """
+
+    def __init__(self, redis: Redis, name: str = "jobs"):
+        self.redis = redis
+        self.pending_key = f"{name}:pending"
+        self.delayed_key = f"{name}:delayed"
+        self.dead_key = f"{name}:dead"
+        self.processing_prefix = f"{name}:processing:"
+
+    async def enqueue(self, job_type: str, payload: Dict[str, Any]) -> str:
+        """Add a job to the queue and return its id"""
+        job = {
+            "id": uuid.uuid4().hex,
+            "type": job_type,
+            "payload": payload,
+            "attempts": 0,
+            "enqueued_at": datetime.utcnow().isoformat(),
+        }
+        await self.redis.lpush(self.pending_key, json.dumps(job, ensure_ascii=False))
+        return job["id"]
+
+    async def run_worker(
+        self,
+        handlers: Dict[str, JobHandler],
+        concurrency: int = settings.JOB_WORKER_CONCURRENCY,
+        consumer: Optional[str] = None
+    ) -> None:
+        """
+        Consume jobs forever, running at most `concurrency` at a time
+
+        Redis errors are logged and retried with backoff, so a connection
+        blip does not stop the worker. Only cancellation ends the loop.
+        """
+        processing_key = f"{self.processing_prefix}{consumer or settings.INSTANCE_NAME or socket.gethostname()}"
+        semaphore = asyncio.Semaphore(concurrency)
+        running = set()
+        requeued = False
+        failures = 0
+
+        while True:
+            try:
+                if not requeued:
+                    await self._requeue_abandoned(processing_key)
+                    requeued = True
+
+                await self._promote_due_jobs()
+
+                await semaphore.acquire()
+                try:
+                    raw_job = await self.redis.blmove(self.pending_key, processing_key, 1, "RIGHT", "LEFT")
+                except BaseException:
+                    semaphore.release()
+                    raise
+                failures = 0
+                if raw_job is None:
+                    semaphore.release()
+                    continue
+
+                task = asyncio.create_task(self._run_job(raw_job, processing_key, handlers))
+                running.add(task)
+                task.add_done_callback(running.discard)
+                task.add_done_callback(lambda _: semaphore.release())
+            except Exception as e:
+                failures += 1
+                delay = min(
+                    settings.JOB_POLL_ERROR_BACKOFF_SECONDS * (2 ** (failures - 1)),
+                    settings.JOB_POLL_ERROR_MAX_BACKOFF_SECONDS
+                )
+                logger.error(f"Job queue error, retrying in {delay}s: {str(e)}")
+                await asyncio.sleep(delay)
+
+    async def _run_job(self, raw_job: str, processing_key: str, handlers: Dict[str, JobHandler]) -> None:
+        job = json.loads(raw_job)
+        handler = handlers.get(job["type"])
+
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job type {job['type']}")
+            await handler(job["payload"])
+        except Exception as e:
+            job["attempts"] += 1
+            job["last_error"] = str(e)
+
+            if handler is not None and job["attempts"] < settings.JOB_MAX_ATTEMPTS:
+                delay = settings.JOB_RETRY_BACKOFF_SECONDS * (2 ** (job["attempts"] - 1))
+                logger.warning(f"Job {job['id']} ({job['type']}) failed, retrying in {delay}s: {str(e)}")
+                await self.redis.zadd(self.delayed_key, {json.dumps(job, ensure_ascii=False): time.time() + delay})
+            else:
+                logger.error(f"Job {job['id']} ({job['type']}) moved to dead-letter queue: {str(e)}")
+                await self.redis.lpush(self.dead_key, json.dumps(job, ensure_ascii=False))
+        finally:
+            await self.redis.lrem(processing_key, 1, raw_job)
+
+    async def _promote_due_jobs(self) -> None:
+        """Move delayed jobs whose backoff has expired back to the pending list"""
+        due_jobs = await self.redis.zrangebyscore(self.delayed_key, "-inf", time.time(), start=0, num=100)
+        for raw_job in due_jobs:
+            # Only the worker that removes the job re-queues it
+            if await self.redis.zrem(self.delayed_key, raw_job):
+                await self.redis.lpush(self.pending_key, raw_job)
+
+    async def _requeue_abandoned(self, processing_key: str) -> None:
+        """Re-queue jobs this consumer was running when it stopped"""
+        count = 0
+        while await self.redis.lmove(processing_key, self.pending_key, "RIGHT", "RIGHT"):
+            count += 1
+        if count:
+            logger.info(f"Re-queued {count} abandoned jobs")
+
+
+# Singleton instance
+job_queue = JobQueue(redis_client)
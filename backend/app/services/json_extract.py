@@ -0,0 +1,93 @@
+"""
+Extract the relevant part of a JSON document for a tool result
+
+Supports a small JSONPath subset: `$`, `.key`, `['key']`, `[0]`, `[-1]`,
+`[*]` and `.*`. Paths without a leading `$` are accepted too, e.g.
+`data.items[0].name`.
+"""
+from typing import Any, List, Optional
+import re
+
+PATH_TOKEN = re.compile(r"\.\*|\[\*\]|\.([A-Za-z_][\w-]*)|\[(-?\d+)\]|\['([^']*)'\]|\[\"([^\"]*)\"\]")
+
+
+class JSONPathError(ValueError):
+    """Raised for paths outside the supported subset"""
+
+
+def parse_path(path: str) -> List[Any]:
+    """Split a path into keys (str), indexes (int) and wildcards (None)"""
+    path = path.strip()
+    if path.startswith("$"):
+        path = path[1:]
+    elif path and not path.startswith((".", "[")):
+        path = "." + path
+
+    steps: List[Any] = []
+    position = 0
+    while position < len(path):
+        match = PATH_TOKEN.match(path, position)
+        if not match:
+            raise JSONPathError(f"Unsupported JSONPath at '{path[position:]}'")
+
+        key, index, quoted, double_quoted = match.groups()
+        if key is not None:
+            steps.append(key)
+        elif index is not None:
+            steps.append(int(index))
+        elif quoted is not None or double_quoted is not None:
+            steps.append(quoted if quoted is not None else double_quoted)
+        else:
+            steps.append(None)
+        position = match.end()
+
+    return steps
+
+
+def extract_path(data: Any, path: str) -> Any:
+    """
+    Value at a JSONPath
+
+    Returns:
+        The value for a path without wildcards (None if missing), otherwise
+        the list of all matches
+    """
+    steps = parse_path(path)
+    matches = [data]
+
+    for step in steps:
+        next_matches = []
+        for value in matches:
+            if step is None:
+                if isinstance(value, dict):
+                    next_matches.extend(value.values())
+                elif isinstance(value, list):
+                    next_matches.extend(value)
+            elif isinstance(step, int):
+                if isinstance(value, list) and -len(value) <= step < len(value):
+                    next_matches.append(value[step])
+            elif isinstance(value, dict) and step in value:
+                next_matches.append(value[step])
+        matches = next_matches
+
+    if None in steps:
+        return matches
+    return matches[0] if matches else None
+
+
+def select_fields(data: Any, fields: List[str]) -> Any:
+    """Keep only `fields` of an object, or of every object in a list"""
+    if isinstance(data, dict):
+        return {field: data[field] for field in fields if field in data}
+    if isinstance(data, list):
+        return [select_fields(item, fields) for item in data]
+    return data
+
+
+def extract(data: Any, path: Optional[str] = None, fields: Optional[List[str]] = None) -> Any:
+    """Apply an optional path, then an optional field selection"""
+    if path:
+        data = extract_path(data, path)
+    if fields:
+        data = select_fields(data, fields)
+    return data
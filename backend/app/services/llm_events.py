@@ -0,0 +1,66 @@
+"""
+Typed events streamed from LLMService to its callers
+
+Text and tool calls arrive as separate event types, so callers never have
+to guess whether a chunk of text is an encoded tool call.
+"""
+from dataclasses import dataclass
+from typing import Optional, Union, Dict, Any
+import json
+
+
+@dataclass
+class TextDelta:
+    text: str
+
+
+@dataclass
+class ToolCallStart:
+    index: int
+    id: str
+    name: str
+
+
+@dataclass
+class ToolCallArgumentsDelta:
+    index: int
+    delta: str
+
+
+@dataclass
+class ToolCallEnd:
+    """A fully assembled tool call"""
+    index: int
+    id: str
+    name: str
+    arguments: str  # JSON as produced by the model
+
+    def parsed_arguments(self) -> Dict[str, Any]:
+        """
+        Arguments as a dict
+
+        Raises:
+            ValueError: If the model produced invalid JSON or not an object
+        """
+        try:
+            arguments = json.loads(self.arguments) if self.arguments else {}
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Arguments are not valid JSON: {e}") from e
+        if not isinstance(arguments, dict):
+            raise ValueError("Arguments must be a JSON object")
+        return arguments
+
+
+@dataclass
+class Finish:
+    reason: Optional[str]
+
+
+@dataclass
+class Usage:
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+
+
+LLMEvent = Union[TextDelta, ToolCallStart, ToolCallArgumentsDelta, ToolCallEnd, Finish, Usage]
@@ -0,0 +1,390 @@
+"""
+Latency-aware routing of chat completions across several LLM deployments
+
+Every backend (deployment, endpoint or region) keeps an EWMA of its time to
+first token and a circuit breaker. Requests go to the fastest healthy
+backend that serves the task; if the first token is late a hedged request
+is sent to the next backend and whichever answers first wins.
+"""
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, AsyncGenerator
+import asyncio
+import json
+import logging
+import random
+import time
+
+import httpx
+from openai import AsyncAzureOpenAI, AsyncOpenAI
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.core.deadline import time_left
+from app.services.llm_events import LLMEvent, TextDelta, ToolCallStart, ToolCallArgumentsDelta, ToolCallEnd, Finish, Usage
+
+logger = logging.getLogger(__name__)
+
+# Routing tasks
+TASK_CHAT = "chat"
+TASK_SUMMARY = "summary"
+
+
+class LLMUnavailableError(Exception):
+    """Raised when no backend could serve a request"""
+
+
+@dataclass
+class LLMBackendConfig:
+    name: str
+    endpoint: str
+    api_key: str
+    deployment: str
+    provider: str = "azure"  # azure or openai (any OpenAI-compatible server)
+    api_version: Optional[str] = None
+    tasks: List[str] = field(default_factory=lambda: [TASK_CHAT, TASK_SUMMARY])
+
+
+class LLMBackend:
+    """One deployment with its client, latency statistics and circuit breaker"""
+
+    def __init__(
+        self,
+        config: LLMBackendConfig,
+        max_retries: int = 2,
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
+        self.config = config
+        self.name = config.name
+
+        if config.provider == "azure":
+            self.client = AsyncAzureOpenAI(
+                api_key=config.api_key,
+                api_version=config.api_version or settings.AZURE_OPENAI_API_VERSION,
+                azure_endpoint=config.endpoint,
+                max_retries=max_retries,
+                http_client=http_client
+            )
+        else:
+            self.client = AsyncOpenAI(
+                api_key=config.api_key,
+                base_url=config.endpoint,
+                max_retries=max_retries,
+                http_client=http_client
+            )
+
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout=settings.LLM_BREAKER_RECOVERY_SECONDS
+        )
+        self.ewma_ttft_ms: Optional[float] = None
+        self.in_flight = 0
+
+    def observe_ttft(self, ttft_ms: float) -> None:
+        if self.ewma_ttft_ms is None:
+            self.ewma_ttft_ms = ttft_ms
+        else:
+            alpha = settings.LLM_EWMA_ALPHA
+            self.ewma_ttft_ms = alpha * ttft_ms + (1 - alpha) * self.ewma_ttft_ms
+
+    def score(self) -> float:
+        """Expected time to first token; unmeasured backends look fast so they get tried"""
+        ttft = self.ewma_ttft_ms if self.ewma_ttft_ms is not None else 0.0
+        # Queueing penalty for requests already running on this backend
+        return ttft * (1 + 0.1 * self.in_flight)
+
+    async def stream_events(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]],
+        temperature: float,
+        max_tokens: int
+    ) -> AsyncGenerator[LLMEvent, None]:
+        """
+        Stream a chat completion from this backend as typed events
+
+        Tool call deltas are assembled by index: the id and name arrive with
+        the first delta of a call, the arguments in fragments after it. A
+        ToolCallEnd with the complete arguments is emitted for every call
+        before the Finish event.
+        """
+        kwargs = {
+            "model": self.config.deployment,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+        }
+
+        # Add tools if provided
+        if tools:
+            kwargs["tools"] = tools
+            kwargs["tool_choice"] = "auto"
+
+        response = await self.client.chat.completions.create(**kwargs)
+
+        try:
+            async for event in self._parse_stream(response):
+                yield event
+        finally:
+            # Stops generation on the server when the request is cancelled
+            await response.close()
+
+    async def _parse_stream(self, response) -> AsyncGenerator[LLMEvent, None]:
+        tool_calls: Dict[int, Dict[str, Any]] = {}
+        finish_reason = None
+
+        async for chunk in response:
+            usage = getattr(chunk, "usage", None)
+            if usage:
+                yield Usage(
+                    prompt_tokens=usage.prompt_tokens,
+                    completion_tokens=usage.completion_tokens,
+                    total_tokens=usage.total_tokens
+                )
+
+            if not chunk.choices:
+                continue
+
+            choice = chunk.choices[0]
+            delta = choice.delta
+
+            if delta and delta.content:
+                yield TextDelta(delta.content)
+
+            if delta and delta.tool_calls:
+                for tool_call_delta in delta.tool_calls:
+                    index = tool_call_delta.index
+                    function = tool_call_delta.function
+
+                    if index not in tool_calls:
+                        tool_calls[index] = {
+                            "id": tool_call_delta.id or "",
+                            "name": function.name if function and function.name else "",
+                            "arguments": [],
+                        }
+                        yield ToolCallStart(index, tool_calls[index]["id"], tool_calls[index]["name"])
+
+                    if function and function.arguments:
+                        tool_calls[index]["arguments"].append(function.arguments)
+                        yield ToolCallArgumentsDelta(index, function.arguments)
+
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+
+        for index in sorted(tool_calls):
+            call = tool_calls[index]
+            yield ToolCallEnd(index, call["id"], call["name"], "".join(call["arguments"]))
+
+        yield Finish(finish_reason)
+
+
+class _Attempt:
+    """A request running on one backend, pumping its events into a queue"""
+
+    def __init__(self, backend: LLMBackend, stream: AsyncGenerator[LLMEvent, None], probe: bool = False):
+        self.backend = backend
+        # Whether this request holds the half-open breaker's probe slot
+        self.probe = probe
+        # Whether its success or failure was recorded on the breaker
+        self.settled = False
+        self.started = time.monotonic()
+        self.first_event = False
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._pump(stream))
+
+    async def _pump(self, stream: AsyncGenerator[LLMEvent, None]) -> None:
+        self.backend.in_flight += 1
+        try:
+            async for event in stream:
+                await self.queue.put(("event", event))
+            await self.queue.put(("done", None))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self.queue.put(("error", e))
+        finally:
+            self.backend.in_flight -= 1
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.started) * 1000
+
+    def record_success(self) -> None:
+        self.settled = True
+        self.backend.breaker.record_success()
+
+    def record_failure(self) -> None:
+        self.settled = True
+        self.backend.breaker.record_failure()
+
+    def cancel(self) -> None:
+        if not self.task.done():
+            self.task.cancel()
+            if not self.first_event:
+                # Still waiting for its first token: count the wait so far
+                self.backend.observe_ttft(self.elapsed_ms())
+        # The response may be fully queued but not yet read, e.g. when the
+        # caller stops early: without an outcome the probe slot is given back
+        if self.probe and not self.settled:
+            self.settled = True
+            self.backend.breaker.release_probe()
+
+
+class LLMRouter:
+    """Route chat completions to the fastest healthy backend, with hedging and failover"""
+
+    def __init__(self, backends: List[LLMBackend], hedge_after_ms: float, explore_ratio: float = 0.05):
+        self.backends = backends
+        self.hedge_after_ms = hedge_after_ms
+        self.explore_ratio = explore_ratio
+
+    def candidates(self, task: str) -> List[LLMBackend]:
+        """Backends serving a task, fastest first, with open breakers skipped"""
+        backends = [
+            backend for backend in self.backends
+            if task in backend.config.tasks and backend.breaker.state != CircuitBreaker.OPEN
+        ]
+        backends.sort(key=lambda backend: backend.score())
+
+        # Occasionally try another backend first so stale latency estimates recover
+        if len(backends) > 1 and random.random() < self.explore_ratio:
+            backends.insert(0, backends.pop(random.randrange(1, len(backends))))
+
+        return backends
+
+    async def stream_events(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        task: str = TASK_CHAT,
+        deadline: Optional[float] = None
+    ) -> AsyncGenerator[LLMEvent, None]:
+        """
+        Stream a chat completion from the best available backend
+
+        Backends that fail before their first event are failed over to the
+        next candidate. Once a backend has produced its first event, the
+        request is committed to it.
+
+        Raises:
+            LLMUnavailableError: If no backend could serve the request
+            asyncio.TimeoutError: If the stream is not complete by `deadline`
+                (event loop time)
+        """
+        remaining = self.candidates(task)
+        attempts: List[_Attempt] = []
+        last_error: Optional[Exception] = None
+        hedged = False
+
+        def start_next() -> bool:
+            while remaining:
+                backend = remaining.pop(0)
+                probe = backend.breaker.state == CircuitBreaker.HALF_OPEN
+                if backend.breaker.allow_request():
+                    attempts.append(_Attempt(
+                        backend,
+                        backend.stream_events(messages, tools, temperature, max_tokens),
+                        probe=probe
+                    ))
+                    return True
+            return False
+
+        start_next()
+        winner: Optional[_Attempt] = None
+        first_item = None
+
+        try:
+            # Wait for the first event of any attempt
+            while winner is None:
+                if not attempts:
+                    raise LLMUnavailableError(f"No LLM backend available for {task}: {last_error}")
+
+                getters = {asyncio.ensure_future(attempt.queue.get()): attempt for attempt in attempts}
+                hedge_timeout = self.hedge_after_ms / 1000 if remaining and not hedged else None
+                deadline_timeout = time_left(deadline)
+                timeouts = [timeout for timeout in [hedge_timeout, deadline_timeout] if timeout is not None]
+                done, pending = await asyncio.wait(
+                    getters,
+                    timeout=min(timeouts) if timeouts else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for getter in pending:
+                    getter.cancel()
+
+                if not done:
+                    time_left(deadline)
+                    # First token is late: hedge on the next backend
+                    hedged = True
+                    logger.info(f"Hedging LLM request after {self.hedge_after_ms:.0f} ms")
+                    start_next()
+                    continue
+
+                for getter in done:
+                    attempt = getters[getter]
+                    kind, payload = getter.result()
+
+                    if kind == "error":
+                        last_error = payload
+                        attempt.record_failure()
+                        attempts.remove(attempt)
+                        logger.warning(f"LLM backend {attempt.backend.name} failed: {str(payload)}")
+                        if not attempts:
+                            start_next()
+                    elif winner is None:
+                        winner = attempt
+                        first_item = (kind, payload)
+
+            winner.first_event = True
+            winner.backend.observe_ttft(winner.elapsed_ms())
+            for attempt in attempts:
+                if attempt is not winner:
+                    attempt.cancel()
+
+            # Stream the rest from the winning backend
+            kind, payload = first_item
+            while True:
+                if kind == "event":
+                    yield payload
+                elif kind == "done":
+                    winner.record_success()
+                    return
+                else:
+                    winner.record_failure()
+                    raise payload
+                timeout = time_left(deadline)
+                kind, payload = await asyncio.wait_for(winner.queue.get(), timeout)
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+
+def load_backend_configs() -> List[LLMBackendConfig]:
+    """
+    Backends from LLM_BACKENDS (JSON list), or the single AZURE_OPENAI_* deployment
+
+    LLM_SUMMARY_DEPLOYMENT adds a deployment on the primary Azure endpoint
+    that serves summaries only (e.g. a cheaper model).
+    """
+    if settings.LLM_BACKENDS:
+        configs = [LLMBackendConfig(**backend) for backend in json.loads(settings.LLM_BACKENDS)]
+    else:
+        configs = [LLMBackendConfig(
+            name="primary",
+            endpoint=settings.AZURE_OPENAI_ENDPOINT,
+            api_key=settings.AZURE_OPENAI_KEY,
+            deployment=settings.AZURE_OPENAI_DEPLOYMENT,
+        )]
+
+    if settings.LLM_SUMMARY_DEPLOYMENT:
+        for config in configs:
+            config.tasks = [task for task in config.tasks if task != TASK_SUMMARY]
+        configs.append(LLMBackendConfig(
+            name="summary",
+            endpoint=settings.AZURE_OPENAI_ENDPOINT,
+            api_key=settings.AZURE_OPENAI_KEY,
+            deployment=settings.LLM_SUMMARY_DEPLOYMENT,
+            tasks=[TASK_SUMMARY],
+        ))
+
+    return configs
@@ -1,90 +1,84 @@
-from openai import AsyncAzureOpenAI
 from app.core.config import settings
 from typing import List, Dict, Any, Optional, AsyncGenerator
 import json
 
+from app.services.llm_events import LLMEvent, TextDelta
+from app.services.llm_router import LLMRouter, LLMBackend, load_backend_configs, TASK_CHAT, TASK_SUMMARY
+
+# Characters of each tool result passed to the history summary
+SUMMARY_TOOL_RESULT_MAX_CHARS = 500
+
 
 class LLMService:
     def __init__(self):
-        self.client = AsyncAzureOpenAI(
-            api_key=settings.AZURE_OPENAI_KEY,
-            api_version=settings.AZURE_OPENAI_API_VERSION,
-            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT
+        configs = load_backend_configs()
+        # With several backends a throttled one is failed over instead of retried
+        max_retries = 0 if len(configs) > 1 else 2
+        self.router = LLMRouter(
+            [LLMBackend(config, max_retries=max_retries) for config in configs],
+            hedge_after_ms=settings.LLM_HEDGE_AFTER_MS
         )
-        self.deployment = settings.AZURE_OPENAI_DEPLOYMENT
 
     async def chat_completion(
         self,
-        messages: List[Dict[str, str]],
-        tools: Optional[List[Dict[str, Any]]] = None,
+        messages: List[Dict[str, Any]],
         stream: bool = True,
         temperature: float = 0.7,
-        max_tokens: int = 500
+        max_tokens: int = 500,
+        task: str = TASK_CHAT,
+        deadline: Optional[float] = None
     ) -> AsyncGenerator[str, None]:
         """
-        Get chat completion from Azure OpenAI with streaming
+        Get chat completion text from Azure OpenAI with streaming
+
+        No tools are offered to the model; use stream_events for function
+        calling.
 
         Args:
             messages: List of message dicts with 'role' and 'content'
-            tools: Optional list of tool definitions for function calling
             stream: Whether to stream the response
             temperature: Sampling temperature
             max_tokens: Maximum tokens in response
+            task: Routing task ("chat" or "summary")
+            deadline: Event loop time by which the response must be complete
 
         Yields:
             Response chunks as they arrive (if streaming)
         """
-        kwargs = {
-            "model": self.deployment,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-            "stream": stream,
-        }
+        text = []
+        async for event in self.stream_events(
+            messages, temperature=temperature, max_tokens=max_tokens, task=task, deadline=deadline
+        ):
+            if isinstance(event, TextDelta):
+                if stream:
+                    yield event.text
+                else:
+                    text.append(event.text)
+
+        # Non-streaming response
+        if not stream and text:
+            yield "".join(text)
+
+    async def stream_events(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        task: str = TASK_CHAT,
+        deadline: Optional[float] = None
+    ) -> AsyncGenerator[LLMEvent, None]:
+        """
+        Stream a chat completion as typed events from the fastest healthy backend
 
-        # Add tools if provided
-        if tools:
-            kwargs["tools"] = tools
-            kwargs["tool_choice"] = "auto"
-
-        response = await self.client.chat.completions.create(**kwargs)
-
-        if stream:
-            # Stream response chunks
-            async for chunk in response:
-                if chunk.choices and len(chunk.choices) > 0:
-                    delta = chunk.choices[0].delta
-
-                    # Check for content
-                    if delta.content:
-                        yield delta.content
-
-                    # Check for tool calls
-                    if delta.tool_calls:
-                        for tool_call in delta.tool_calls:
-                            if tool_call.function:
-                                yield json.dumps({
-                                    "tool_call": {
-                                        "name": tool_call.function.name,
-                                        "arguments": tool_call.function.arguments
-                                    }
-                                })
-        else:
-            # Non-streaming response
-            if response.choices and len(response.choices) > 0:
-                message = response.choices[0].message
-
-                if message.content:
-                    yield message.content
-
-                if message.tool_calls:
-                    for tool_call in message.tool_calls:
-                        yield json.dumps({
-                            "tool_call": {
-                                "name": tool_call.function.name,
-                                "arguments": tool_call.function.arguments
-                            }
-                        })
+        Yields:
+            TextDelta, ToolCallStart, ToolCallArgumentsDelta, ToolCallEnd,
+            Usage and Finish events
+        """
+        async for event in self.router.stream_events(
+            messages, tools, temperature, max_tokens, task=task, deadline=deadline
+        ):
+            yield event
 
     async def create_conversation_summary(
         self,
@@ -103,7 +97,45 @@ class LLMService:
         ]
 
         summary = ""
-        async for chunk in self.chat_completion(summary_prompt, stream=True):
+        async for chunk in self.chat_completion(summary_prompt, stream=True, task=TASK_SUMMARY):
+            summary += chunk
+
+        return summary.strip()
+
+    async def summarize_history(
+        self,
+        previous_summary: Optional[str],
+        messages: List[Dict[str, Any]]
+    ) -> str:
+        """Fold older turns of a running conversation into its rolling summary"""
+        # Tool results (booking numbers, API answers) are part of what was agreed
+        tool_names = {
+            tool_call["id"]: tool_call["function"]["name"]
+            for msg in messages
+            for tool_call in msg.get("tool_calls") or []
+        }
+        lines = []
+        for msg in messages:
+            if msg["role"] in ["user", "assistant"] and msg.get("content"):
+                lines.append(f"{msg['role'].upper()}: {msg['content']}")
+            elif msg["role"] == "tool" and msg.get("content"):
+                name = tool_names.get(msg.get("tool_call_id"), "tool")
+                lines.append(f"TOOL ({name}): {msg['content'][:SUMMARY_TOOL_RESULT_MAX_CHARS]}")
+        transcript = "\n".join(lines)
+
+        summary_prompt = [
+            {
+                "role": "system",
+                "content": "Du führst eine laufende Zusammenfassung eines Telefongesprächs. Ergänze die bisherige Zusammenfassung um die neuen Gesprächsteile. Behalte Namen, Zahlen, Termine, Zusagen und offene Anliegen bei. Antworte nur mit der aktualisierten Zusammenfassung in höchstens 5 Sätzen."
+            },
+            {
+                "role": "user",
+                "content": f"Bisherige Zusammenfassung:\n{previous_summary or '(keine)'}\n\nNeue Gesprächsteile:\n{transcript}"
+            }
+        ]
+
+        summary = ""
+        async for chunk in self.chat_completion(summary_prompt, stream=True, temperature=0.2, max_tokens=300, task=TASK_SUMMARY):
             summary += chunk
 
         return summary.strip()
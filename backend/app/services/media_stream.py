@@ -0,0 +1,329 @@
+"""
+Real-time conversation over a bidirectional Twilio media stream
+
+Inbound μ-law frames are run through an energy-based turn detector. Each
+finished utterance is transcribed, answered by the ConversationManager and
+the reply is synthesized sentence by sentence as μ-law audio and streamed
+back on the same socket.
+
+When the caller starts speaking while the agent is still generating or
+talking (barge-in), the turn is cancelled, the audio queued at Twilio is
+cleared and only the sentences Twilio confirmed as played are kept in the
+history.
+"""
+import asyncio
+import base64
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, List
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.deadline import deadline_after
+from app.core.metrics import metrics
+from app.services import phrases
+from app.services.audio_utils import ulaw_rms, ulaw_duration_ms
+from app.services.call_state_store import call_state_store
+from app.services.conversation_manager import load_conversation_manager
+from app.services.stt_service import stt_service
+from app.services.tts_cache import tts_cache
+
+logger = logging.getLogger(__name__)
+
+# Turn detector events
+SPEECH_STARTED = "speech_started"
+TURN_ENDED = "turn_ended"
+
+# Outbound audio is sent in 500 ms media messages
+OUTBOUND_CHUNK_BYTES = 4000
+
+
+class TurnDetector:
+    """Energy-based voice activity detection on 8 kHz μ-law frames"""
+
+    def __init__(
+        self,
+        speech_threshold: int = settings.VAD_SPEECH_THRESHOLD,
+        min_speech_ms: int = settings.VAD_MIN_SPEECH_MS,
+        end_of_turn_silence_ms: int = settings.VAD_END_OF_TURN_SILENCE_MS
+    ):
+        self.speech_threshold = speech_threshold
+        self.min_speech_ms = min_speech_ms
+        self.end_of_turn_silence_ms = end_of_turn_silence_ms
+        self.reset()
+
+    def reset(self) -> None:
+        self.in_speech = False
+        self.speech_ms = 0.0
+        self.silence_ms = 0.0
+        self.buffer = bytearray()
+
+    def process(self, frame: bytes) -> Optional[str]:
+        """
+        Feed one inbound frame
+
+        Returns:
+            SPEECH_STARTED when the caller starts talking, TURN_ENDED when
+            they stopped long enough to end the turn, otherwise None
+        """
+        frame_ms = ulaw_duration_ms(frame)
+        voiced = ulaw_rms(frame) >= self.speech_threshold
+
+        if voiced:
+            self.buffer.extend(frame)
+            self.speech_ms += frame_ms
+            self.silence_ms = 0.0
+            if not self.in_speech and self.speech_ms >= self.min_speech_ms:
+                self.in_speech = True
+                return SPEECH_STARTED
+            return None
+
+        if not self.in_speech:
+            # Discard short noise bursts
+            if self.buffer:
+                self.silence_ms += frame_ms
+                if self.silence_ms >= self.min_speech_ms:
+                    self.reset()
+            return None
+
+        self.buffer.extend(frame)
+        self.silence_ms += frame_ms
+        if self.silence_ms >= self.end_of_turn_silence_ms:
+            return TURN_ENDED
+        return None
+
+    def take_utterance(self) -> bytes:
+        """Return the audio of the finished utterance and start listening again"""
+        audio = bytes(self.buffer)
+        self.reset()
+        return audio
+
+
+class MediaStreamSession:
+    """Drive a conversation over one Twilio media stream WebSocket"""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.db = None
+        self.stream_sid: Optional[str] = None
+        self.call_sid: Optional[str] = None
+        self.conv_manager = None
+        self.state = None
+        self.turn_detector = TurnDetector()
+        self.utterances: asyncio.Queue = asyncio.Queue()
+        self.turn_worker: Optional[asyncio.Task] = None
+        self.active_turn: Optional[asyncio.Task] = None
+        self.responding = False
+
+        # Text of sent audio by mark name until Twilio reports it played
+        self.unplayed: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self.mark_count = 0
+        # Response text of the current turn the caller has heard
+        self.spoken: List[str] = []
+
+    async def run(self) -> None:
+        """Handle stream events until Twilio stops the stream or disconnects"""
+        async with AsyncSessionLocal() as db:
+            self.db = db
+            try:
+                while True:
+                    message = json.loads(await self.websocket.receive_text())
+                    event = message.get("event")
+
+                    if event == "start":
+                        await self._on_start(message["start"])
+                    elif event == "media":
+                        await self._on_media(message["media"])
+                    elif event == "mark":
+                        self._on_mark(message["mark"]["name"])
+                    elif event == "stop":
+                        break
+            except WebSocketDisconnect:
+                pass
+            finally:
+                for task in [self.turn_worker, self.active_turn]:
+                    if task:
+                        task.cancel()
+                        try:
+                            await task
+                        except asyncio.CancelledError:
+                            pass
+
+    async def _on_start(self, start: dict) -> None:
+        self.stream_sid = start["streamSid"]
+        self.call_sid = start["callSid"]
+
+        self.conv_manager, self.state = await load_conversation_manager(self.db, self.call_sid)
+        if not self.conv_manager:
+            logger.warning(f"Media stream for unknown call {self.call_sid}")
+            await self.websocket.close()
+            return
+
+        self.turn_worker = asyncio.create_task(
+            self._process_turns(greeting=self.conv_manager.agent.greeting_message)
+        )
+
+    async def _on_media(self, media: dict) -> None:
+        if not self.conv_manager or media.get("track", "inbound") != "inbound":
+            return
+
+        frame = base64.b64decode(media["payload"])
+        event = self.turn_detector.process(frame)
+        if event == SPEECH_STARTED:
+            await self._barge_in()
+        elif event == TURN_ENDED:
+            self.utterances.put_nowait(self.turn_detector.take_utterance())
+
+    def _on_mark(self, name: str) -> None:
+        # Marks of audio dropped by a barge-in are no longer tracked
+        if name not in self.unplayed:
+            return
+
+        text = self.unplayed.pop(name)
+        if text:
+            self.spoken.append(text)
+
+    async def _barge_in(self) -> None:
+        """Stop generating and playing the agent's response when the caller talks over it"""
+        # A turn still being transcribed is not interrupted, only its response
+        turn_running = self.responding and not self.active_turn.done()
+        if not turn_running and not self.unplayed:
+            return
+
+        logger.info(f"Caller interrupted the agent on call {self.call_sid}")
+        interrupted_response = any(text is not None for text in self.unplayed.values())
+        self.unplayed.clear()
+        await self._send_clear()
+
+        if turn_running:
+            # The turn records what was played while it unwinds
+            self.active_turn.cancel()
+        elif interrupted_response:
+            # The response was fully generated and saved, but not fully played
+            await self.conv_manager.finish_interrupted_turn(" ".join(self.spoken), save_to_db=True)
+            self.state = await call_state_store.save_merged(self.conv_manager.to_state(self.state), [])
+
+    async def _process_turns(self, greeting: str) -> None:
+        """Play the greeting, then answer utterances in the order they were spoken"""
+        await self._speak(greeting)
+
+        while True:
+            audio = await self.utterances.get()
+
+            # Run the turn as its own task so a barge-in can cancel it
+            self.active_turn = asyncio.create_task(self._handle_turn(audio))
+            await asyncio.wait([self.active_turn])
+            if not self.active_turn.cancelled() and self.active_turn.exception():
+                logger.error(f"Media stream turn failed for call {self.call_sid}: {str(self.active_turn.exception())}")
+
+    async def _handle_turn(self, audio: bytes) -> None:
+        user_input = await stt_service.transcribe_ulaw(audio, language=self.conv_manager.agent.language)
+        if not user_input:
+            return
+
+        started = time.monotonic()
+        self.spoken = []
+        self.responding = True
+        responses = self.conv_manager.stream_speech_response(
+            user_input,
+            save_to_db=True,
+            output_format="ulaw_8000",
+            deadline=deadline_after(settings.TURN_HARD_TIMEOUT_SECONDS)
+        )
+        next_chunk = asyncio.ensure_future(anext(responses, None))
+
+        try:
+            # Play the holding phrase if the first sentence misses the latency budget
+            done, _ = await asyncio.wait([next_chunk], timeout=self.conv_manager.turn_budget_seconds)
+            if done:
+                metrics.increment("turn_outcome", outcome="completed")
+            else:
+                metrics.increment("turn_outcome", outcome="holding")
+                await self._speak(phrases.HOLDING)
+
+            # Play each sentence as soon as it is synthesized
+            chunk = await next_chunk
+            while chunk is not None:
+                await self._send_audio(chunk.audio)
+                # Fillers are not part of the response the caller heard
+                await self._send_mark(None if chunk.filler else chunk.text)
+                next_chunk = asyncio.ensure_future(anext(responses, None))
+                chunk = await next_chunk
+        except asyncio.CancelledError:
+            # Barge-in: stop the LLM and TTS, then keep only what was played
+            await self._close_responses(responses, next_chunk)
+            await self.conv_manager.finish_interrupted_turn(" ".join(self.spoken), save_to_db=True)
+            await self._save_state()
+            raise
+        except asyncio.TimeoutError:
+            logger.warning(f"Turn on call {self.call_sid} exceeded the hard timeout")
+            metrics.increment("turn_outcome", outcome="timeout")
+            await self.conv_manager.finish_interrupted_turn(" ".join(self.spoken), save_to_db=True)
+            await self._speak(phrases.TURN_TIMEOUT)
+        finally:
+            self.responding = False
+            await self._close_responses(responses, next_chunk)
+
+        metrics.observe("turn_latency_ms", (time.monotonic() - started) * 1000)
+        await self._save_state()
+
+    @staticmethod
+    async def _close_responses(responses, next_chunk: asyncio.Future) -> None:
+        """Cancel a pending chunk and close the response stream (cancels the LLM and TTS)"""
+        next_chunk.cancel()
+        await asyncio.wait([next_chunk])
+        await responses.aclose()
+
+    async def _save_state(self) -> None:
+        self.state = await call_state_store.save_merged(
+            self.conv_manager.to_state(self.state),
+            self.conv_manager.turn_messages
+        )
+
+    async def _speak(self, text: str) -> None:
+        """Play a fixed phrase (e.g. the greeting) to the caller as μ-law audio"""
+        if not text:
+            return
+
+        audio = await tts_cache.get_audio(
+            text,
+            self.conv_manager.agent.voice_id,
+            output_format="ulaw_8000"
+        )
+        await self._send_audio(audio)
+        await self._send_mark()
+
+    async def _send_audio(self, audio: bytes) -> None:
+        for offset in range(0, len(audio), OUTBOUND_CHUNK_BYTES):
+            await self.websocket.send_json({
+                "event": "media",
+                "streamSid": self.stream_sid,
+                "media": {"payload": base64.b64encode(audio[offset:offset + OUTBOUND_CHUNK_BYTES]).decode("ascii")}
+            })
+
+    async def _send_mark(self, text: Optional[str] = None) -> None:
+        """
+        Mark the end of the audio sent so far
+
+        Twilio echoes the mark back once the audio before it has been played,
+        at which point `text` counts as heard by the caller.
+        """
+        self.mark_count += 1
+        name = f"turn-{self.conv_manager.turn}-{self.mark_count}"
+        self.unplayed[name] = text
+        await self.websocket.send_json({
+            "event": "mark",
+            "streamSid": self.stream_sid,
+            "mark": {"name": name}
+        })
+
+    async def _send_clear(self) -> None:
+        # Drop audio Twilio has buffered but not played yet
+        await self.websocket.send_json({
+            "event": "clear",
+            "streamSid": self.stream_sid
+        })
@@ -0,0 +1,26 @@
+"""
+Fixed phrases spoken on calls
+
+Phrases in AGENT_PHRASES are spoken in the agent's voice and pre-rendered
+into the TTS cache whenever an agent is saved.
+"""
+
+# Spoken before an agent is known (default voice)
+NO_AGENT_CONFIGURED = "Entschuldigung, kein Agent ist für diese Nummer konfiguriert."
+AGENT_NOT_FOUND = "Entschuldigung, der Agent konnte nicht gefunden werden."
+
+# Spoken in the agent's voice
+NOT_UNDERSTOOD = "Entschuldigung, ich habe Sie nicht verstanden. Können Sie das wiederholen?"
+TECHNICAL_PROBLEM = "Entschuldigung, es gab ein technisches Problem."
+HOLDING = "Einen Moment bitte, ich kümmere mich darum."
+TURN_TIMEOUT = "Entschuldigung, das dauert gerade leider zu lange. Können Sie Ihre Frage bitte wiederholen?"
+
+# Fillers played in the streaming pipeline while a response is delayed
+FILLER = "Einen Moment bitte…"
+TOOL_FILLERS = {
+    "api_call": "Einen Moment bitte, ich schaue das kurz nach.",
+    "get_weather": "Einen Moment bitte, ich schaue das kurz nach.",
+    "transfer_call": "Einen Moment bitte, ich verbinde Sie.",
+}
+
+AGENT_PHRASES = [NOT_UNDERSTOOD, TECHNICAL_PROBLEM, HOLDING, TURN_TIMEOUT, FILLER, *dict.fromkeys(TOOL_FILLERS.values())]
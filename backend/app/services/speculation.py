@@ -0,0 +1,186 @@
+"""
+Speculative LLM generation on partial speech results
+
+While the caller is still speaking, Twilio posts partial transcripts to the
+<Gather> partialResultCallback. Once the stable part is long enough, the
+first LLM completion for it is started in the background and its events are
+buffered. When the final transcript arrives with the same words (at most
+followed by hesitation sounds), the turn is committed with the buffered
+events instead of a fresh request; otherwise the speculation is discarded.
+Nothing is written to the history, the call state or the database until
+the turn is committed, and tools only run then.
+
+Speculations live in the process that received the partial results, so with
+several webhook workers a final result handled elsewhere simply falls back
+to a normal request.
+"""
+from typing import Dict, List, Optional, AsyncIterator
+import asyncio
+import logging
+import re
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.deadline import deadline_after, time_left
+from app.services.conversation_manager import load_conversation_manager
+from app.services.llm_events import LLMEvent
+from app.services.llm_service import llm_service
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Hesitation sounds that may trail the transcript a speculation was made for
+FILLER_WORDS = {"äh", "ähm", "öh", "öhm", "hm", "hmm", "mhm", "uh", "uhm", "um"}
+
+
+def normalize_transcript(text: str) -> List[str]:
+    """Lowercase words of a transcript, without punctuation"""
+    return WORD_PATTERN.findall(text.lower())
+
+
+def transcripts_match(speculated: str, final: str) -> bool:
+    """
+    Whether a response to `speculated` also answers `final`
+
+    The words must be the same apart from case and punctuation; the final
+    transcript may only add trailing hesitation sounds. Any other change,
+    however small (e.g. a "nicht"), can change the meaning.
+    """
+    speculated_words = normalize_transcript(speculated)
+    final_words = normalize_transcript(final)
+    if final_words[:len(speculated_words)] != speculated_words:
+        return False
+    return all(word in FILLER_WORDS for word in final_words[len(speculated_words):])
+
+
+class SpeculativeTurn:
+    """First LLM completion for a partial transcript, buffered until committed"""
+
+    def __init__(self, call_sid: str, user_input: str):
+        self.call_sid = call_sid
+        self.user_input = user_input
+        # Bounded like a turn, which it becomes the start of
+        self.deadline = deadline_after(settings.TURN_HARD_TIMEOUT_SECONDS)
+        self.base_version: Optional[int] = None
+        self.events: List[LLMEvent] = []
+        self.finished = False
+        self.error: Optional[Exception] = None
+        self.loaded = asyncio.Event()
+        self.updated = asyncio.Condition()
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                conv_manager, state = await load_conversation_manager(db, self.call_sid)
+            if not conv_manager:
+                raise ValueError(f"Unknown call {self.call_sid}")
+
+            self.base_version = state.version
+            self.loaded.set()
+            tools = conv_manager.tool_executor.get_tool_definitions_for_llm()
+            messages = conv_manager.history.prompt() + [{"role": "user", "content": self.user_input}]
+
+            async for event in llm_service.stream_events(
+                messages=messages,
+                tools=tools if tools else None,
+                deadline=self.deadline
+            ):
+                async with self.updated:
+                    self.events.append(event)
+                    self.updated.notify_all()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.loaded.set()
+            async with self.updated:
+                self.finished = True
+                self.updated.notify_all()
+
+    async def replay(self, deadline: Optional[float] = None) -> AsyncIterator[LLMEvent]:
+        """
+        Buffered events followed by the rest of the stream as it arrives
+
+        Raises:
+            asyncio.TimeoutError: If the turn's `deadline` (event loop time)
+                passes while waiting for an event
+        """
+        index = 0
+        while True:
+            async with self.updated:
+                await asyncio.wait_for(
+                    self.updated.wait_for(lambda: index < len(self.events) or self.finished),
+                    time_left(deadline)
+                )
+                events = self.events[index:]
+                finished = self.finished
+
+            for event in events:
+                yield event
+            index += len(events)
+
+            if finished and index >= len(self.events):
+                if self.error:
+                    raise self.error
+                return
+
+    def cancel(self) -> None:
+        self.task.cancel()
+
+
+class SpeculationManager:
+    """At most one speculative turn per call, restarted when the transcript changes"""
+
+    def __init__(self):
+        self.turns: Dict[str, SpeculativeTurn] = {}
+
+    def on_partial_result(self, call_sid: str, text: str) -> None:
+        """Start or restart speculation for a partial transcript"""
+        if len(normalize_transcript(text)) < settings.SPECULATIVE_MIN_WORDS:
+            return
+
+        current = self.turns.get(call_sid)
+        if current and transcripts_match(current.user_input, text):
+            return
+
+        if current:
+            current.cancel()
+        self.turns[call_sid] = SpeculativeTurn(call_sid, text)
+
+    async def take(self, call_sid: str, user_input: str, state_version: int) -> Optional[SpeculativeTurn]:
+        """
+        Claim the speculation for the final transcript of a turn
+
+        Returns:
+            The speculative turn if it was made for matching text on the
+            current call state, otherwise None (the speculation is cancelled)
+        """
+        turn = self.turns.pop(call_sid, None)
+        if turn is None:
+            return None
+
+        # The call state is loaded right away, so this is normally already done
+        await turn.loaded.wait()
+
+        if (
+            turn.error is None
+            and turn.base_version == state_version
+            and transcripts_match(turn.user_input, user_input)
+        ):
+            logger.info(f"Committing speculative response for call {call_sid}")
+            return turn
+
+        turn.cancel()
+        return None
+
+    def discard(self, call_sid: str) -> None:
+        turn = self.turns.pop(call_sid, None)
+        if turn:
+            turn.cancel()
+
+
+# Singleton instance
+speculation_manager = SpeculationManager()
@@ -0,0 +1,35 @@
+from openai import AsyncAzureOpenAI
+from app.core.config import settings
+from app.services.audio_utils import ulaw_to_wav
+
+
+class SpeechToTextService:
+    def __init__(self):
+        self.client = AsyncAzureOpenAI(
+            api_key=settings.AZURE_OPENAI_KEY,
+            api_version=settings.AZURE_OPENAI_API_VERSION,
+            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT
+        )
+        self.deployment = settings.AZURE_OPENAI_WHISPER_DEPLOYMENT
+
+    async def transcribe_ulaw(self, audio: bytes, language: str = "de") -> str:
+        """
+        Transcribe 8 kHz μ-law audio (as received from Twilio media streams)
+
+        Args:
+            audio: Raw μ-law bytes of one utterance
+            language: ISO-639-1 language code of the caller
+
+        Returns:
+            Transcribed text
+        """
+        transcription = await self.client.audio.transcriptions.create(
+            model=self.deployment,
+            file=("utterance.wav", ulaw_to_wav(audio), "audio/wav"),
+            language=language
+        )
+        return transcription.text.strip()
+
+
+# Singleton instance
+stt_service = SpeechToTextService()
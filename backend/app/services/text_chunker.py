@@ -0,0 +1,54 @@
+import re
+from typing import List
+
+# Sentence end: terminal punctuation (optionally followed by closing quotes/brackets) and whitespace
+SENTENCE_END = re.compile(r'[.!?…]+["\')\]»“]*\s')
+# Clause end: used to cut long sentences early
+CLAUSE_END = re.compile(r'[,;:–—]\s')
+
+
+class SentenceChunker:
+    """
+    Split a stream of LLM text deltas into sentence or clause sized chunks
+
+    Chunks are emitted as soon as they are complete, so speech synthesis can
+    start while the rest of the reply is still being generated.
+    """
+
+    def __init__(self, min_chars: int = 10, max_clause_chars: int = 80):
+        self.min_chars = min_chars
+        self.max_clause_chars = max_clause_chars
+        self.buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """Add a text delta and return the chunks completed by it"""
+        self.buffer += delta
+        chunks = []
+
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            chunk, self.buffer = self.buffer[:cut].strip(), self.buffer[cut:]
+            if chunk:
+                chunks.append(chunk)
+
+        return chunks
+
+    def flush(self) -> List[str]:
+        """Return whatever text is left at the end of the stream"""
+        chunk, self.buffer = self.buffer.strip(), ""
+        return [chunk] if chunk else []
+
+    def _find_cut(self):
+        for match in SENTENCE_END.finditer(self.buffer):
+            if match.end() >= self.min_chars:
+                return match.end()
+
+        # Long sentence without an end in sight: cut at the last clause boundary
+        if len(self.buffer) >= self.max_clause_chars:
+            cuts = [m.end() for m in CLAUSE_END.finditer(self.buffer) if m.end() >= self.min_chars]
+            if cuts:
+                return cuts[-1]
+
+        return None
@@ -0,0 +1,133 @@
+from typing import Dict, Any, Optional, Callable, Awaitable
+import asyncio
+import hashlib
+import json
+import logging
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.core.ttl_cache import TTLCache
+from app.services.tool_registry import ToolResult
+
+logger = logging.getLogger(__name__)
+
+# Tools with side effects, never cached
+UNCACHEABLE_TOOLS = {"transfer_call", "end_call"}
+
+
+def normalize_arguments(value: Any) -> Any:
+    """Arguments in a canonical form: trimmed strings, HTTP methods upper-cased"""
+    if isinstance(value, dict):
+        normalized = {key: normalize_arguments(item) for key, item in value.items()}
+        if isinstance(normalized.get("method"), str):
+            normalized["method"] = normalized["method"].upper()
+        return normalized
+    if isinstance(value, list):
+        return [normalize_arguments(item) for item in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def is_cacheable(tool_config: Dict[str, Any], arguments: Dict[str, Any]) -> bool:
+    """Whether a tool call may be served from the cache"""
+    if tool_config["name"] in UNCACHEABLE_TOOLS or not tool_config.get("cache_ttl"):
+        return False
+    # Only idempotent API calls
+    if tool_config["name"] == "api_call":
+        return str(arguments.get("method", "GET")).upper() == "GET"
+    return True
+
+
+class ToolResultCache:
+    """
+    Cache of tool results keyed by (agent, tool, normalized arguments)
+
+    Results live in an in-process TTL LRU in front of Redis, so identical
+    calls from concurrent conversations on any worker share one result for
+    the tool's cache_ttl. Concurrent identical calls in one process share a
+    single execution.
+    """
+
+    def __init__(self, redis: Redis, max_entries: int, key_prefix: str = "tool_cache:"):
+        self.redis = redis
+        self.key_prefix = key_prefix
+        self.memory = TTLCache(max_entries)
+        self.in_flight: Dict[str, asyncio.Task] = {}
+
+    def cache_key(self, agent_id: Optional[int], tool_config: Dict[str, Any], arguments: Dict[str, Any]) -> str:
+        # The tool config is part of the key, so editing a tool invalidates its results
+        data = json.dumps(
+            [tool_config, normalize_arguments(arguments)],
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+        digest = hashlib.sha256(data.encode("utf-8")).hexdigest()
+        return f"{self.key_prefix}{agent_id}:{tool_config['name']}:{digest}"
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look up a result in memory, then in Redis"""
+        result = self.memory.get(key)
+        if result is not None:
+            return result
+
+        try:
+            result, ttl = await asyncio.gather(self.redis.get(key), self.redis.pttl(key))
+        except Exception as e:
+            logger.warning(f"Tool cache lookup failed: {str(e)}")
+            return None
+
+        if result is not None and ttl > 0:
+            self.memory.set(key, result, ttl / 1000)
+        return result
+
+    async def set(self, key: str, result: str, ttl: int) -> None:
+        self.memory.set(key, result, ttl)
+        try:
+            await self.redis.set(key, result, ex=ttl)
+        except Exception as e:
+            logger.warning(f"Tool cache write failed: {str(e)}")
+
+    async def get_or_execute(
+        self,
+        key: str,
+        ttl: int,
+        execute: Callable[[], Awaitable[ToolResult]]
+    ) -> ToolResult:
+        """
+        Cached result for a key, executing the tool only on a miss
+
+        The execution runs as its own task, so a caller that is cancelled
+        (e.g. by a barge-in) does not cancel it for the others waiting on it.
+        Only successful results are cached.
+        """
+        result = await self.get(key)
+        if result is not None:
+            return ToolResult(result)
+
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._execute_and_store(key, ttl, execute))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self._on_done(key, done))
+
+        return await asyncio.shield(task)
+
+    async def _execute_and_store(self, key: str, ttl: int, execute: Callable[[], Awaitable[ToolResult]]) -> ToolResult:
+        result = await execute()
+        if result.ok:
+            await self.set(key, result.content, ttl)
+        return result
+
+    def _on_done(self, key: str, task: asyncio.Task) -> None:
+        self.in_flight.pop(key, None)
+        if not task.cancelled():
+            # Mark as retrieved in case every caller was cancelled
+            task.exception()
+
+
+# Singleton instance
+tool_cache = ToolResultCache(redis_client, max_entries=settings.TOOL_CACHE_MAX_ENTRIES)
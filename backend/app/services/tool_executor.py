@@ -1,130 +1,190 @@
-import httpx
+import asyncio
 import json
-from typing import Dict, Any, List
-from app.services.twilio_service import twilio_service
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.circuit_breaker import RedisCircuitBreaker
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.redis import redis_client
+from app.services.tool_cache import tool_cache, is_cacheable
+from app.services.tool_registry import (
+    CompiledTool, ToolContext, ToolResult, ToolArgumentsError, ToolUnavailableError, registry_cache
+)
+# Registers the built-in tool types
+from app.services import tool_handlers  # noqa: F401
+
+
+logger = logging.getLogger(__name__)
+
+
+def tool_failure(error: str, tool_name: str, message: str, **details: Any) -> ToolResult:
+    """Structured tool failure for the LLM"""
+    content = "Error: " + json.dumps(
+        {"error": error, "tool": tool_name, "message": message, **details},
+        ensure_ascii=False
+    )
+    return ToolResult(content, ok=False)
+
+
+class ToolSemaphores:
+    """
+    Semaphores limiting concurrent executions per agent and tool
+
+    Keyed by the limit as well, so editing a tool's max_concurrency takes
+    effect on the next call. The least recently used semaphores are dropped
+    beyond max_entries; callers still holding one finish normally.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self.semaphores: "OrderedDict[Tuple[Optional[int], str, int], asyncio.Semaphore]" = OrderedDict()
+
+    def get(self, agent_id: Optional[int], tool_name: str, limit: int) -> asyncio.Semaphore:
+        key = (agent_id, tool_name, limit)
+        semaphore = self.semaphores.get(key)
+        if semaphore is not None:
+            self.semaphores.move_to_end(key)
+            return semaphore
+
+        semaphore = self.semaphores[key] = asyncio.Semaphore(limit)
+        while len(self.semaphores) > self.max_entries:
+            self.semaphores.popitem(last=False)
+        return semaphore
+
+
+# Singleton instance
+tool_semaphores = ToolSemaphores()
 
 
 class ToolExecutor:
     """Execute tools defined by agents"""
 
-    def __init__(self, tools_config: List[Dict[str, Any]], call_sid: str = None):
+    def __init__(self, tools_config: List[Dict[str, Any]], call_sid: str = None, agent_id: int = None):
         self.tools_config = tools_config or []
         self.call_sid = call_sid
+        self.agent_id = agent_id
+        # Compiled once per agent version and shared by all its calls
+        self.registry = registry_cache.get(agent_id, self.tools_config)
+        self.context = ToolContext(call_sid=call_sid, agent_id=agent_id)
 
     def get_tool_definitions_for_llm(self) -> List[Dict[str, Any]]:
         """
-        Convert agent's tool config to OpenAI function calling format
+        Agent's tools in OpenAI function calling format
         """
-        if not self.tools_config:
-            return []
-
-        llm_tools = []
-        for tool in self.tools_config:
-            llm_tools.append({
-                "type": "function",
-                "function": {
-                    "name": tool["name"],
-                    "description": tool["description"],
-                    "parameters": tool["parameters"]
-                }
-            })
-
-        return llm_tools
-
-    async def execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+        return list(self.registry.definitions)
+
+    async def execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> ToolResult:
         """
         Execute a tool and return the result
 
+        Arguments are validated against the tool's parameters schema before
+        anything is executed.
+
         Args:
             tool_name: Name of the tool to execute
             arguments: Arguments for the tool
 
         Returns:
-            String result of tool execution
+            Result text for the LLM and whether the tool succeeded
         """
-        # Find tool in config
-        tool_config = None
-        for tool in self.tools_config:
-            if tool["name"] == tool_name:
-                tool_config = tool
-                break
-
-        if not tool_config:
-            return f"Error: Tool '{tool_name}' not found"
-
-        # Execute based on tool name
-        if tool_name == "transfer_call":
-            return await self._transfer_call(arguments)
-        elif tool_name == "end_call":
-            return await self._end_call()
-        elif tool_name == "api_call":
-            return await self._api_call(arguments)
-        elif tool_name == "get_weather":
-            return await self._get_weather(arguments)
-        else:
-            return f"Error: Tool '{tool_name}' execution not implemented"
-
-    async def _transfer_call(self, arguments: Dict[str, Any]) -> str:
-        """Transfer the call to another number"""
-        phone_number = arguments.get("phone_number")
-
-        if not phone_number:
-            return "Error: phone_number required"
-
-        if not self.call_sid:
-            return "Error: No active call to transfer"
+        tool = self.registry.get(tool_name)
+        if tool is None:
+            return ToolResult(f"Error: Tool '{tool_name}' not found", ok=False)
 
-        try:
-            twilio_service.transfer_call(self.call_sid, phone_number)
-            return f"Call transferred to {phone_number}"
-        except Exception as e:
-            return f"Error transferring call: {str(e)}"
+        if tool.handler is None:
+            return ToolResult(f"Error: Tool '{tool_name}' execution not implemented", ok=False)
 
-    async def _end_call(self) -> str:
-        """End the current call"""
-        if not self.call_sid:
-            return "Error: No active call"
+        try:
+            tool.validate(arguments)
+        except ToolArgumentsError as e:
+            metrics.increment("tool_calls", tool=tool_name, outcome="invalid")
+            return tool_failure("invalid_arguments", tool_name, str(e))
+
+        # Idempotent tools with a cache_ttl share results across calls
+        if is_cacheable(tool.config, arguments):
+            return await tool_cache.get_or_execute(
+                tool_cache.cache_key(self.agent_id, tool.config, arguments),
+                tool.config["cache_ttl"],
+                lambda: self._execute_guarded(tool, arguments)
+            )
+
+        return await self._execute_guarded(tool, arguments)
+
+    def _breaker(self, tool: CompiledTool, arguments: Dict[str, Any]) -> RedisCircuitBreaker:
+        """Shared circuit breaker of a tool (per host for api_call)"""
+        scope = f"{self.agent_id}:{tool.name}"
+        handler_scope = tool.handler.breaker_scope(arguments)
+        if handler_scope:
+            scope += f":{handler_scope}"
+
+        policy = tool.config.get("circuit_breaker") or {}
+        return RedisCircuitBreaker(
+            redis_client,
+            f"tool_breaker:{scope}",
+            failure_threshold=policy.get("failure_threshold", settings.TOOL_BREAKER_FAILURE_THRESHOLD),
+            recovery_timeout=policy.get("recovery_seconds", settings.TOOL_BREAKER_RECOVERY_SECONDS)
+        )
+
+    def _semaphore(self, tool_name: str, tool_config: Dict[str, Any]) -> asyncio.Semaphore:
+        limit = tool_config.get("max_concurrency") or settings.TOOL_DEFAULT_MAX_CONCURRENCY
+        return tool_semaphores.get(self.agent_id, tool_name, limit)
+
+    async def _execute_guarded(self, tool: CompiledTool, arguments: Dict[str, Any]) -> ToolResult:
+        """
+        Execute a tool under its timeout, concurrency limit and circuit breaker
 
+        Failures of the service behind the tool and timeouts count against the
+        breaker. While it is open the tool fails immediately.
+        """
+        tool_name = tool.name
+        breaker = self._breaker(tool, arguments)
         try:
-            twilio_service.end_call(self.call_sid)
-            return "Call ended"
+            allowed = await breaker.allow_request()
         except Exception as e:
-            return f"Error ending call: {str(e)}"
-
-    async def _api_call(self, arguments: Dict[str, Any]) -> str:
-        """Make an HTTP API call"""
-        url = arguments.get("url")
-        method = arguments.get("method", "GET").upper()
-        headers = arguments.get("headers", {})
-        body = arguments.get("body")
-
-        if not url:
-            return "Error: url required"
-
+            # Without Redis the tool runs unprotected rather than not at all
+            logger.warning(f"Circuit breaker unavailable for {tool_name}: {str(e)}")
+            allowed = True
+        state = breaker.state
+
+        if not allowed:
+            metrics.increment("tool_calls", tool=tool_name, outcome="rejected")
+            return tool_failure(
+                "circuit_open",
+                tool_name,
+                "The service is temporarily unavailable. Tell the caller and do not retry now.",
+                retry_after_seconds=max(1, round(breaker.retry_after()))
+            )
+
+        timeout = tool.config.get("timeout_seconds") or settings.TOOL_DEFAULT_TIMEOUT_SECONDS
+        started = time.monotonic()
+        outcome = "ok"
         try:
-            async with httpx.AsyncClient() as client:
-                if method == "GET":
-                    response = await client.get(url, headers=headers)
-                elif method == "POST":
-                    response = await client.post(url, headers=headers, json=body)
-                elif method == "PUT":
-                    response = await client.put(url, headers=headers, json=body)
-                elif method == "DELETE":
-                    response = await client.delete(url, headers=headers)
-                else:
-                    return f"Error: Unsupported HTTP method {method}"
-
-                return f"API call successful. Status: {response.status_code}. Response: {response.text[:200]}"
+            async with asyncio.timeout(timeout):
+                async with self._semaphore(tool_name, tool.config):
+                    result = await tool.handler.execute(self.context, arguments, tool.config)
+            if isinstance(result, str):
+                result = ToolResult(result)
+        except TimeoutError:
+            outcome = "timeout"
+            result = tool_failure("timeout", tool_name, f"The tool did not respond within {timeout:g} seconds.")
+        except ToolUnavailableError as e:
+            outcome = "error"
+            result = ToolResult(str(e), ok=False)
+        finally:
+            metrics.observe("tool_latency_ms", (time.monotonic() - started) * 1000, tool=tool_name)
+
+        metrics.increment("tool_calls", tool=tool_name, outcome=outcome)
+        try:
+            if outcome == "ok":
+                await breaker.record_success()
+            else:
+                await breaker.record_failure()
+            # Labelled by tool only: breaker keys hold agent ids and LLM-supplied hosts
+            if breaker.state != state:
+                metrics.increment("tool_breaker_transitions", tool=tool_name, state=breaker.state)
         except Exception as e:
-            return f"Error making API call: {str(e)}"
-
-    async def _get_weather(self, arguments: Dict[str, Any]) -> str:
-        """Get weather for a location (example tool)"""
-        location = arguments.get("location")
-
-        if not location:
-            return "Error: location required"
+            logger.warning(f"Failed to update circuit breaker for {tool_name}: {str(e)}")
 
-        # This is a mock implementation
-        # In production, you'd call a real weather API
-        return f"Das Wetter in {location} ist sonnig mit 22°C."
+        return result
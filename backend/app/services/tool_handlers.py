@@ -0,0 +1,212 @@
+"""
+Built-in tool types
+
+Plugins add their own the same way: subclass ToolHandler and pass an
+instance to register_tool_handler().
+"""
+from typing import Dict, Any, Optional, Union
+from urllib.parse import urlsplit
+import json
+
+from app.core.config import settings
+from app.services.json_extract import extract, JSONPathError
+from app.services.tool_http_client import tool_http_client
+from app.services.tool_registry import ToolHandler, ToolContext, ToolResult, ToolUnavailableError, register_tool_handler
+from app.services.twilio_service import twilio_service
+
+
+class TransferCallHandler(ToolHandler):
+    name = "transfer_call"
+    description = "Transfer the call to another phone number"
+    parameters = {
+        "type": "object",
+        "properties": {
+            "phone_number": {
+                "type": "string",
+                "description": "The phone number to transfer to"
+            }
+        },
+        "required": ["phone_number"]
+    }
+
+    async def execute(
+        self,
+        context: ToolContext,
+        arguments: Dict[str, Any],
+        tool_config: Dict[str, Any]
+    ) -> Union[str, ToolResult]:
+        """Transfer the call to another number"""
+        phone_number = arguments.get("phone_number")
+
+        if not phone_number:
+            return ToolResult("Error: phone_number required", ok=False)
+
+        if not context.call_sid:
+            return ToolResult("Error: No active call to transfer", ok=False)
+
+        try:
+            await twilio_service.transfer_call(context.call_sid, phone_number)
+            return f"Call transferred to {phone_number}"
+        except Exception as e:
+            raise ToolUnavailableError(f"Error transferring call: {str(e)}")
+
+
+class EndCallHandler(ToolHandler):
+    name = "end_call"
+    description = "End the current call"
+    parameters = {
+        "type": "object",
+        "properties": {}
+    }
+
+    async def execute(
+        self,
+        context: ToolContext,
+        arguments: Dict[str, Any],
+        tool_config: Dict[str, Any]
+    ) -> Union[str, ToolResult]:
+        """End the current call"""
+        if not context.call_sid:
+            return ToolResult("Error: No active call", ok=False)
+
+        try:
+            await twilio_service.end_call(context.call_sid)
+            return "Call ended"
+        except Exception as e:
+            raise ToolUnavailableError(f"Error ending call: {str(e)}")
+
+
+class ApiCallHandler(ToolHandler):
+    name = "api_call"
+    description = "Make an HTTP API call"
+    parameters = {
+        "type": "object",
+        "properties": {
+            "url": {
+                "type": "string",
+                "description": "The URL to call"
+            },
+            "method": {
+                "type": "string",
+                "enum": ["GET", "POST", "PUT", "DELETE"],
+                "description": "HTTP method"
+            },
+            "headers": {
+                "type": "object",
+                "description": "HTTP headers"
+            },
+            "body": {
+                "type": "object",
+                "description": "Request body for POST/PUT"
+            }
+        },
+        "required": ["url", "method"]
+    }
+
+    def breaker_scope(self, arguments: Dict[str, Any]) -> Optional[str]:
+        # One breaker per API host
+        if arguments.get("url"):
+            return urlsplit(str(arguments["url"])).netloc.lower()
+        return None
+
+    async def execute(
+        self,
+        context: ToolContext,
+        arguments: Dict[str, Any],
+        tool_config: Dict[str, Any]
+    ) -> Union[str, ToolResult]:
+        """
+        Make an HTTP API call
+
+        The response body is read up to the tool's max_response_bytes. For
+        JSON responses, response_path and response_fields in the tool config
+        select the part that is passed back to the LLM.
+        """
+        url = arguments.get("url")
+        method = arguments.get("method", "GET").upper()
+        headers = arguments.get("headers", {})
+        body = arguments.get("body")
+
+        if not url:
+            return ToolResult("Error: url required", ok=False)
+
+        if method not in ["GET", "POST", "PUT", "DELETE"]:
+            return ToolResult(f"Error: Unsupported HTTP method {method}", ok=False)
+
+        try:
+            response = await tool_http_client.request(
+                method,
+                url,
+                headers=headers,
+                json=body if method in ["POST", "PUT"] else None,
+                max_bytes=tool_config.get("max_response_bytes") or settings.TOOL_HTTP_MAX_RESPONSE_BYTES
+            )
+        except Exception as e:
+            raise ToolUnavailableError(f"Error making API call: {str(e)}")
+
+        # Server errors and throttling count against the API's circuit breaker
+        if response.status_code >= 500 or response.status_code == 429:
+            raise ToolUnavailableError(
+                f"Error: API call failed. Status: {response.status_code}. Response: {self._response_text(response, tool_config)}"
+            )
+
+        # Client errors are reported to the LLM but never cached
+        if response.status_code >= 400:
+            return ToolResult(
+                f"Error: API call failed. Status: {response.status_code}. Response: {self._response_text(response, tool_config)}",
+                ok=False
+            )
+
+        return f"API call successful. Status: {response.status_code}. Response: {self._response_text(response, tool_config)}"
+
+    @staticmethod
+    def _response_text(response, tool_config: Dict[str, Any]) -> str:
+        """Response body for the LLM: the configured JSON extract if possible, else the raw text"""
+        text = response.text
+        path = tool_config.get("response_path")
+        fields = tool_config.get("response_fields")
+
+        if (path or fields) and response.is_json and not response.truncated:
+            try:
+                extracted = extract(json.loads(text), path=path, fields=fields)
+                text = json.dumps(extracted, ensure_ascii=False, separators=(",", ":"))
+            except (ValueError, JSONPathError):
+                # Fall back to the raw body
+                pass
+
+        return text[:settings.TOOL_RESPONSE_MAX_CHARS]
+
+
+class GetWeatherHandler(ToolHandler):
+    name = "get_weather"
+    description = "Get current weather for a location (example tool)"
+    parameters = {
+        "type": "object",
+        "properties": {
+            "location": {
+                "type": "string",
+                "description": "City name or location"
+            }
+        },
+        "required": ["location"]
+    }
+
+    async def execute(
+        self,
+        context: ToolContext,
+        arguments: Dict[str, Any],
+        tool_config: Dict[str, Any]
+    ) -> Union[str, ToolResult]:
+        """Get weather for a location (example tool)"""
+        location = arguments.get("location")
+
+        if not location:
+            return ToolResult("Error: location required", ok=False)
+
+        # This is a mock implementation
+        # In production, you'd call a real weather API
+        return f"Das Wetter in {location} ist sonnig mit 22°C."
+
+
+for handler in (TransferCallHandler(), EndCallHandler(), ApiCallHandler(), GetWeatherHandler()):
+    register_tool_handler(handler)
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any
+from urllib.parse import urlsplit
+import asyncio
+
+import httpx
+
+from app.core.config import settings
+
+
+@dataclass
+class ToolHTTPResponse:
+    status_code: int
+    content_type: str
+    body: bytes
+    # The body was cut off at the byte cap
+    truncated: bool
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    @property
+    def is_json(self) -> bool:
+        return "json" in self.content_type
+
+
+class ToolHTTPClient:
+    """
+    Process-wide HTTP client for tool API calls
+
+    One keep-alive connection pool (optionally HTTP/2) is shared by all
+    calls, with a limit on concurrent requests per host. Response bodies are
+    streamed and only read up to a byte cap.
+
+    Hosts come from LLM-supplied URLs, so only the `max_hosts` most recently
+    used keep their semaphore; requests still holding one finish normally.
+    """
+
+    def __init__(self, max_hosts: int = 1000):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.max_hosts = max_hosts
+        self.host_semaphores: "OrderedDict[str, asyncio.Semaphore]" = OrderedDict()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared keep-alive HTTP client (created on first use)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=settings.TOOL_HTTP2_ENABLED,
+                timeout=httpx.Timeout(settings.TOOL_HTTP_TIMEOUT_SECONDS, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=settings.TOOL_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.TOOL_HTTP_MAX_CONNECTIONS,
+                    keepalive_expiry=60
+                )
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        semaphore = self.host_semaphores.get(host)
+        if semaphore is not None:
+            self.host_semaphores.move_to_end(host)
+            return semaphore
+
+        semaphore = self.host_semaphores[host] = asyncio.Semaphore(settings.TOOL_HTTP_MAX_CONNECTIONS_PER_HOST)
+        while len(self.host_semaphores) > self.max_hosts:
+            self.host_semaphores.popitem(last=False)
+        return semaphore
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        json: Optional[Any] = None,
+        max_bytes: int = settings.TOOL_HTTP_MAX_RESPONSE_BYTES
+    ) -> ToolHTTPResponse:
+        """Send a request and read at most max_bytes of the response body"""
+        async with self._host_semaphore(url):
+            async with self.client.stream(method, url, headers=headers, json=json) as response:
+                body = bytearray()
+                truncated = False
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    # A body of exactly max_bytes is complete
+                    if len(body) > max_bytes:
+                        truncated = True
+                        del body[max_bytes:]
+                        break
+
+                return ToolHTTPResponse(
+                    status_code=response.status_code,
+                    content_type=response.headers.get("content-type", ""),
+                    body=bytes(body),
+                    truncated=truncated
+                )
+
+
+# Singleton instance
+tool_http_client = ToolHTTPClient()
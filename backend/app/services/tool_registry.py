@@ -0,0 +1,196 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple, Union
+import hashlib
+import importlib
+import json
+import logging
+import threading
+
+from jsonschema import Draft7Validator
+from jsonschema.exceptions import SchemaError, best_match
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ToolArgumentsError(ValueError):
+    """Raised for tool arguments that do not match the tool's parameters schema"""
+
+
+class ToolUnavailableError(Exception):
+    """Failure of the service behind a tool, counted by its circuit breaker"""
+
+
+class ToolContext:
+    """What a handler knows about the call it runs in"""
+
+    def __init__(self, call_sid: Optional[str] = None, agent_id: Optional[int] = None):
+        self.call_sid = call_sid
+        self.agent_id = agent_id
+
+
+@dataclass(frozen=True)
+class ToolResult:
+    """Result of a tool call: the text for the LLM and whether the tool succeeded"""
+    content: str
+    ok: bool = True
+
+
+class ToolHandler:
+    """
+    Base class of tool types
+
+    Subclasses implement execute() and are registered with
+    register_tool_handler(). description and parameters are the template
+    offered when configuring an agent.
+
+    execute() returns the result text on success, or a ToolResult with
+    ok=False for failures the LLM should see; failures of the service
+    behind the tool are raised as ToolUnavailableError.
+    """
+
+    name: str = ""
+    description: str = ""
+    parameters: Dict[str, Any] = {"type": "object", "properties": {}}
+
+    async def execute(
+        self,
+        context: ToolContext,
+        arguments: Dict[str, Any],
+        tool_config: Dict[str, Any]
+    ) -> Union[str, ToolResult]:
+        raise NotImplementedError
+
+    def breaker_scope(self, arguments: Dict[str, Any]) -> Optional[str]:
+        """Extra circuit breaker scope for these arguments (e.g. the API host)"""
+        return None
+
+
+# Tool types by name
+_handlers: Dict[str, ToolHandler] = {}
+
+
+def register_tool_handler(handler: ToolHandler) -> ToolHandler:
+    """Register a tool type, replacing any handler of the same name"""
+    if not handler.name:
+        raise ValueError("Tool handler needs a name")
+    _handlers[handler.name] = handler
+    # Compiled registries may have been built without this handler
+    registry_cache.clear()
+    return handler
+
+
+def get_tool_handler(name: str) -> Optional[ToolHandler]:
+    return _handlers.get(name)
+
+
+def available_tool_handlers() -> List[ToolHandler]:
+    return list(_handlers.values())
+
+
+def load_tool_plugins() -> None:
+    """Import the modules in TOOL_PLUGIN_MODULES, which register their handlers on import"""
+    for module in filter(None, (name.strip() for name in settings.TOOL_PLUGIN_MODULES.split(","))):
+        importlib.import_module(module)
+        logger.info(f"Loaded tool plugin {module}")
+
+
+def _format_error(error) -> str:
+    location = ".".join(str(part) for part in error.absolute_path)
+    return f"{location}: {error.message}" if location else error.message
+
+
+@dataclass(frozen=True)
+class CompiledTool:
+    name: str
+    config: Dict[str, Any]
+    handler: Optional[ToolHandler]
+    validator: Optional[Draft7Validator]
+
+    def validate(self, arguments: Dict[str, Any]) -> None:
+        if self.validator is None:
+            return
+        error = best_match(self.validator.iter_errors(arguments))
+        if error is not None:
+            raise ToolArgumentsError(_format_error(error))
+
+
+class ToolRegistry:
+    """
+    Tools of one agent version, compiled once
+
+    Holds the tool definitions for the LLM, the handler of each tool and a
+    validator compiled from its parameters schema.
+    """
+
+    def __init__(self, tools_config: List[Dict[str, Any]]):
+        tools: Dict[str, CompiledTool] = {}
+        definitions = []
+
+        for tool in tools_config or []:
+            handler = get_tool_handler(tool["name"])
+            if handler is None:
+                logger.warning(f"No handler registered for tool '{tool['name']}'")
+
+            try:
+                Draft7Validator.check_schema(tool["parameters"])
+                validator = Draft7Validator(tool["parameters"])
+            except SchemaError as e:
+                logger.warning(f"Invalid parameters schema for tool '{tool['name']}': {e.message}")
+                validator = None
+
+            tools[tool["name"]] = CompiledTool(tool["name"], tool, handler, validator)
+            if handler is not None:
+                definitions.append({
+                    "type": "function",
+                    "function": {
+                        "name": tool["name"],
+                        "description": tool["description"],
+                        "parameters": tool["parameters"]
+                    }
+                })
+
+        self.tools = tools
+        self.definitions: Tuple[Dict[str, Any], ...] = tuple(definitions)
+
+    def get(self, name: str) -> Optional[CompiledTool]:
+        return self.tools.get(name)
+
+
+class ToolRegistryCache:
+    """Compiled registries by agent and tools_config digest (an edit yields a new entry)"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self.registries: "OrderedDict[Tuple[Optional[int], str], ToolRegistry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def version(tools_config: Optional[List[Dict[str, Any]]]) -> str:
+        data = json.dumps(tools_config or [], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, agent_id: Optional[int], tools_config: Optional[List[Dict[str, Any]]]) -> ToolRegistry:
+        key = (agent_id, self.version(tools_config))
+        with self._lock:
+            registry = self.registries.get(key)
+            if registry is not None:
+                self.registries.move_to_end(key)
+                return registry
+
+        registry = ToolRegistry(tools_config)
+        with self._lock:
+            self.registries[key] = registry
+            while len(self.registries) > self.max_entries:
+                self.registries.popitem(last=False)
+        return registry
+
+    def clear(self) -> None:
+        with self._lock:
+            self.registries.clear()
+
+
+# Singleton instance
+registry_cache = ToolRegistryCache()
@@ -0,0 +1,248 @@
+from collections import OrderedDict
+from typing import Optional, Dict, List, Tuple
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.services import phrases
+from app.services.elevenlabs_service import elevenlabs_service, DEFAULT_MODEL
+
+logger = logging.getLogger(__name__)
+
+# File extension and media type per ElevenLabs output format family
+AUDIO_TYPES = {
+    "mp3": ("mp3", "audio/mpeg"),
+    "ulaw": ("ulaw", "audio/basic"),
+    "pcm": ("pcm", "audio/L16"),
+}
+
+CACHE_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def audio_type(output_format: str) -> Tuple[str, str]:
+    """File extension and media type for an ElevenLabs output format"""
+    return AUDIO_TYPES[output_format.split("_", 1)[0]]
+
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesized speech
+
+    Audio is keyed by (text, voice_id, model, output_format) and kept in an
+    in-memory LRU tier backed by files on disk, so fixed phrases are only
+    synthesized once and can be served to Twilio <Play> as static files.
+
+    Replies generated during a call contain what the caller talked about, so
+    they are never written to disk: they are kept in Redis for a few minutes,
+    just long enough for Twilio to fetch them.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_memory_bytes: int,
+        redis: Redis,
+        reply_ttl_seconds: int,
+        reply_key_prefix: str = "tts_reply:"
+    ):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.redis = redis
+        self.reply_ttl_seconds = reply_ttl_seconds
+        self.reply_key_prefix = reply_key_prefix
+        self.memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.memory_bytes = 0
+        self.in_flight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def cache_key(text: str, voice_id: str, model: str, output_format: str) -> str:
+        data = json.dumps([text, voice_id, model, output_format], ensure_ascii=False)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def path(self, key: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{extension}")
+
+    def get_memory(self, key: str) -> Optional[bytes]:
+        audio = self.memory.get(key)
+        if audio is not None:
+            self.memory.move_to_end(key)
+        return audio
+
+    def _put_memory(self, key: str, audio: bytes) -> None:
+        if len(audio) > self.max_memory_bytes:
+            return
+
+        if key in self.memory:
+            self.memory_bytes -= len(self.memory.pop(key))
+        self.memory[key] = audio
+        self.memory_bytes += len(audio)
+
+        while self.memory_bytes > self.max_memory_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def _read_file(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+        except FileNotFoundError:
+            return None
+
+        # Keep frequently used files from being expired by the worker
+        os.utime(path)
+        return audio
+
+    def _write_file(self, path: str, audio: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+
+    async def get(self, key: str, extension: str) -> Optional[bytes]:
+        """Look up cached audio in memory, then on disk"""
+        audio = self.get_memory(key)
+        if audio is not None:
+            return audio
+
+        audio = await asyncio.to_thread(self._read_file, self.path(key, extension))
+        if audio is not None:
+            self._put_memory(key, audio)
+        return audio
+
+    async def get_reply(self, key: str) -> Optional[bytes]:
+        """Look up the audio of a call reply (see synthesize with persist=False)"""
+        data = await self.redis.get(f"{self.reply_key_prefix}{key}")
+        if data is None:
+            return None
+        return base64.b64decode(data)
+
+    async def _put_reply(self, key: str, audio: bytes) -> None:
+        await self.redis.set(
+            f"{self.reply_key_prefix}{key}",
+            base64.b64encode(audio).decode("ascii"),
+            ex=self.reply_ttl_seconds
+        )
+
+    async def synthesize(
+        self,
+        text: str,
+        voice_id: Optional[str] = None,
+        model: str = DEFAULT_MODEL,
+        output_format: str = "mp3_44100_128",
+        persist: bool = True
+    ) -> Tuple[str, bytes]:
+        """
+        Get audio for a text, synthesizing it only if it is not cached yet
+
+        Concurrent requests for the same audio share one synthesis.
+
+        Args:
+            persist: Keep the audio in memory and on disk; False for call
+                replies, which are only kept in Redis for TTS_REPLY_TTL_SECONDS
+
+        Returns:
+            Tuple of (cache key, audio bytes)
+        """
+        voice_id = voice_id or elevenlabs_service.default_voice_id
+        key = self.cache_key(text, voice_id, model, output_format)
+        extension, _ = audio_type(output_format)
+
+        audio = await self.get(key, extension)
+        if audio is None and not persist:
+            audio = await self.get_reply(key)
+        if audio is not None:
+            return key, audio
+
+        # Replies and persisted audio are stored differently, so they do not share a synthesis
+        flight_key = key if persist else f"reply:{key}"
+        if flight_key in self.in_flight:
+            return key, await asyncio.shield(self.in_flight[flight_key])
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[flight_key] = future
+        try:
+            audio = await elevenlabs_service.text_to_speech(
+                text=text,
+                voice_id=voice_id,
+                model=model,
+                output_format=output_format
+            )
+            if persist:
+                await asyncio.to_thread(self._write_file, self.path(key, extension), audio)
+                self._put_memory(key, audio)
+            else:
+                await self._put_reply(key, audio)
+            future.set_result(audio)
+            return key, audio
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark as retrieved, waiters re-raise it themselves
+            future.exception()
+            raise
+        finally:
+            del self.in_flight[flight_key]
+
+    async def get_audio(self, text: str, voice_id: Optional[str] = None, **kwargs) -> bytes:
+        """Cached audio for a text"""
+        _, audio = await self.synthesize(text, voice_id, **kwargs)
+        return audio
+
+    async def prerender(self, texts: List[str], voice_id: Optional[str] = None, **kwargs) -> None:
+        """Warm the cache for fixed phrases (errors are logged, not raised)"""
+        for text in texts:
+            try:
+                await self.synthesize(text, voice_id, **kwargs)
+            except Exception as e:
+                logger.error(f"Failed to pre-render TTS audio: {str(e)}")
+
+    async def prerender_agent(self, voice_id: Optional[str], greeting_message: str) -> None:
+        """Pre-render the greeting and fixed phrases of an agent in every format used on calls"""
+        output_formats = ["mp3_44100_128"]
+        if settings.TWILIO_MEDIA_STREAMS_ENABLED:
+            output_formats.append("ulaw_8000")
+
+        for output_format in output_formats:
+            await self.prerender(
+                [greeting_message, *phrases.AGENT_PHRASES],
+                voice_id,
+                output_format=output_format
+            )
+
+    def cleanup(self, max_age_days: int) -> int:
+        """Delete cached files not used for max_age_days, returns the number deleted"""
+        cutoff = time.time() - max_age_days * 24 * 60 * 60
+        deleted = 0
+
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        deleted += 1
+                except FileNotFoundError:
+                    pass
+
+        return deleted
+
+
+# Singleton instance
+tts_cache = TTSCache(
+    settings.TTS_CACHE_DIR,
+    settings.TTS_CACHE_MEMORY_BYTES,
+    redis_client,
+    settings.TTS_REPLY_TTL_SECONDS
+)
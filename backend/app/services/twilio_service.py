@@ -1,36 +1,121 @@
-from twilio.rest import Client
-from twilio.twiml.voice_response import VoiceResponse, Gather, Say
+from twilio.twiml.voice_response import VoiceResponse, Gather, Say, Connect
 from app.core.config import settings
-from typing import Optional
+from typing import Optional, Dict, Any
+import asyncio
+import httpx
+
+
+class TwilioAPIError(Exception):
+    """Raised when the Twilio REST API returns an error"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
 
 
 class TwilioService:
     def __init__(self):
-        self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+        self.account_sid = settings.TWILIO_ACCOUNT_SID
+        self.auth_token = settings.TWILIO_AUTH_TOKEN
         self.phone_number = settings.TWILIO_PHONE_NUMBER
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared keep-alive HTTP client for the Twilio REST API (created on first use)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=settings.TWILIO_API_BASE_URL,
+                auth=(self.account_sid, self.auth_token),
+                timeout=httpx.Timeout(settings.TWILIO_REQUEST_TIMEOUT_SECONDS, connect=3.0),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, path: str, data: Dict[str, str], idempotent: bool = True) -> Dict[str, Any]:
+        """
+        POST to the Twilio REST API with retries and exponential backoff
+
+        Throttling (429) and connection failures are always retried. Server
+        errors and timeouts are only retried for idempotent requests, since
+        Twilio may already have acted on them.
+        """
+        url = f"/2010-04-01/Accounts/{self.account_sid}{path}"
+        attempt = 0
+
+        while True:
+            retry_after = None
+            try:
+                response = await self.client.post(url, data=data)
+
+                if response.status_code < 400:
+                    return response.json()
+
+                retryable = response.status_code == 429 or (idempotent and response.status_code >= 500)
+                if not retryable or attempt >= settings.TWILIO_MAX_RETRIES:
+                    raise TwilioAPIError(
+                        f"Twilio returned {response.status_code}: {response.text[:200]}",
+                        status_code=response.status_code
+                    )
+                retry_after = response.headers.get("Retry-After")
+
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                if attempt >= settings.TWILIO_MAX_RETRIES:
+                    raise TwilioAPIError(f"Could not reach Twilio: {str(e)}")
+            except httpx.TransportError as e:
+                if not idempotent or attempt >= settings.TWILIO_MAX_RETRIES:
+                    raise TwilioAPIError(f"Twilio request failed: {str(e)}")
+
+            delay = settings.TWILIO_RETRY_BACKOFF_SECONDS * (2 ** attempt)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            attempt += 1
+            await asyncio.sleep(delay)
 
-    def create_call(self, to_number: str, callback_url: str) -> str:
+    async def create_call(self, to_number: str, callback_url: str) -> str:
         """Initiate an outbound call"""
-        call = self.client.calls.create(
-            to=to_number,
-            from_=self.phone_number,
-            url=callback_url,
-            method='POST'
+        call = await self._request(
+            "/Calls.json",
+            {
+                "To": to_number,
+                "From": self.phone_number,
+                "Url": callback_url,
+                "Method": "POST",
+            },
+            idempotent=False
         )
-        return call.sid
+        return call["sid"]
 
-    def transfer_call(self, call_sid: str, to_number: str) -> None:
+    async def transfer_call(self, call_sid: str, to_number: str) -> None:
         """Transfer an active call to another number"""
-        call = self.client.calls(call_sid).update(
-            twiml=f'<Response><Dial>{to_number}</Dial></Response>'
-        )
+        response = VoiceResponse()
+        response.dial(to_number)
+        await self._request(f"/Calls/{call_sid}.json", {"Twiml": str(response)})
 
-    def end_call(self, call_sid: str) -> None:
+    async def end_call(self, call_sid: str) -> None:
         """End an active call"""
-        self.client.calls(call_sid).update(status='completed')
+        await self._request(f"/Calls/{call_sid}.json", {"Status": "completed"})
+
+    def create_twiml_response(
+        self,
+        message: str,
+        gather: bool = True,
+        audio_url: Optional[str] = None,
+        partial_result_callback: Optional[str] = None
+    ) -> str:
+        """
+        Create TwiML response for Twilio webhook
 
-    def create_twiml_response(self, message: str, gather: bool = True) -> str:
-        """Create TwiML response for Twilio webhook"""
+        If audio_url is given, the pre-synthesized audio is played with <Play>
+        instead of reading the message with Twilio's <Say> voice. If
+        partial_result_callback is given, Twilio posts interim transcripts
+        there while the caller is speaking.
+        """
         response = VoiceResponse()
 
         if gather:
@@ -41,29 +126,51 @@ class TwilioService:
                 method='POST',
                 language='de-DE',
                 speech_timeout='auto',
-                timeout=5
+                timeout=5,
+                partial_result_callback=partial_result_callback,
+                partial_result_callback_method='POST' if partial_result_callback else None
             )
-            gather_obj.say(message, language='de-DE')
+            if audio_url:
+                gather_obj.play(audio_url)
+            else:
+                gather_obj.say(message, language='de-DE')
             response.append(gather_obj)
+        elif audio_url:
+            response.play(audio_url)
         else:
             response.say(message, language='de-DE')
 
         return str(response)
 
     def create_stream_response(self, websocket_url: str) -> str:
-        """Create TwiML response with media stream for real-time audio"""
+        """
+        Create TwiML response connecting the call to a bidirectional media stream
+
+        <Connect><Stream> (unlike <Start><Stream>) lets the server send audio
+        back on the same WebSocket.
+        """
         response = VoiceResponse()
-        response.say("Verbinde...")
 
-        # Start media stream
-        start = response.start()
-        stream = start.stream(
-            url=websocket_url,
-            track='both_tracks'
-        )
+        connect = Connect()
+        connect.stream(url=websocket_url)
+        response.append(connect)
+
+        return str(response)
+
+    def create_holding_response(self, message: str, redirect_url: str, audio_url: Optional[str] = None) -> str:
+        """
+        Create TwiML response playing a holding phrase, then fetching new TwiML from redirect_url
+
+        Used while a turn that exceeded its latency budget finishes in the
+        background.
+        """
+        response = VoiceResponse()
 
-        # Keep call alive
-        response.pause(length=60)
+        if audio_url:
+            response.play(audio_url)
+        else:
+            response.say(message, language='de-DE')
+        response.redirect(redirect_url, method='POST')
 
         return str(response)
 
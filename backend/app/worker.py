@@ -1,6 +1,6 @@
 """
-Background worker for scheduled tasks
-Handles data retention, anonymization, and cleanup
+Background worker for scheduled tasks and queued jobs
+Handles data retention, anonymization, cleanup and end-of-call processing
 """
 import asyncio
 from datetime import datetime, timedelta
@@ -13,6 +13,8 @@ from app.core.config import settings
 from app.models.call_log import CallLog
 from app.models.message import Message
 from app.models.conversation import Conversation
+from app.services.job_queue import job_queue
+from app.services.call_finalizer import JOB_HANDLERS
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -126,6 +128,16 @@ async def process_deletion_requests():
                 await db.commit()
 
 
+async def cleanup_tts_cache():
+    """Delete cached TTS audio that has not been used for a while"""
+    logger.info("Running cleanup of TTS audio cache...")
+
+    from app.services.tts_cache import tts_cache
+
+    deleted_count = await asyncio.to_thread(tts_cache.cleanup, settings.TTS_CACHE_DISK_TTL_DAYS)
+    logger.info(f"Deleted {deleted_count} cached TTS files")
+
+
 async def run_scheduled_tasks():
     """Run all scheduled tasks in a loop"""
     logger.info("Worker started")
@@ -136,6 +148,7 @@ async def run_scheduled_tasks():
             await cleanup_old_recordings()
             await anonymize_old_messages()
             await process_deletion_requests()
+            await cleanup_tts_cache()
 
             # Sleep for 1 hour
             logger.info("Sleeping for 1 hour...")
@@ -146,5 +159,13 @@ async def run_scheduled_tasks():
             await asyncio.sleep(300)  # Sleep 5 minutes on error
 
 
+async def run_worker():
+    """Run scheduled tasks and consume the job queue side by side"""
+    await asyncio.gather(
+        run_scheduled_tasks(),
+        job_queue.run_worker(JOB_HANDLERS),
+    )
+
+
 if __name__ == "__main__":
-    asyncio.run(run_scheduled_tasks())
+    asyncio.run(run_worker())
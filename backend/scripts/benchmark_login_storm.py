@@ -0,0 +1,114 @@
+"""
+Webhook latency during a login storm, with bcrypt on the event loop vs. on
+the password hashing pool
+
+Runs in process against a minimal ASGI app that serves a login endpoint
+(hashing inline or through password_hasher) next to a webhook-like endpoint.
+While N concurrent logins are sent, the webhook is probed every few
+milliseconds and its latency percentiles are reported for both modes.
+
+Usage (from backend/, with the usual environment configured):
+    python -m scripts.benchmark_login_storm --logins 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from app.core.security import PasswordHasher, get_password_hash, verify_password
+from app.core.config import settings
+
+PASSWORD = "benchmark-password"
+
+
+def create_app(hasher: PasswordHasher, hashed_password: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/login/inline")
+    async def login_inline():
+        # Before: bcrypt blocks the event loop
+        if not verify_password(PASSWORD, hashed_password):
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    @app.post("/login/pooled")
+    async def login_pooled():
+        # After: bcrypt runs on the bounded pool
+        if not await hasher.verify(PASSWORD, hashed_password):
+            raise HTTPException(status_code=401)
+        return {"ok": True}
+
+    @app.post("/webhook")
+    async def webhook():
+        # Stands in for a Twilio webhook: a little async work and a TwiML reply
+        await asyncio.sleep(0)
+        return {"twiml": "<Response/>"}
+
+    return app
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_storm(client: httpx.AsyncClient, path: str, logins: int, concurrency: int, probe_interval: float):
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses = {}
+    done = asyncio.Event()
+
+    async def login():
+        async with semaphore:
+            response = await client.post(path)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async def probe():
+        latencies = []
+        while not done.is_set():
+            started = time.perf_counter()
+            await client.post("/webhook")
+            latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(probe_interval)
+        return latencies
+
+    prober = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    duration = time.perf_counter() - started
+    done.set()
+    return await prober, statuses, duration
+
+
+async def main(args):
+    hashed_password = get_password_hash(PASSWORD)
+    hasher = PasswordHasher(max_workers=args.workers, max_queue=args.queue)
+    app = create_app(hasher, hashed_password)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        print(f"{args.logins} logins, concurrency {args.concurrency}, pool {args.workers} workers + {args.queue} queued")
+        print(f"{'mode':<8} {'probes':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'storm s':>8}  login statuses")
+        for mode in ("inline", "pooled"):
+            latencies, statuses, duration = await run_storm(
+                client, f"/login/{mode}", args.logins, args.concurrency, args.probe_interval_ms / 1000
+            )
+            print(
+                f"{mode:<8} {len(latencies):>6} {statistics.median(latencies):>8.1f} "
+                f"{percentile(latencies, 0.95):>8.1f} {percentile(latencies, 0.99):>8.1f} "
+                f"{max(latencies):>8.1f} {duration:>8.2f}  {dict(sorted(statuses.items()))}"
+            )
+
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS)
+    parser.add_argument("--queue", type=int, default=settings.PASSWORD_HASH_MAX_QUEUE)
+    parser.add_argument("--probe-interval-ms", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,60 @@
+import logging
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from app.core.config import settings
+from app.services import audit_log
+from app.services.audit_log import AuditLogger
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def redis():
+    redis = FakeAsyncRedis(decode_responses=True)
+    yield redis
+    await redis.aclose()
+
+
+@pytest.fixture(autouse=True)
+def database_down(monkeypatch):
+    def unavailable():
+        raise ConnectionRefusedError("Connection refused")
+
+    monkeypatch.setattr(audit_log, "AsyncSessionLocal", unavailable)
+
+
+def audit_logger(redis, mirror: bool) -> AuditLogger:
+    return AuditLogger(redis, max_queue=100, batch_size=2, flush_interval=1.0, close_timeout=0.05, mirror=mirror)
+
+
+async def test_close_leaves_unwritten_events_in_redis(redis, monkeypatch):
+    monkeypatch.setattr(settings, "INSTANCE_NAME", "backend")
+    logger = audit_logger(redis, mirror=True)
+    for user_id in range(3):
+        await logger.log(user_id, "login")
+
+    await logger.close()
+
+    assert logger.mirror_key == "audit_log:pending:backend"
+    assert await redis.hlen("audit_log:pending:backend") == 3
+
+    # Re-queued by the next start
+    restarted = audit_logger(redis, mirror=True)
+    await restarted.start()
+    assert restarted.queue.qsize() == 3
+    await restarted.close()
+
+
+async def test_close_logs_unwritten_events_without_mirror(redis, caplog):
+    logger = audit_logger(redis, mirror=False)
+    for user_id in range(3):
+        await logger.log(user_id, "login")
+
+    with caplog.at_level(logging.ERROR, logger=audit_log.__name__):
+        await logger.close()
+
+    unwritten = [record for record in caplog.records if record.getMessage().startswith("Unwritten audit event")]
+    assert len(unwritten) == 3
+    assert logger.queue.empty()
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from fakeredis import FakeAsyncRedis
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.auth_cache import auth_cache
+from app.core.database import Base
+from app.core.security import create_access_token, get_current_user
+from app.core.ttl_cache import TTLCache
+from app.models import User
+
+pytestmark = pytest.mark.anyio
+
+CREDENTIALS = HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token({"sub": "1"}))
+
+
+@pytest.fixture
+async def sessions(monkeypatch):
+    redis = FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(auth_cache, "redis", redis)
+    monkeypatch.setattr(auth_cache, "users", TTLCache(100))
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with sessions() as db:
+            db.add(User(id=1, email="kunde@example.de", hashed_password="x", data_processing_consent=True))
+            await db.commit()
+
+        yield sessions
+    finally:
+        await engine.dispose()
+    await redis.aclose()
+
+
+async def load_during(sessions, change) -> None:
+    """Load the user in get_current_user while `change` commits, after the row was read"""
+    loaded, release = asyncio.Event(), asyncio.Event()
+
+    async with sessions() as db:
+        execute = db.execute
+
+        async def slow_execute(*args, **kwargs):
+            result = await execute(*args, **kwargs)
+            loaded.set()
+            await release.wait()
+            return result
+
+        db.execute = slow_execute
+        request = asyncio.create_task(get_current_user(CREDENTIALS, db))
+        await loaded.wait()
+
+        async with sessions() as other:
+            await change(other, await other.get(User, 1))
+            await other.commit()
+        # Let the invalidation reach Redis
+        await asyncio.sleep(0.01)
+
+        release.set()
+        await request
+
+
+async def test_deleted_user_is_not_cached_again(sessions):
+    async def delete(db, user):
+        await db.delete(user)
+
+    await load_during(sessions, delete)
+
+    assert await auth_cache.get_user(1) is None
+    async with sessions() as db:
+        with pytest.raises(HTTPException) as error:
+            await get_current_user(CREDENTIALS, db)
+    assert error.value.status_code == 401
+
+
+async def test_consent_change_is_not_overwritten(sessions):
+    async def withdraw_consent(db, user):
+        user.data_processing_consent = False
+
+    await load_during(sessions, withdraw_consent)
+
+    assert await auth_cache.get_user(1) is None
+    async with sessions() as db:
+        user = await get_current_user(CREDENTIALS, db)
+    assert user.data_processing_consent is False
+    assert (await auth_cache.get_user(1)).data_processing_consent is False
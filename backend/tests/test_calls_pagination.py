@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+from typing import List
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base, get_read_db
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.security import get_current_user
+from app.main import app
+from app.models import Agent, Conversation, Message, User
+from app.schemas.user import CurrentUser
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2026, 1, 1, 9, 0)
+
+
+@pytest.fixture
+async def sessions():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    finally:
+        await engine.dispose()
+
+
+@pytest.fixture
+async def client(sessions):
+    async with sessions() as db:
+        for user_id in (1, 2):
+            db.add(User(id=user_id, email=f"kunde{user_id}@example.de", hashed_password="x"))
+            db.add(Agent(id=user_id, user_id=user_id, name="Praxis", system_prompt="s", greeting_message="g"))
+        for i in range(25):
+            # Pairs share a start time, so pages must break ties by id
+            db.add(Conversation(
+                id=i + 1,
+                user_id=1,
+                agent_id=1,
+                caller_phone_number="+4930111111",
+                direction="inbound" if i % 3 else "outbound",
+                status="completed",
+                start_time=START + timedelta(minutes=i // 2)
+            ))
+        db.add(Conversation(
+            id=100,
+            user_id=2,
+            agent_id=2,
+            caller_phone_number="+4930222222",
+            direction="inbound",
+            status="completed",
+            start_time=START
+        ))
+        for i in range(7):
+            db.add(Message(conversation_id=1, role="user", content=f"Nachricht {i}", timestamp=START))
+        await db.commit()
+
+    async def read_db():
+        async with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_read_db] = read_db
+    app.dependency_overrides[get_current_user] = lambda: CurrentUser(
+        id=1,
+        email="kunde1@example.de",
+        created_at=START,
+        data_processing_consent=True,
+        terms_accepted=True,
+        privacy_policy_accepted=True
+    )
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+async def all_pages(client: httpx.AsyncClient, url: str, **params) -> List[dict]:
+    rows, cursor = [], None
+    while True:
+        response = await client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        rows += response.json()
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return rows
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(START, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (START, 42)
+
+
+@pytest.mark.parametrize("cursor", ["zz!", "", "W10", encode_cursor(START, 1)[:-2]])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+async def test_conversation_pages_cover_every_row_once(client):
+    conversations = await all_pages(client, "/api/v1/calls/conversations", limit=10)
+
+    ids = [conversation["id"] for conversation in conversations]
+    assert sorted(ids) == list(range(1, 26))
+    # Newest first, ties by id
+    assert ids[:4] == [25, 24, 23, 22]
+
+
+async def test_conversation_pages_keep_filters(client):
+    conversations = await all_pages(
+        client,
+        "/api/v1/calls/conversations",
+        limit=2,
+        direction="outbound",
+        start_from=(START + timedelta(minutes=3)).isoformat()
+    )
+
+    assert [conversation["id"] for conversation in conversations] == [25, 22, 19, 16, 13, 10, 7]
+
+
+async def test_last_page_has_no_cursor(client):
+    response = await client.get("/api/v1/calls/conversations", params={"limit": 25})
+
+    assert len(response.json()) == 25
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+async def test_bad_cursor_is_a_client_error(client):
+    response = await client.get("/api/v1/calls/conversations", params={"cursor": "zz!"})
+
+    assert response.status_code == 400
+
+
+async def test_message_pages_are_in_order(client):
+    messages = await all_pages(client, "/api/v1/calls/conversations/1/messages", limit=3)
+
+    assert [message["content"] for message in messages] == [f"Nachricht {i}" for i in range(7)]
+
+
+async def test_other_users_conversations_are_not_paged(client):
+    assert (await client.get("/api/v1/calls/conversations/100/messages")).status_code == 404
@@ -0,0 +1,82 @@
+from typing import List
+
+import pytest
+
+from app.services.conversation_history import ConversationHistory
+from app.services.llm_service import llm_service
+
+pytestmark = pytest.mark.anyio
+
+
+def turns(count: int) -> List[dict]:
+    messages = []
+    for i in range(count):
+        messages.append({"role": "user", "content": f"Frage {i} " * 20})
+        messages.append({"role": "assistant", "content": f"Antwort {i} " * 20})
+    return messages
+
+
+def history_over_budget() -> ConversationHistory:
+    history = ConversationHistory("Du bist ein Assistent.", max_tokens=200, keep_turns=2)
+    for message in turns(6):
+        history.append(message)
+    return history
+
+
+async def test_compaction_folds_old_turns_into_summary(monkeypatch):
+    async def summarize_history(previous_summary, messages):
+        return f"{len(messages)} Nachrichten"
+
+    monkeypatch.setattr(llm_service, "summarize_history", summarize_history)
+    history = history_over_budget()
+
+    await history.start_compaction()
+    history.apply_compaction()
+
+    assert history.summary.endswith("Nachrichten")
+    assert len(history.messages) < 13
+    assert history.messages[1]["role"] == "user"
+
+
+async def test_failed_summary_keeps_history(monkeypatch):
+    async def summarize_history(previous_summary, messages):
+        raise RuntimeError("summary backend unavailable")
+
+    monkeypatch.setattr(llm_service, "summarize_history", summarize_history)
+    history = history_over_budget()
+    history.summary = "Bisher"
+    messages = list(history.messages)
+
+    await history.start_compaction()
+    history.apply_compaction()
+
+    assert history.messages == messages
+    assert history.summary == "Bisher"
+    assert history.compaction is None
+
+
+async def test_summary_includes_tool_results(monkeypatch):
+    prompts = []
+
+    async def chat_completion(messages, **kwargs):
+        prompts.append(messages)
+        yield "Zusammenfassung"
+
+    monkeypatch.setattr(llm_service, "chat_completion", chat_completion)
+
+    summary = await llm_service.summarize_history(None, [
+        {"role": "user", "content": "Bitte buchen Sie einen Termin."},
+        {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{"id": "call_1", "type": "function", "function": {"name": "book", "arguments": "{}"}}]
+        },
+        {"role": "tool", "tool_call_id": "call_1", "content": "Buchungsnummer 4711" + "x" * 1000},
+        {"role": "assistant", "content": "Ihr Termin ist gebucht."},
+    ])
+
+    transcript = prompts[0][1]["content"]
+    assert summary == "Zusammenfassung"
+    assert "TOOL (book): Buchungsnummer 4711" in transcript
+    assert "x" * 501 not in transcript
+    assert "ASSISTANT: Ihr Termin ist gebucht." in transcript
@@ -0,0 +1,148 @@
+import asyncio
+import inspect
+import json
+from typing import Callable, Dict, List
+
+import pytest
+from fakeredis import FakeAsyncRedis
+from redis.exceptions import ConnectionError
+
+from app.core.config import settings
+from app.services.job_queue import JobQueue
+
+pytestmark = pytest.mark.anyio
+
+
+class FlakyRedis(FakeAsyncRedis):
+    """Fake Redis whose next `failures` BLMOVE calls lose the connection"""
+
+    failures = 0
+
+    async def blmove(self, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Connection reset by peer")
+        return await super().blmove(*args, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(settings, "JOB_POLL_ERROR_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 3)
+
+
+@pytest.fixture
+async def redis():
+    redis = FlakyRedis(decode_responses=True)
+    yield redis
+    await redis.aclose()
+
+
+async def run_until(queue: JobQueue, handlers: Dict, done: Callable[[], bool], consumer: str = "test") -> None:
+    """Run a worker until `done()` holds, then stop it"""
+    async def check() -> bool:
+        result = done()
+        return bool(await result if inspect.isawaitable(result) else result)
+
+    worker = asyncio.create_task(queue.run_worker(handlers, concurrency=2, consumer=consumer))
+    try:
+        for _ in range(300):
+            if await check():
+                break
+            await asyncio.sleep(0.01)
+        assert await check()
+    finally:
+        worker.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await worker
+
+
+async def test_runs_job(redis):
+    queue = JobQueue(redis)
+    payloads: List[dict] = []
+
+    async def handle(payload):
+        payloads.append(payload)
+
+    await queue.enqueue("finalize_call", {"call_sid": "CA123"})
+    await run_until(queue, {"finalize_call": handle}, lambda: payloads)
+
+    assert payloads == [{"call_sid": "CA123"}]
+    assert await redis.llen("jobs:processing:test") == 0
+
+
+async def test_redis_error_does_not_stop_worker(redis):
+    redis.failures = 1
+    queue = JobQueue(redis)
+    payloads: List[dict] = []
+
+    async def handle(payload):
+        payloads.append(payload)
+
+    await queue.enqueue("finalize_call", {"call_sid": "CA123"})
+    await run_until(queue, {"finalize_call": handle}, lambda: payloads)
+
+    assert redis.failures == 0
+    assert payloads == [{"call_sid": "CA123"}]
+
+
+async def test_failed_job_is_retried(redis):
+    queue = JobQueue(redis)
+    attempts: List[dict] = []
+
+    async def handle(payload):
+        attempts.append(payload)
+        if len(attempts) == 1:
+            raise RuntimeError("database unavailable")
+
+    await queue.enqueue("finalize_call", {"call_sid": "CA123"})
+    await run_until(queue, {"finalize_call": handle}, lambda: len(attempts) == 2)
+
+    assert await redis.zcard("jobs:delayed") == 0
+    assert await redis.llen("jobs:dead") == 0
+
+
+async def test_job_is_dead_lettered_after_max_attempts(redis):
+    queue = JobQueue(redis)
+    attempts: List[dict] = []
+
+    async def handle(payload):
+        attempts.append(payload)
+        raise RuntimeError("database unavailable")
+
+    await queue.enqueue("finalize_call", {"call_sid": "CA123"})
+    await run_until(queue, {"finalize_call": handle}, lambda: redis.llen("jobs:dead"))
+
+    dead = [json.loads(raw_job) for raw_job in await redis.lrange("jobs:dead", 0, -1)]
+    assert len(dead) == 1
+    assert dead[0]["attempts"] == settings.JOB_MAX_ATTEMPTS
+    assert dead[0]["last_error"] == "database unavailable"
+    assert await redis.zcard("jobs:delayed") == 0
+
+
+async def test_unknown_job_type_is_dead_lettered_at_once(redis):
+    queue = JobQueue(redis)
+
+    await queue.enqueue("unknown", {})
+    await run_until(queue, {}, lambda: redis.llen("jobs:dead"))
+
+    assert await redis.llen("jobs:dead") == 1
+
+
+async def test_abandoned_jobs_are_resumed_by_consumer_name(redis, monkeypatch):
+    monkeypatch.setattr(settings, "INSTANCE_NAME", "worker")
+    queue = JobQueue(redis)
+    payloads: List[dict] = []
+
+    async def handle(payload):
+        payloads.append(payload)
+
+    # A worker with the same name stopped while running this job
+    await queue.enqueue("finalize_call", {"call_sid": "CA123"})
+    await redis.lmove("jobs:pending", "jobs:processing:worker", "RIGHT", "LEFT")
+
+    await run_until(queue, {"finalize_call": handle}, lambda: payloads, consumer=None)
+
+    assert payloads == [{"call_sid": "CA123"}]
+    assert await redis.llen("jobs:processing:worker") == 0
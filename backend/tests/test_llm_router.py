@@ -0,0 +1,337 @@
+import asyncio
+import json
+from typing import List
+
+import httpx
+import pytest
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.services.llm_events import TextDelta, ToolCallEnd, Finish
+from app.services.llm_router import (
+    LLMRouter, LLMBackend, LLMBackendConfig, LLMUnavailableError, load_backend_configs, TASK_CHAT, TASK_SUMMARY
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def sse(delta: dict, finish_reason=None) -> bytes:
+    chunk = {
+        "id": "chatcmpl-test",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "test",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n".encode()
+
+
+class FakeOpenAIServer:
+    """
+    Fake OpenAI-compatible chat completions endpoint
+
+    Streams `chunks` as server-sent events after `delay` seconds, or answers
+    every request with `status` if it is an error status.
+    """
+
+    def __init__(self, name: str, log: List[str], chunks=("Hallo", " Welt"), delay: float = 0.0, status: int = 200):
+        self.name = name
+        self.log = log
+        self.chunks = chunks
+        self.delay = delay
+        self.status = status
+        self.requests: List[dict] = []
+        self.cancelled = False
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.log.append(self.name)
+        self.requests.append(json.loads(request.content))
+        if self.status != 200:
+            return httpx.Response(self.status, json={"error": {"message": f"{self.name} failed"}})
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=self.stream())
+
+    async def stream(self):
+        try:
+            await asyncio.sleep(self.delay)
+            for text in self.chunks:
+                yield sse({"content": text})
+            yield sse({}, finish_reason="stop")
+            yield b"data: [DONE]\n\n"
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+    def backend(self, ttft_ms=None, tasks=(TASK_CHAT, TASK_SUMMARY)) -> LLMBackend:
+        backend = LLMBackend(
+            LLMBackendConfig(
+                name=self.name,
+                endpoint=f"http://{self.name}.test/v1",
+                api_key="test",
+                deployment=f"{self.name}-deployment",
+                provider="openai",
+                tasks=list(tasks),
+            ),
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        )
+        backend.ewma_ttft_ms = ttft_ms
+        return backend
+
+
+async def collect(router: LLMRouter, **kwargs) -> List:
+    return [event async for event in router.stream_events([{"role": "user", "content": "Hi"}], **kwargs)]
+
+
+def text(events) -> str:
+    return "".join(event.text for event in events if isinstance(event, TextDelta))
+
+
+@pytest.fixture
+def log() -> List[str]:
+    return []
+
+
+async def test_routes_to_fastest_backend(log):
+    slow = FakeOpenAIServer("slow", log)
+    fast = FakeOpenAIServer("fast", log)
+    router = LLMRouter([slow.backend(ttft_ms=800), fast.backend(ttft_ms=200)], hedge_after_ms=1000, explore_ratio=0)
+
+    events = await collect(router)
+
+    assert text(events) == "Hallo Welt"
+    assert isinstance(events[-1], Finish)
+    assert log == ["fast"]
+    assert fast.requests[0]["model"] == "fast-deployment"
+
+
+async def test_fails_over_before_first_token(log):
+    erroring = FakeOpenAIServer("erroring", log, status=500)
+    healthy = FakeOpenAIServer("healthy", log)
+    spare = FakeOpenAIServer("spare", log)
+    erroring_backend = erroring.backend(ttft_ms=100)
+    router = LLMRouter(
+        [spare.backend(ttft_ms=900), healthy.backend(ttft_ms=300), erroring_backend],
+        hedge_after_ms=1000,
+        explore_ratio=0
+    )
+
+    events = await collect(router)
+
+    assert text(events) == "Hallo Welt"
+    assert log == ["erroring", "healthy"]
+    assert erroring_backend.breaker.failures == 1
+    assert erroring_backend.breaker.state == CircuitBreaker.CLOSED
+
+
+async def test_hedges_late_first_token_and_cancels_loser(log):
+    slow = FakeOpenAIServer("slow", log, delay=5)
+    healthy = FakeOpenAIServer("healthy", log, chunks=("Schnell",), delay=0.02)
+    slow_backend = slow.backend(ttft_ms=50)
+    healthy_backend = healthy.backend(ttft_ms=100)
+    router = LLMRouter([slow_backend, healthy_backend], hedge_after_ms=50, explore_ratio=0)
+
+    events = await collect(router)
+    # Let the cancelled attempt unwind
+    await asyncio.sleep(0.05)
+
+    assert text(events) == "Schnell"
+    assert log == ["slow", "healthy"]
+    assert slow.cancelled
+    assert slow_backend.in_flight == 0 and healthy_backend.in_flight == 0
+    # The loser's wait counts as its time to first token, and it is not blamed
+    assert slow_backend.ewma_ttft_ms > 50
+    assert slow_backend.breaker.failures == 0
+    assert healthy_backend.breaker.failures == 0
+
+
+async def test_ttft_ewma_is_updated(log, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_EWMA_ALPHA", 0.5)
+    server = FakeOpenAIServer("server", log, delay=0.1)
+    backend = server.backend(ttft_ms=500)
+    router = LLMRouter([backend], hedge_after_ms=1000, explore_ratio=0)
+
+    await collect(router)
+
+    # Half the previous estimate plus half of the ~100 ms measured
+    assert 300 <= backend.ewma_ttft_ms < 400
+
+
+async def test_breaker_opens_and_skips_backend(log):
+    erroring = FakeOpenAIServer("erroring", log, status=429)
+    healthy = FakeOpenAIServer("healthy", log)
+    erroring_backend = erroring.backend(ttft_ms=100)
+    erroring_backend.breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+    router = LLMRouter([erroring_backend, healthy.backend(ttft_ms=300)], hedge_after_ms=1000, explore_ratio=0)
+
+    for _ in range(3):
+        assert text(await collect(router)) == "Hallo Welt"
+
+    assert erroring_backend.breaker.state == CircuitBreaker.OPEN
+    assert log == ["erroring", "healthy", "erroring", "healthy", "healthy"]
+
+
+async def test_cancelled_probe_is_released(log):
+    slow = FakeOpenAIServer("slow", log, delay=5)
+    healthy = FakeOpenAIServer("healthy", log)
+    slow_backend = slow.backend(ttft_ms=50)
+    slow_backend.breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+    slow_backend.breaker.record_failure()
+    assert slow_backend.breaker.state == CircuitBreaker.HALF_OPEN
+    router = LLMRouter([slow_backend, healthy.backend(ttft_ms=100)], hedge_after_ms=20, explore_ratio=0)
+
+    assert text(await collect(router)) == "Hallo Welt"
+    await asyncio.sleep(0.01)
+
+    assert slow.cancelled
+    assert not slow_backend.breaker.probe_in_flight
+    assert slow_backend.breaker.allow_request()
+
+
+async def test_probe_is_released_when_caller_stops_early(log):
+    server = FakeOpenAIServer("server", log)
+    backend = server.backend(ttft_ms=50)
+    backend.breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+    backend.breaker.record_failure()
+    router = LLMRouter([backend], hedge_after_ms=1000, explore_ratio=0)
+
+    stream = router.stream_events([{"role": "user", "content": "Hi"}])
+    assert isinstance(await anext(stream), TextDelta)
+    # The whole response is queued, so the attempt has already finished
+    await asyncio.sleep(0.01)
+    assert backend.breaker.probe_in_flight
+
+    # e.g. the caller barged in
+    await stream.aclose()
+
+    assert not backend.breaker.probe_in_flight
+    assert backend.breaker.allow_request()
+
+
+async def test_probe_is_released_when_deadline_passes(log):
+    server = FakeOpenAIServer("server", log)
+    backend = server.backend(ttft_ms=50)
+    backend.breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+    backend.breaker.record_failure()
+    router = LLMRouter([backend], hedge_after_ms=1000, explore_ratio=0)
+    deadline = asyncio.get_running_loop().time() + 0.05
+
+    with pytest.raises(asyncio.TimeoutError):
+        async for _ in router.stream_events([{"role": "user", "content": "Hi"}], deadline=deadline):
+            # The caller is slower than the deadline
+            await asyncio.sleep(0.1)
+
+    assert not backend.breaker.probe_in_flight
+
+
+async def test_losing_request_keeps_probe_of_another_request(log):
+    slow = FakeOpenAIServer("slow", log, delay=5)
+    healthy = FakeOpenAIServer("healthy", log)
+    slow_backend = slow.backend(ttft_ms=50)
+    router = LLMRouter([slow_backend, healthy.backend(ttft_ms=100)], hedge_after_ms=20, explore_ratio=0)
+
+    # The backend was closed when the request started, then another request claimed the probe
+    stream = router.stream_events([{"role": "user", "content": "Hi"}])
+    first = asyncio.ensure_future(anext(stream))
+    await asyncio.sleep(0.005)
+    slow_backend.breaker.probe_in_flight = True
+
+    await first
+    await stream.aclose()
+    await asyncio.sleep(0.01)
+
+    assert slow.cancelled
+    assert slow_backend.breaker.probe_in_flight
+
+
+async def test_raises_when_all_backends_fail(log):
+    first = FakeOpenAIServer("first", log, status=500)
+    second = FakeOpenAIServer("second", log, status=503)
+    router = LLMRouter([first.backend(ttft_ms=100), second.backend(ttft_ms=200)], hedge_after_ms=1000, explore_ratio=0)
+
+    with pytest.raises(LLMUnavailableError):
+        await collect(router)
+
+    assert log == ["first", "second"]
+
+
+async def test_routes_by_task(log):
+    chat = FakeOpenAIServer("chat", log)
+    summary = FakeOpenAIServer("summary", log)
+    router = LLMRouter(
+        [chat.backend(ttft_ms=100, tasks=[TASK_CHAT]), summary.backend(ttft_ms=900, tasks=[TASK_SUMMARY])],
+        hedge_after_ms=1000,
+        explore_ratio=0
+    )
+
+    await collect(router, task=TASK_SUMMARY)
+
+    assert log == ["summary"]
+
+
+async def test_assembles_tool_call_deltas(log):
+    server = FakeOpenAIServer("server", log)
+
+    async def stream():
+        yield sse({"tool_calls": [{"index": 0, "id": "call_1", "type": "function", "function": {"name": "get_weather", "arguments": ""}}]})
+        yield sse({"tool_calls": [{"index": 0, "function": {"arguments": '{"location":'}}]})
+        yield sse({"tool_calls": [{"index": 0, "function": {"arguments": ' "Berlin"}'}}]})
+        yield sse({}, finish_reason="tool_calls")
+        yield b"data: [DONE]\n\n"
+
+    server.stream = stream
+    router = LLMRouter([server.backend()], hedge_after_ms=1000, explore_ratio=0)
+
+    events = await collect(router)
+
+    tool_calls = [event for event in events if isinstance(event, ToolCallEnd)]
+    assert len(tool_calls) == 1
+    assert tool_calls[0].name == "get_weather"
+    assert tool_calls[0].parsed_arguments() == {"location": "Berlin"}
+    assert events[-1].reason == "tool_calls"
+
+
+def test_invalid_tool_call_arguments_raise():
+    with pytest.raises(ValueError, match="not valid JSON"):
+        ToolCallEnd(index=0, id="call_1", name="get_weather", arguments='{"location": "Berl').parsed_arguments()
+    with pytest.raises(ValueError, match="JSON object"):
+        ToolCallEnd(index=0, id="call_1", name="get_weather", arguments='["Berlin"]').parsed_arguments()
+    assert ToolCallEnd(index=0, id="call_1", name="end_call", arguments="").parsed_arguments() == {}
+
+
+async def test_deadline_bounds_the_stream(log):
+    slow = FakeOpenAIServer("slow", log, delay=5)
+    router = LLMRouter([slow.backend()], hedge_after_ms=1000, explore_ratio=0)
+    deadline = asyncio.get_running_loop().time() + 0.05
+
+    with pytest.raises(asyncio.TimeoutError):
+        await collect(router, deadline=deadline)
+    await asyncio.sleep(0.01)
+
+    assert slow.cancelled
+
+
+def test_load_backend_configs(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_BACKENDS", json.dumps([
+        {"name": "west", "endpoint": "https://west.test", "api_key": "a", "deployment": "gpt-4o"},
+        {"name": "local", "endpoint": "http://llm.test/v1", "api_key": "b", "deployment": "llama", "provider": "openai"},
+    ]))
+    monkeypatch.setattr(settings, "LLM_SUMMARY_DEPLOYMENT", "gpt-4o-mini")
+
+    configs = load_backend_configs()
+
+    assert [config.name for config in configs] == ["west", "local", "summary"]
+    assert configs[0].tasks == [TASK_CHAT] and configs[1].tasks == [TASK_CHAT]
+    assert configs[1].provider == "openai"
+    assert configs[2].deployment == "gpt-4o-mini" and configs[2].tasks == [TASK_SUMMARY]
+    assert configs[2].endpoint == settings.AZURE_OPENAI_ENDPOINT
+
+
+def test_load_backend_configs_defaults_to_azure_deployment(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_BACKENDS", "")
+    monkeypatch.setattr(settings, "LLM_SUMMARY_DEPLOYMENT", "")
+
+    configs = load_backend_configs()
+
+    assert len(configs) == 1
+    assert configs[0].deployment == settings.AZURE_OPENAI_DEPLOYMENT
+    assert configs[0].tasks == [TASK_CHAT, TASK_SUMMARY]
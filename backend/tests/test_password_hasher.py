@@ -0,0 +1,31 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.metrics import metrics
+from app.core.security import PasswordHasher
+
+pytestmark = pytest.mark.anyio
+
+
+def pending_gauge() -> float:
+    return metrics.snapshot()["gauges"]["password_hash_pending"]
+
+
+async def test_pending_gauge_follows_finished_hashes():
+    hasher = PasswordHasher(max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    running = asyncio.create_task(hasher._run(release.wait))
+    await asyncio.sleep(0.01)
+    assert pending_gauge() == 1
+    with pytest.raises(HTTPException) as error:
+        await hasher._run(release.wait)
+    assert error.value.status_code == 429
+
+    release.set()
+    await running
+    assert pending_gauge() == 0
+    hasher.shutdown()
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from typing import List
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from app.services.tool_cache import ToolResultCache, is_cacheable
+from app.services.tool_registry import ToolResult
+
+pytestmark = pytest.mark.anyio
+
+TOOL = {"name": "api_call", "cache_ttl": 60}
+
+
+class FakeTool:
+    """Tool counting its executions, each finishing when `release` is set"""
+
+    def __init__(self, result: ToolResult = ToolResult("Sonnig, 21 Grad")):
+        self.result = result
+        self.calls = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def execute(self) -> ToolResult:
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self.result
+
+
+@pytest.fixture
+async def redis():
+    redis = FakeAsyncRedis(decode_responses=True)
+    yield redis
+    await redis.aclose()
+
+
+@pytest.fixture
+def cache(redis) -> ToolResultCache:
+    return ToolResultCache(redis, max_entries=100)
+
+
+def key(cache: ToolResultCache, **arguments) -> str:
+    return cache.cache_key(1, TOOL, {"url": "https://api.test/weather", **arguments})
+
+
+async def test_concurrent_identical_calls_share_one_execution(cache):
+    tool = FakeTool()
+
+    callers = [asyncio.create_task(cache.get_or_execute(key(cache), 60, tool.execute)) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    tool.release.set()
+    results: List[ToolResult] = await asyncio.gather(*callers)
+
+    assert tool.calls == 1
+    assert {result.content for result in results} == {"Sonnig, 21 Grad"}
+    assert not cache.in_flight
+
+
+async def test_cancelled_caller_does_not_cancel_the_others(cache):
+    tool = FakeTool()
+    first = asyncio.create_task(cache.get_or_execute(key(cache), 60, tool.execute))
+    second = asyncio.create_task(cache.get_or_execute(key(cache), 60, tool.execute))
+    await asyncio.sleep(0.01)
+
+    # e.g. the first caller barged in
+    first.cancel()
+    await asyncio.sleep(0.01)
+    tool.release.set()
+
+    assert (await second).content == "Sonnig, 21 Grad"
+    assert first.cancelled()
+    assert not tool.cancelled
+    assert tool.calls == 1
+
+
+async def test_execution_finishes_when_every_caller_is_cancelled(cache, redis):
+    tool = FakeTool()
+    caller = asyncio.create_task(cache.get_or_execute(key(cache), 60, tool.execute))
+    await asyncio.sleep(0.01)
+
+    caller.cancel()
+    tool.release.set()
+    await asyncio.sleep(0.01)
+
+    assert not tool.cancelled
+    assert await redis.get(key(cache)) == "Sonnig, 21 Grad"
+
+
+async def test_failed_results_are_not_stored(cache, redis):
+    tool = FakeTool(ToolResult("Error: API call failed with status 404", ok=False))
+    tool.release.set()
+
+    first = await cache.get_or_execute(key(cache), 60, tool.execute)
+    second = await cache.get_or_execute(key(cache), 60, tool.execute)
+
+    assert not first.ok and not second.ok
+    assert tool.calls == 2
+    assert cache.memory.get(key(cache)) is None
+    assert await redis.get(key(cache)) is None
+
+
+async def test_result_is_shared_through_redis_with_its_remaining_ttl(cache, redis):
+    tool = FakeTool()
+    tool.release.set()
+    await cache.get_or_execute(key(cache), 60, tool.execute)
+    # Written 20 seconds ago
+    await redis.pexpire(key(cache), 40_000)
+
+    # Another worker process
+    other = ToolResultCache(redis, max_entries=100)
+    result = await other.get_or_execute(key(cache), 60, tool.execute)
+
+    assert result.content == "Sonnig, 21 Grad"
+    assert tool.calls == 1
+    expires_at, _ = other.memory.entries[key(cache)]
+    assert 35 < expires_at - time.monotonic() <= 40
+
+
+async def test_redis_failure_falls_back_to_executing(cache, redis, monkeypatch):
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("Redis unavailable")
+
+    monkeypatch.setattr(redis, "get", unavailable)
+    monkeypatch.setattr(redis, "set", unavailable)
+    tool = FakeTool()
+    tool.release.set()
+
+    assert (await cache.get_or_execute(key(cache), 60, tool.execute)).content == "Sonnig, 21 Grad"
+    # Still cached in memory
+    assert (await cache.get_or_execute(key(cache), 60, tool.execute)).content == "Sonnig, 21 Grad"
+    assert tool.calls == 1
+
+
+def test_cache_key_normalizes_arguments():
+    cache = ToolResultCache(redis=None, max_entries=1)
+    assert key(cache, method="get", city=" Berlin ") == key(cache, method="GET", city="Berlin")
+    assert key(cache, city="Berlin") != key(cache, city="Hamburg")
+    assert cache.cache_key(1, TOOL, {}) != cache.cache_key(2, TOOL, {})
+
+
+def test_only_idempotent_calls_are_cacheable():
+    assert is_cacheable(TOOL, {"method": "get"})
+    assert not is_cacheable(TOOL, {"method": "POST"})
+    assert not is_cacheable({"name": "end_call", "cache_ttl": 60}, {})
+    assert not is_cacheable({"name": "api_call"}, {"method": "GET"})
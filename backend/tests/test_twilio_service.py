@@ -0,0 +1,127 @@
+from typing import List
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.twilio_service import TwilioService, TwilioAPIError
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeTwilio:
+    """Fake Twilio REST API answering each request with the next queued response"""
+
+    def __init__(self, *responses):
+        self.responses: List = list(responses)
+        self.requests: List[httpx.Request] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "TWILIO_RETRY_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(settings, "TWILIO_MAX_RETRIES", 3)
+
+
+@pytest.fixture
+async def service():
+    service = TwilioService()
+    yield service
+    await service.close()
+
+
+def connect(service: TwilioService, fake: FakeTwilio) -> None:
+    service._client = httpx.AsyncClient(
+        base_url="https://twilio.test",
+        transport=httpx.MockTransport(fake.handler)
+    )
+
+
+async def test_server_error_is_retried(service):
+    fake = FakeTwilio(
+        httpx.Response(503, text="Service Unavailable"),
+        httpx.Response(200, json={"sid": "CA123", "status": "completed"})
+    )
+    connect(service, fake)
+
+    await service.end_call("CA123")
+
+    assert len(fake.requests) == 2
+    assert fake.requests[0].url.path == "/2010-04-01/Accounts/ACtest/Calls/CA123.json"
+    assert fake.requests[1].content == b"Status=completed"
+
+
+async def test_client_error_is_not_retried(service):
+    fake = FakeTwilio(httpx.Response(400, json={"code": 21205, "message": "Invalid Url"}))
+    connect(service, fake)
+
+    with pytest.raises(TwilioAPIError) as error:
+        await service.transfer_call("CA123", "+4930111111")
+
+    assert len(fake.requests) == 1
+    assert error.value.status_code == 400
+    assert "Invalid Url" in str(error.value)
+
+
+async def test_server_errors_exhaust_retries(service):
+    fake = FakeTwilio(httpx.Response(500, text="Internal Server Error"))
+    connect(service, fake)
+
+    with pytest.raises(TwilioAPIError) as error:
+        await service.end_call("CA123")
+
+    assert len(fake.requests) == settings.TWILIO_MAX_RETRIES + 1
+    assert error.value.status_code == 500
+
+
+async def test_create_call_is_not_retried_on_server_error(service):
+    # Twilio may already have placed the call
+    fake = FakeTwilio(httpx.Response(502, text="Bad Gateway"))
+    connect(service, fake)
+
+    with pytest.raises(TwilioAPIError) as error:
+        await service.create_call("+4930111111", "https://example.test/incoming-call")
+
+    assert len(fake.requests) == 1
+    assert error.value.status_code == 502
+
+
+async def test_create_call_is_retried_when_throttled(service):
+    fake = FakeTwilio(
+        httpx.Response(429, headers={"Retry-After": "0"}, text="Too Many Requests"),
+        httpx.Response(201, json={"sid": "CA456"})
+    )
+    connect(service, fake)
+
+    assert await service.create_call("+4930111111", "https://example.test/incoming-call") == "CA456"
+    assert len(fake.requests) == 2
+
+
+async def test_connection_errors_are_retried(service):
+    fake = FakeTwilio(
+        httpx.ConnectError("Connection refused"),
+        httpx.Response(200, json={"sid": "CA123"})
+    )
+    connect(service, fake)
+
+    await service.end_call("CA123")
+
+    assert len(fake.requests) == 2
+
+
+async def test_read_timeout_is_not_retried_for_create_call(service):
+    fake = FakeTwilio(httpx.ReadTimeout("Timed out"))
+    connect(service, fake)
+
+    with pytest.raises(TwilioAPIError) as error:
+        await service.create_call("+4930111111", "https://example.test/incoming-call")
+
+    assert len(fake.requests) == 1
+    assert error.value.status_code is None
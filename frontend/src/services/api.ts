@@ -57,6 +57,22 @@ api.interceptors.response.use(
   }
 );
 
+// Response header with the cursor of the next page, absent on the last page
+const NEXT_CURSOR_HEADER = 'x-next-cursor';
+
+// Follow the cursor of a paged list endpoint and return all items in one response
+const getAllPages = async (url: string, params?: any) => {
+  let response = await api.get(url, { params });
+  const items = [...response.data];
+
+  while (response.headers[NEXT_CURSOR_HEADER]) {
+    response = await api.get(url, { params: { ...params, cursor: response.headers[NEXT_CURSOR_HEADER] } });
+    items.push(...response.data);
+  }
+
+  return { ...response, data: items };
+};
+
 // Auth API
 export const authAPI = {
   register: (data: any) => api.post('/api/v1/auth/register', data),
@@ -85,7 +101,8 @@ export const phoneNumbersAPI = {
 export const callsAPI = {
   listConversations: (params?: any) => api.get('/api/v1/calls/conversations', { params }),
   getConversation: (id: number) => api.get(`/api/v1/calls/conversations/${id}`),
-  getMessages: (id: number) => api.get(`/api/v1/calls/conversations/${id}/messages`),
+  // All messages of a conversation, however many pages
+  getMessages: (id: number) => getAllPages(`/api/v1/calls/conversations/${id}/messages`),
   getCallLog: (id: number) => api.get(`/api/v1/calls/conversations/${id}/log`),
 };
 